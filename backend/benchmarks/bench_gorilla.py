@@ -0,0 +1,159 @@
+"""Gorilla block encode/decode throughput and compression ratio.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_gorilla --history ./data/history.grl
+    python -m benchmarks.bench_gorilla --fetch --markets 20
+    python -m benchmarks.bench_gorilla --synthetic
+
+``--history`` replays series recorded by the ingestion loop
+(COMPRESSED_HISTORY_PATH), ``--fetch`` pulls recent price history for the
+top Polymarket and Kalshi markets, ``--synthetic`` generates random walks.
+Results are grouped by platform.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+import numpy as np
+
+from services.compressed_history import CompressedHistory
+from utils.gorilla import decode_block, encode_block
+
+Series = Tuple[np.ndarray, Dict[str, np.ndarray]]
+
+
+def platform_of(market_id: str) -> str:
+    if market_id.startswith("poly_"):
+        return "polymarket"
+    if market_id.startswith("kalshi_"):
+        return "kalshi"
+    return "other"
+
+
+def load_recorded(path: str) -> Dict[str, Series]:
+    history = CompressedHistory()
+    history.load(path)
+    series = {}
+    for market_id in history.blocks:
+        data = history.read(market_id)
+        timestamps = data.pop("timestamp").astype(np.int64)
+        series[market_id] = (timestamps, data)
+    return series
+
+
+async def fetch_live(n_markets: int) -> Dict[str, Series]:
+    from services.kalshi_service import get_kalshi_service
+    from services.polymarket_service import get_polymarket_service
+
+    poly = get_polymarket_service()
+    kalshi = get_kalshi_service()
+    series = {}
+
+    for raw in await poly.get_markets(limit=n_markets):
+        token_ids = raw.get("clobTokenIds")
+        if isinstance(token_ids, str):
+            token_ids = json.loads(token_ids)
+        if not token_ids:
+            continue
+        response = await poly.clob_client.get(
+            "/prices-history",
+            params={"market": token_ids[0], "interval": "1w", "fidelity": 1},
+        )
+        points = response.json().get("history", []) if response.is_success else []
+        if len(points) > 1:
+            series[f"poly_{raw['id']}"] = (
+                np.array([p["t"] for p in points], dtype=np.int64),
+                {"probability": np.array([p["p"] for p in points], dtype=np.float64)},
+            )
+
+    result = await kalshi.get_markets(limit=n_markets)
+    for raw in result.get("markets", []):
+        columns = kalshi.history_to_columns(await kalshi.get_market_history(raw["ticker"], limit=1000))
+        if len(columns["timestamp"]) > 1:
+            series[f"kalshi_{raw['ticker']}"] = (
+                np.array(columns.pop("timestamp"), dtype=np.int64),
+                {k: np.array(v, dtype=np.float64) for k, v in columns.items()},
+            )
+
+    await poly.close()
+    await kalshi.close()
+    return series
+
+
+def synthetic(n_markets: int, length: int = 1440) -> Dict[str, Series]:
+    rng = np.random.default_rng(0)
+    series = {}
+    for i in range(n_markets):
+        timestamps = 1_700_000_000 + 60 * np.arange(length, dtype=np.int64)
+        # Prices tick in cents and mostly sit still between trades
+        moves = rng.choice([-0.01, 0.0, 0.01], size=length, p=[0.05, 0.9, 0.05])
+        probability = np.clip(np.round(0.5 + np.cumsum(moves), 2), 0.01, 0.99)
+        open_interest = np.round(100_000 + np.cumsum(rng.integers(-50, 60, size=length)), 0)
+        platform = "poly" if i % 2 == 0 else "kalshi"
+        series[f"{platform}_synthetic{i}"] = (
+            timestamps,
+            {"probability": probability, "open_interest": open_interest.astype(np.float64)},
+        )
+    return series
+
+
+def run(series: Dict[str, Series], repeat: int) -> Dict[str, Dict[str, float]]:
+    totals = defaultdict(lambda: defaultdict(float))
+    for market_id, (timestamps, columns) in series.items():
+        t = totals[platform_of(market_id)]
+        raw_bytes = timestamps.nbytes + sum(v.nbytes for v in columns.values())
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            block = encode_block(timestamps, columns)
+        t["encode_seconds"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            decode_block(block)
+        t["decode_seconds"] += time.perf_counter() - start
+
+        t["series"] += 1
+        t["samples"] += len(timestamps) * repeat
+        t["raw_bytes"] += raw_bytes
+        t["compressed_bytes"] += len(block)
+
+    report = {}
+    for platform, t in totals.items():
+        report[platform] = {
+            "series": int(t["series"]),
+            "samples": int(t["samples"] / repeat),
+            "compression_ratio": round(t["raw_bytes"] / t["compressed_bytes"], 2),
+            "bits_per_sample": round(8 * t["compressed_bytes"] / (t["samples"] / repeat), 2),
+            "encode_samples_per_sec": round(t["samples"] / t["encode_seconds"]),
+            "decode_samples_per_sec": round(t["samples"] / t["decode_seconds"]),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--history", help="Compressed history file recorded by ingestion")
+    source.add_argument("--fetch", action="store_true", help="Fetch live price history")
+    source.add_argument("--synthetic", action="store_true", help="Use generated random walks (default)")
+    parser.add_argument("--markets", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.history:
+        series: Dict[str, Series] = load_recorded(args.history)
+    elif args.fetch:
+        series = asyncio.run(fetch_live(args.markets))
+    else:
+        series = synthetic(args.markets)
+
+    print(json.dumps(run(series, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
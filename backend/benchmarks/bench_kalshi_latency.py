@@ -0,0 +1,166 @@
+"""End-to-end latency from a Kalshi feed event to our own WebSocket clients.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_kalshi_latency
+    python -m benchmarks.bench_kalshi_latency --rate 200 --flush-seconds 0.1 --batch-ms 25
+
+Starts, in one process, the Kalshi simulator, a ``KalshiStream`` tracking
+``--markets`` of its markets, and the ``/ws/markets`` router under uvicorn with
+``--clients`` real WebSocket clients subscribed to ``platform:kalshi``. The
+simulator random-walks YES asks at ``--rate`` events per second for
+``--seconds``; a client's latency sample is the time from the simulator
+publishing a move to that client receiving the market_update carrying the
+new price. Moves superseded before they reach a client (coalesced by the
+stream flush or the socket batch window) yield no sample.
+
+Reports client latency percentiles next to the server's ``quotes.latency``
+histogram (feed receipt to client queue), so the part spent in the socket
+writer and on the wire is the difference. The floor is roughly
+``--flush-seconds`` plus ``--batch-ms``.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import uvicorn
+import websockets
+from fastapi import FastAPI
+
+from benchmarks.kalshi_simulator import KalshiSimulator
+from benchmarks.load_ws import percentiles
+from routers import websocket_router
+from routers.websocket import cluster, manager
+from services.kalshi_stream import KalshiStream
+from services.market_deltas import get_market_delta_tracker
+from services.market_snapshot import get_market_snapshot
+from utils.metrics import metrics
+
+
+def seed_snapshot(simulator: KalshiSimulator) -> None:
+    """Put the simulator's markets in the snapshot so quotes have something to update."""
+    markets = []
+    for i, (ticker, ask) in enumerate(simulator.yes_ask.items()):
+        markets.append({
+            "id": f"kalshi_{ticker}",
+            "platform": "kalshi",
+            "title": f"Simulated Kalshi market {ticker}?",
+            "category": "Economics",
+            "status": "open",
+            "probability": ask / 100,
+            "price_yes": ask / 100,
+            "price_no": round(1 - ask / 100, 4),
+            "open_interest": 1000.0 + i,
+            "volume_24h": 100.0 + i,
+        })
+    get_market_snapshot().update(markets, datetime.utcnow())
+    get_market_delta_tracker().diff(markets)
+
+
+async def client(url: str, simulator: KalshiSimulator, samples: List[float], ready: asyncio.Event) -> None:
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({"type": "subscribe", "topic": "platform:kalshi"}))
+        async for raw in ws:
+            received = time.perf_counter()
+            message = json.loads(raw)
+            for m in message["messages"] if message.get("type") == "batch" else [message]:
+                if m.get("type") == "subscribed":
+                    ready.set()
+                price = m.get("changes", {}).get("price_yes") if m.get("type") == "market_update" else None
+                if price is None:
+                    continue
+                sent = simulator.sent_at.get((m["market_id"][len("kalshi_"):], round(price * 100)))
+                if sent is not None:
+                    samples.append(received - sent)
+
+
+async def run(args) -> Dict:
+    simulator = KalshiSimulator([f"SIM-{i}" for i in range(args.markets)], seed=args.seed)
+    feed_url = await simulator.start()
+    seed_snapshot(simulator)
+
+    config = uvicorn.Config(FastAPI(routes=websocket_router.routes), host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    cluster.start()
+
+    stream = KalshiStream(feed_url, flush_interval=args.flush_seconds)
+    await stream.track([{"id": f"kalshi_{ticker}", "platform": "kalshi"} for ticker in simulator.yes_ask])
+    stream.start()
+
+    samples: List[List[float]] = [[] for _ in range(args.clients)]
+    ready = [asyncio.Event() for _ in range(args.clients)]
+    url = f"ws://127.0.0.1:{args.port}/ws/markets"
+    clients = [asyncio.create_task(client(url, simulator, s, e)) for s, e in zip(samples, ready)]
+    try:
+        await asyncio.wait_for(asyncio.gather(*(e.wait() for e in ready)), 10)
+        while len(stream.books) < args.markets:
+            await asyncio.sleep(0.01)
+        for connection in manager.clients.values():
+            connection.batch_window = args.batch_ms / 1000
+        server_latency = metrics.histogram("quotes.latency")
+        server_before = server_latency.count
+
+        interval = max(0.01, 1 / args.rate)
+        per_tick = round(args.rate * interval)
+        sent = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < args.seconds:
+            for _ in range(per_tick):
+                await simulator.step()
+                sent += 1
+            await asyncio.sleep(interval)
+        elapsed = time.perf_counter() - started
+        # Let the last flush and batch reach the clients
+        await asyncio.sleep(args.flush_seconds + args.batch_ms / 1000 + 0.2)
+    finally:
+        for task in clients:
+            task.cancel()
+        await asyncio.gather(*clients, return_exceptions=True)
+        await stream.stop()
+        await cluster.stop()
+        server.should_exit = True
+        await serving
+        await simulator.stop()
+
+    all_samples = np.array([x for s in samples for x in s])
+    return {
+        "markets": args.markets,
+        "clients": args.clients,
+        "flush_seconds": args.flush_seconds,
+        "batch_ms": args.batch_ms,
+        "events_per_s": round(sent / elapsed),
+        "samples_per_client": round(len(all_samples) / args.clients),
+        "delivered_share": round(len(all_samples) / args.clients / sent, 3) if sent else 0,
+        "end_to_end_ms": percentiles(all_samples),
+        # Bucket upper bounds, except max
+        "server_quotes_latency_ms": {
+            k: round(server_latency.to_dict()[k] * 1000, 1) for k in ("p50", "p95", "p99", "max")
+        },
+        "server_quotes_observed": server_latency.count - server_before,
+        "gaps": metrics.counter("kalshi_stream.gaps").value,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--rate", type=int, default=50, help="Simulator moves per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--flush-seconds", type=float, default=0.5, help="KalshiStream flush interval")
+    parser.add_argument("--batch-ms", type=float, default=100, help="Per-socket batch window")
+    parser.add_argument("--port", type=int, default=8102)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Notification evaluation time per ingestion cycle.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_notifications
+    python -m benchmarks.bench_notifications --rules 5000000 --markets 2000
+
+Loads ``--rules`` random rules spread over ``--markets`` markets, then runs
+``--cycles`` evaluations against random-walk snapshots and reports load time
+and per-cycle evaluation latency.
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services.notification_engine import NOTIFICATION_TYPES, NotificationEngine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=1_000_000)
+    parser.add_argument("--markets", type=int, default=1000)
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    market_ids = [f"poly_{i}" for i in range(args.markets)]
+    rule_markets = rng.integers(0, args.markets, args.rules)
+    rule_types = rng.integers(0, len(NOTIFICATION_TYPES), args.rules)
+    thresholds = rng.uniform(5, 100, args.rules)
+    rows = [
+        (f"n{i}", f"user_{i % 50_000}", market_ids[m], NOTIFICATION_TYPES[t], float(v))
+        for i, (m, t, v) in enumerate(zip(rule_markets, rule_types, thresholds))
+    ]
+
+    engine = NotificationEngine(cooldown=0)
+    start = time.perf_counter()
+    engine.load(rows)
+    load_seconds = time.perf_counter() - start
+
+    probability = rng.uniform(0.05, 0.95, args.markets)
+    open_interest = rng.uniform(1e3, 1e6, args.markets)
+    volume = rng.uniform(1e2, 1e5, args.markets)
+    timings, fired = [], []
+    timestamp = datetime(2024, 1, 1)
+    for _ in range(args.cycles):
+        probability = np.clip(probability + rng.normal(0, 0.01, args.markets), 0.01, 0.99)
+        open_interest *= rng.lognormal(0, 0.02, args.markets)
+        volume *= rng.lognormal(0, 0.05, args.markets)
+        markets = [
+            {
+                "id": market_ids[i],
+                "probability": probability[i],
+                "open_interest": open_interest[i],
+                "volume_24h": volume[i],
+                "change_24h": rng.normal(0, 3),
+            }
+            for i in range(args.markets)
+        ]
+        timestamp += timedelta(minutes=1)
+        fired.append(len(engine.evaluate(markets, timestamp)))
+        timings.append(engine.last_eval_seconds)
+
+    print(json.dumps({
+        "rules": args.rules,
+        "markets": args.markets,
+        "load_s": round(load_seconds, 2),
+        "evaluate_median_ms": round(statistics.median(timings) * 1000, 1),
+        "evaluate_max_ms": round(max(timings) * 1000, 1),
+        "alerts_per_cycle": round(statistics.mean(fired[1:] or fired)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
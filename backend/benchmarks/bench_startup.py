@@ -0,0 +1,108 @@
+"""App import time and time-to-first-request.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --top 15
+
+Each run starts a fresh interpreter, so numbers include module loading the
+way a new worker or test process sees it. ``import`` is the time to import
+``main``; ``first_request`` adds running the lifespan and serving
+``GET /health`` in-process. ``--top`` lists the slowest modules from
+``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+served = time.perf_counter()
+print(imported - start, served - start)
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Measure the app itself, not the ingestion loop's first upstream fetch
+    env.setdefault("INGESTION_ENABLED", "false")
+    return env
+
+
+def measure(runs: int) -> Dict[str, Dict[str, float]]:
+    imports: List[float] = []
+    first_requests: List[float] = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE],
+            cwd=BACKEND_DIR,
+            env=_env(),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        imported, served = map(float, out.strip().splitlines()[-1].split())
+        imports.append(imported)
+        first_requests.append(served)
+
+    def summary(samples: List[float]) -> Dict[str, float]:
+        return {
+            "min_ms": round(min(samples) * 1000, 1),
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+        }
+
+    return {"import": summary(imports), "first_request": summary(first_requests)}
+
+
+def slowest_imports(top: int) -> List[Dict[str, float]]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": round(int(self_us) / 1000, 1),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 1),
+        })
+    # Top-level packages only, so nested modules do not double count
+    top_level = [m for m in modules if "." not in m["module"]]
+    return sorted(top_level, key=lambda m: m["cumulative_ms"], reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest top-level imports")
+    args = parser.parse_args()
+
+    report = measure(args.runs)
+    if args.top:
+        report["slowest_imports"] = slowest_imports(args.top)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
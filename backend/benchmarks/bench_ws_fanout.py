@@ -0,0 +1,123 @@
+"""WebSocket fan-out cost per 1k clients by batching window and wire format.
+
+Run from ``backend/``::
+
+    python -m benchmarks.bench_ws_fanout
+    python -m benchmarks.bench_ws_fanout --clients 5000 --updates-per-second 200
+
+Connects ``--clients`` in-process sockets subscribed to every Polymarket
+update, publishes ``market_update`` messages at ``--updates-per-second`` for
+``--seconds`` and reports, for each batching window and format, socket
+frames and bytes per second per 1k clients and the process CPU time spent
+per second of traffic per 1k clients. ``deflate`` rows compress each frame
+with a per-socket zlib stream flushed per message, the way
+permessage-deflate with context takeover does on the wire.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+
+from routers.websocket import ConnectionManager
+from utils.ws_frames import MSGPACK_SUBPROTOCOL, Frame
+
+
+class CountingSocket:
+    def __init__(self, deflate: bool):
+        self.frames = 0
+        self.bytes = 0
+        self.compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS) if deflate else None
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        self.record(text.encode())
+
+    async def send_bytes(self, data):
+        self.record(data)
+
+    def record(self, data: bytes):
+        if self.compressor is not None:
+            data = self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.frames += 1
+        self.bytes += len(data)
+
+
+async def run(clients: int, window_ms: float, binary: bool, deflate: bool, rate: int, seconds: float) -> dict:
+    manager = ConnectionManager()
+    sockets = [CountingSocket(deflate) for _ in range(clients)]
+    for socket in sockets:
+        await manager.connect(socket, MSGPACK_SUBPROTOCOL if binary else None)
+        manager.clients[socket].batch_window = window_ms / 1000
+        manager.topics.subscribe(socket, "platform:polymarket")
+
+    rng = random.Random(0)
+    seqs = {}
+    sent = 0
+    interval = max(0.01, 1 / rate)
+    per_tick = round(rate * interval)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    while time.perf_counter() - wall_start < seconds:
+        for _ in range(per_tick):
+            market_id = f"poly_{rng.randrange(500)}"
+            seqs[market_id] = seqs.get(market_id, 0) + 1
+            await manager.publish_market({"id": market_id, "platform": "polymarket"}, Frame({
+                "type": "market_update",
+                "market_id": market_id,
+                "seq": seqs[market_id],
+                "changes": {
+                    "probability": round(rng.random(), 4),
+                    "price_yes": round(rng.random(), 4),
+                    "volume_24h": round(rng.uniform(1e3, 1e6), 2),
+                },
+                "timestamp": "2024-01-01T12:00:00.000000",
+            }))
+            sent += 1
+        await asyncio.sleep(interval)
+    # Let the last batch go out
+    await asyncio.sleep(window_ms / 1000 + 0.05)
+    elapsed = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    for socket in sockets:
+        manager.disconnect(socket)
+
+    per_1k = 1000 / clients / elapsed
+    frames = sum(s.frames for s in sockets)
+    return {
+        "window_ms": window_ms,
+        "format": "msgpack" if binary else "json",
+        "deflate": deflate,
+        "updates_per_s": round(sent / elapsed),
+        "frames_per_s_per_1k": round(frames * per_1k),
+        "kb_per_s_per_1k": round(sum(s.bytes for s in sockets) * per_1k / 1024, 1),
+        "cpu_ms_per_s_per_1k": round(cpu * 1000 * per_1k, 1),
+        "messages_per_frame": round(sent * clients / frames, 1) if frames else 0,
+    }
+
+
+async def main_async(args) -> None:
+    results = []
+    for window_ms in args.windows:
+        for binary in (False, True):
+            for deflate in (False, True):
+                results.append(await run(
+                    args.clients, window_ms, binary, deflate, args.updates_per_second, args.seconds,
+                ))
+    print(json.dumps({"clients": args.clients, "results": results}, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--updates-per-second", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 50, 100, 250])
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Stand-in for the Polymarket Gamma/CLOB and Kalshi REST APIs.
+
+Serves ``FAKE_UPSTREAM_MARKETS`` markets per platform whose prices, volume
+and open interest random-walk on every list request, so each ingestion cycle
+produces a realistic share of market deltas. Mounted under ``/gamma``,
+``/clob`` and ``/kalshi``; point the app at it with::
+
+    POLYMARKET_GAMMA_HOST=http://127.0.0.1:8101/gamma
+    POLYMARKET_CLOB_HOST=http://127.0.0.1:8101/clob
+    KALSHI_API_URL=http://127.0.0.1:8101/kalshi
+
+Run with ``python -m uvicorn benchmarks.fake_upstream:app --port 8101``.
+"""
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+
+FAKE_UPSTREAM_MARKETS = int(os.getenv("FAKE_UPSTREAM_MARKETS", "500"))
+# Share of markets that move between two list requests
+FAKE_UPSTREAM_MOVE_FRACTION = float(os.getenv("FAKE_UPSTREAM_MOVE_FRACTION", "0.3"))
+
+CATEGORIES = ("Politics", "Sports", "Crypto", "Economics", "Science", "Culture")
+
+app = FastAPI(title="Fake upstream")
+rng = random.Random(0)
+
+
+def _initial(i: int) -> Dict[str, Any]:
+    return {
+        "probability": rng.uniform(0.05, 0.95),
+        "open_interest": rng.lognormvariate(11, 1.5),
+        "volume_24h": rng.lognormvariate(9, 1.5),
+        "category": CATEGORIES[i % len(CATEGORIES)],
+    }
+
+
+poly_state = [_initial(i) for i in range(FAKE_UPSTREAM_MARKETS)]
+kalshi_state = [_initial(i) for i in range(FAKE_UPSTREAM_MARKETS)]
+
+
+def step(state: List[Dict[str, Any]]) -> None:
+    for market in rng.sample(state, int(len(state) * FAKE_UPSTREAM_MOVE_FRACTION)):
+        market["probability"] = min(0.99, max(0.01, market["probability"] + rng.gauss(0, 0.01)))
+        market["open_interest"] *= rng.lognormvariate(0, 0.01)
+        market["volume_24h"] *= rng.lognormvariate(0, 0.02)
+
+
+def poly_market(i: int) -> Dict[str, Any]:
+    m = poly_state[i]
+    return {
+        "id": str(i),
+        "question": f"Fake Polymarket market {i}?",
+        "category": m["category"],
+        "outcomes": ["Yes", "No"],
+        "outcomePrices": [f"{m['probability']:.3f}", f"{1 - m['probability']:.3f}"],
+        "volume": f"{m['volume_24h'] * 30:.2f}",
+        "volume24hr": round(m["volume_24h"], 2),
+        "liquidity": f"{m['open_interest']:.2f}",
+        "oneDayPriceChange": 0,
+        "endDate": "2030-01-01T00:00:00Z",
+        "closed": False,
+    }
+
+
+def kalshi_market(i: int) -> Dict[str, Any]:
+    m = kalshi_state[i]
+    cents = max(1, min(99, round(m["probability"] * 100)))
+    return {
+        "ticker": f"FAKE-{i}",
+        "title": f"Fake Kalshi market {i}?",
+        "category": m["category"],
+        "status": "open",
+        "yes_ask": cents,
+        "no_ask": 100 - cents,
+        "last_price": cents,
+        "previous_price": cents,
+        "volume": round(m["volume_24h"] * 30),
+        "volume_24h": round(m["volume_24h"]),
+        "open_interest": round(m["open_interest"]),
+        "close_time": "2030-01-01T00:00:00Z",
+    }
+
+
+@app.get("/gamma/markets")
+async def gamma_markets(
+    limit: int = 100,
+    offset: int = 0,
+    id: Optional[List[str]] = Query(None),
+):
+    if id:
+        return [poly_market(int(i)) for i in id if i.isdigit() and int(i) < len(poly_state)]
+    step(poly_state)
+    return [poly_market(i) for i in range(offset, min(offset + limit, len(poly_state)))]
+
+
+@app.get("/gamma/markets/{market_id}")
+async def gamma_market(market_id: str):
+    if not market_id.isdigit() or int(market_id) >= len(poly_state):
+        raise HTTPException(status_code=404)
+    return poly_market(int(market_id))
+
+
+@app.get("/clob/price")
+async def clob_price(token_id: str, side: str = "BUY"):
+    return {"price": "0.5"}
+
+
+@app.get("/kalshi/markets")
+async def kalshi_markets(limit: int = 100, status: str = "open", tickers: Optional[str] = None):
+    if tickers:
+        wanted = {t.removeprefix("FAKE-") for t in tickers.split(",")}
+        return {"markets": [kalshi_market(int(i)) for i in wanted if i.isdigit() and int(i) < len(kalshi_state)]}
+    step(kalshi_state)
+    return {"markets": [kalshi_market(i) for i in range(min(limit, len(kalshi_state)))], "cursor": None}
+
+
+@app.get("/kalshi/markets/{ticker}")
+async def kalshi_market_detail(ticker: str):
+    i = ticker.removeprefix("FAKE-")
+    if not i.isdigit() or int(i) >= len(kalshi_state):
+        raise HTTPException(status_code=404)
+    return {"market": kalshi_market(int(i))}
@@ -0,0 +1,184 @@
+"""Stand-in for Kalshi's WebSocket ``ticker`` and ``orderbook_delta`` channels.
+
+Speaks enough of the trade API v2 WebSocket protocol for ``KalshiStream``:
+``subscribe`` and ``update_subscription`` commands, ``subscribed``
+acknowledgements, ``orderbook_snapshot`` / ``orderbook_delta`` messages with a
+per-subscription ``seq``, and ``ticker`` messages. Each market's book is one
+YES and one NO bid level around a YES ask that ``move`` shifts, so the quote
+the stream derives is known ahead of time. ``get_market_orderbook`` mirrors
+the REST endpoint, so the simulator can also stand in for ``KalshiService``
+when the stream resyncs.
+
+``drop_next_delta`` applies the next delta without sending it, leaving a
+seq gap; ``sent_at`` records when each ``(ticker, yes ask)`` was last
+published, for feed-to-client latency measurements. No authentication is
+checked.
+"""
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import websockets
+
+SPREAD_CENTS = 2
+LEVEL_SIZE = 100
+
+
+class Subscriber:
+    """One connection's channels and the markets each covers."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        # channel -> sid, and channel -> markets
+        self.sids: Dict[str, int] = {}
+        self.tickers: Dict[str, Set[str]] = {}
+        self.seq: Dict[int, int] = {}
+
+    def follows(self, channel: str, ticker: str) -> bool:
+        return ticker in self.tickers.get(channel, ())
+
+
+class KalshiSimulator:
+    def __init__(self, tickers: List[str], seed: int = 0):
+        self.rng = random.Random(seed)
+        self.yes_ask: Dict[str, int] = {t: self.rng.randint(10, 90) for t in tickers}
+        self.subscribers: List[Subscriber] = []
+        self.commands: List[Dict[str, Any]] = []
+        self.orderbook_requests: List[str] = []
+        # (ticker, yes ask cents) -> perf_counter when it was last published
+        self.sent_at: Dict[Tuple[str, int], float] = {}
+        # Seconds to hold each ``subscribed`` reply, to widen the window before sids are known
+        self.subscribe_delay = 0.0
+        self._next_sid = 0
+        self._drop_deltas = 0
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await websockets.serve(self.handler, host, port)
+        return f"ws://{host}:{self._server.sockets[0].getsockname()[1]}/trade-api/ws/v2"
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def handler(self, ws, path: Optional[str] = None):
+        subscriber = Subscriber(ws)
+        self.subscribers.append(subscriber)
+        try:
+            async for message in ws:
+                command = json.loads(message)
+                self.commands.append(command)
+                await self.handle_command(subscriber, command)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.subscribers.remove(subscriber)
+
+    async def handle_command(self, subscriber: Subscriber, command: Dict[str, Any]) -> None:
+        params = command.get("params", {})
+        tickers = [t for t in params.get("market_tickers", []) if t in self.yes_ask]
+        if command["cmd"] == "subscribe":
+            if self.subscribe_delay:
+                await asyncio.sleep(self.subscribe_delay)
+            for channel in params["channels"]:
+                self._next_sid += 1
+                subscriber.sids[channel] = self._next_sid
+                subscriber.tickers[channel] = set(tickers)
+                subscriber.seq[self._next_sid] = 0
+                await subscriber.ws.send(json.dumps({
+                    "id": command["id"], "type": "subscribed",
+                    "msg": {"channel": channel, "sid": self._next_sid},
+                }))
+            await self.send_snapshots(subscriber, tickers)
+        elif command["cmd"] == "update_subscription":
+            for channel, sid in subscriber.sids.items():
+                if sid not in params["sids"]:
+                    continue
+                if params["action"] == "add_markets":
+                    new = [t for t in tickers if t not in subscriber.tickers[channel]]
+                    subscriber.tickers[channel].update(new)
+                    if channel == "orderbook_delta":
+                        await self.send_snapshots(subscriber, new)
+                else:
+                    subscriber.tickers[channel].difference_update(tickers)
+
+    def book(self, ticker: str) -> Dict[str, List[List[int]]]:
+        ask = self.yes_ask[ticker]
+        return {"yes": [[ask - SPREAD_CENTS, LEVEL_SIZE]], "no": [[100 - ask, LEVEL_SIZE]]}
+
+    async def get_market_orderbook(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Same shape as ``KalshiService.get_market_orderbook``."""
+        self.orderbook_requests.append(ticker)
+        return {"orderbook": self.book(ticker)} if ticker in self.yes_ask else None
+
+    async def send_snapshots(self, subscriber: Subscriber, tickers: List[str]) -> None:
+        if "orderbook_delta" not in subscriber.sids:
+            return
+        for ticker in tickers:
+            await self.send(subscriber, "orderbook_delta", "orderbook_snapshot", {"market_ticker": ticker, **self.book(ticker)})
+
+    async def send(self, subscriber: Subscriber, channel: str, kind: str, msg: Dict[str, Any], drop: bool = False) -> None:
+        sid = subscriber.sids[channel]
+        message = {"type": kind, "sid": sid, "msg": msg}
+        if channel == "orderbook_delta":
+            subscriber.seq[sid] += 1
+            message["seq"] = subscriber.seq[sid]
+        if not drop:
+            try:
+                await subscriber.ws.send(json.dumps(message))
+            except websockets.ConnectionClosed:
+                pass
+
+    def drop_next_delta(self) -> None:
+        """Leave a seq gap: the next delta moves the book but never goes out."""
+        self._drop_deltas += 1
+
+    async def move(self, ticker: str, yes_ask: int) -> None:
+        """Shift a market's YES ask, publishing deltas and a ticker message."""
+        old = self.yes_ask[ticker]
+        if yes_ask == old:
+            return
+        self.yes_ask[ticker] = yes_ask
+        self.sent_at[(ticker, yes_ask)] = time.perf_counter()
+        # New levels go in before the old ones come out, so the book is never empty
+        deltas = [
+            {"side": "no", "price": 100 - yes_ask, "delta": LEVEL_SIZE},
+            {"side": "no", "price": 100 - old, "delta": -LEVEL_SIZE},
+            {"side": "yes", "price": yes_ask - SPREAD_CENTS, "delta": LEVEL_SIZE},
+            {"side": "yes", "price": old - SPREAD_CENTS, "delta": -LEVEL_SIZE},
+        ]
+        for delta in deltas:
+            drop = self._drop_deltas > 0
+            if drop:
+                self._drop_deltas -= 1
+            for subscriber in list(self.subscribers):
+                if subscriber.follows("orderbook_delta", ticker):
+                    await self.send(subscriber, "orderbook_delta", "orderbook_delta", {"market_ticker": ticker, **delta}, drop)
+        tick = {
+            "market_ticker": ticker,
+            "price": yes_ask,
+            "yes_bid": yes_ask - SPREAD_CENTS,
+            "yes_ask": yes_ask,
+            "ts": int(time.time()),
+        }
+        for subscriber in list(self.subscribers):
+            if subscriber.follows("ticker", ticker):
+                await self.send(subscriber, "ticker", "ticker", tick)
+
+    async def step(self) -> Tuple[str, int]:
+        """Random-walk one market by a few cents; returns its new YES ask."""
+        ticker = self.rng.choice(list(self.yes_ask))
+        old = self.yes_ask[ticker]
+        new = min(95, max(SPREAD_CENTS + 3, old + self.rng.choice((-3, -2, -1, 1, 2, 3))))
+        if new == old:
+            new = old - 1
+        await self.move(ticker, new)
+        return ticker, new
+
+    async def disconnect(self) -> None:
+        for subscriber in list(self.subscribers):
+            await subscriber.ws.close()
@@ -0,0 +1,390 @@
+"""Load test for how many ``/ws/markets`` clients one app worker sustains.
+
+Run from ``backend/`` (Linux: server stats are read from ``/proc``)::
+
+    python -m benchmarks.load_ws --clients 2000
+    python -m benchmarks.load_ws --clients 10000 --processes 8 --format msgpack
+    python -m benchmarks.load_ws --url ws://127.0.0.1:8000/ws/markets --server-pid 1234
+
+Unless ``--url`` is given, starts ``benchmarks.fake_upstream`` and the app
+(one uvicorn worker, no database, ingestion every ``--cycle-seconds``
+against the fake upstream) on local ports. Then opens ``--clients``
+connections from ``--processes`` load generator processes. Each client
+subscribes to a topic mix (``--mix``): one to five markets weighted towards
+the popular ones, a platform, a category or a top-K leaderboard. Once every
+client is connected the harness holds for ``--duration`` seconds and
+reports:
+
+- connection setup rate and handshake latency percentiles
+- market_update latency percentiles, from the server's fan-out timestamp to
+  the client decoding the message
+- server RSS growth per connection and server CPU during the hold
+- dropped/conflated frames and slow-consumer disconnects from ``/metrics``
+- load generator CPU, to tell when the generator rather than the server is
+  the bottleneck
+
+``--max-p99-ms`` and ``--max-kb-per-connection`` make it exit non-zero when
+exceeded, for catching regressions in ``ConnectionManager``.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+import msgpack
+import numpy as np
+import websockets
+
+from services.market_snapshot import LEADERBOARD_SIZE, LEADERBOARDS
+from services.topic_index import PLATFORMS
+from utils.ws_frames import MSGPACK_SUBPROTOCOL
+from benchmarks.fake_upstream import CATEGORIES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = "market=0.5,platform=0.2,category=0.15,top=0.15"
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("market", "platform", "category", "top"):
+            raise argparse.ArgumentTypeError(f"Unknown topic kind: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def choose_topics(rng: random.Random, mix: Dict[str, float], market_ids: List[str]) -> List[str]:
+    kind = rng.choices(list(mix), weights=list(mix.values()))[0]
+    if kind == "market":
+        # Popularity falls off with rank, like real watch patterns
+        weights = [1 / (rank + 1) for rank in range(len(market_ids))]
+        return sorted({f"market:{m}" for m in rng.choices(market_ids, weights, k=rng.randint(1, 5))})
+    if kind == "platform":
+        return [f"platform:{rng.choice(PLATFORMS)}"]
+    if kind == "category":
+        return [f"category:{rng.choice(CATEGORIES).lower()}"]
+    return [f"top:{rng.choice(list(LEADERBOARDS))}:{min(LEADERBOARD_SIZE, rng.choice((5, 10, 20)))}"]
+
+
+def decode(frame) -> List[Dict[str, Any]]:
+    message = msgpack.unpackb(frame) if isinstance(frame, bytes) else json.loads(frame)
+    return message["messages"] if message.get("type") == "batch" else [message]
+
+
+async def run_clients(
+    url: str,
+    subscriptions: List[List[str]],
+    barrier,
+    duration: float,
+    concurrency: int,
+    binary: bool,
+    compression: bool,
+) -> Dict[str, Any]:
+    """Connect, subscribe and receive; record latencies only during the hold."""
+    connect_seconds = array("d")
+    latencies = array("d")
+    state = {"recording": False, "failed": 0, "closed": 0, "messages": 0, "frames": 0, "bytes": 0}
+    sockets = []
+    semaphore = asyncio.Semaphore(concurrency)
+    ramp = asyncio.get_running_loop().create_future()
+    pending = [len(subscriptions)]
+
+    def opened():
+        pending[0] -= 1
+        if pending[0] == 0 and not ramp.done():
+            ramp.set_result(None)
+
+    async def client(topics: List[str]):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                ws = await websockets.connect(
+                    url,
+                    subprotocols=[MSGPACK_SUBPROTOCOL] if binary else None,
+                    compression="deflate" if compression else None,
+                    max_size=None,
+                    ping_interval=None,
+                    open_timeout=60,
+                )
+                await ws.recv()  # "connected"
+            except Exception:
+                state["failed"] += 1
+                opened()
+                return
+            connect_seconds.append(time.perf_counter() - start)
+        sockets.append(ws)
+        for topic in topics:
+            await ws.send(json.dumps({"type": "subscribe", "topic": topic}))
+        opened()
+
+        try:
+            async for frame in ws:
+                if not state["recording"]:
+                    continue
+                received = time.time()
+                state["frames"] += 1
+                state["bytes"] += len(frame)
+                for message in decode(frame):
+                    state["messages"] += 1
+                    if message.get("type") == "market_update":
+                        sent = datetime.fromisoformat(message["timestamp"]).replace(tzinfo=timezone.utc)
+                        latencies.append(received - sent.timestamp())
+        except websockets.ConnectionClosed:
+            if state["recording"]:
+                state["closed"] += 1
+
+    loop = asyncio.get_running_loop()
+    tasks = [asyncio.create_task(client(topics)) for topics in subscriptions]
+    await ramp
+    await loop.run_in_executor(None, barrier.wait)
+
+    cpu_start = time.process_time()
+    state["recording"] = True
+    await asyncio.sleep(duration)
+    state["recording"] = False
+    cpu = time.process_time() - cpu_start
+    # Stay connected until the server has been sampled
+    await loop.run_in_executor(None, barrier.wait)
+
+    await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        "connect_seconds": connect_seconds.tobytes(),
+        "latencies": latencies.tobytes(),
+        "cpu_seconds": cpu,
+        **{k: v for k, v in state.items() if k != "recording"},
+    }
+
+
+def client_process(url, subscriptions, barrier, results, duration, concurrency, binary, compression):
+    raise_fd_limit()
+    try:
+        results.put(asyncio.run(run_clients(url, subscriptions, barrier, duration, concurrency, binary, compression)))
+    except Exception as e:
+        barrier.abort()
+        results.put({"error": str(e)})
+
+
+def raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime, fields 14 and 15 of /proc/<pid>/stat
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def wait_until_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_servers(args) -> List[subprocess.Popen]:
+    upstream = f"http://127.0.0.1:{args.upstream_port}"
+    upstream_env = {**os.environ, "FAKE_UPSTREAM_MARKETS": str(args.markets)}
+    app_env = {
+        **os.environ,
+        "POLYMARKET_GAMMA_HOST": f"{upstream}/gamma",
+        "POLYMARKET_CLOB_HOST": f"{upstream}/clob",
+        "KALSHI_API_URL": f"{upstream}/kalshi",
+        "INGESTION_INTERVAL_SECONDS": str(args.cycle_seconds),
+        "INGESTION_MARKET_LIMIT": str(args.markets),
+        "DATABASE_URL": "",
+        "COMPRESSED_HISTORY_PATH": "",
+        "SNAPSHOT_CHECKPOINT_PATH": "",
+        "SNAPSHOT_ARCHIVE_DIR": "",
+        "WS_BACKPLANE_URL": "",
+        # The fake upstream has no CLOB feed
+        "POLYMARKET_STREAM_ENABLED": "false",
+        "KALSHI_STREAM_ENABLED": "false",
+    }
+    uvicorn = [sys.executable, "-m", "uvicorn", "--log-level", "warning", "--host", "127.0.0.1"]
+    servers = [
+        subprocess.Popen(
+            uvicorn + ["benchmarks.fake_upstream:app", "--port", str(args.upstream_port)],
+            cwd=BACKEND_DIR,
+            env=upstream_env,
+        ),
+    ]
+    wait_until_ready(f"{upstream}/kalshi/markets?limit=1")
+    servers.append(subprocess.Popen(
+        uvicorn + ["main:app", "--port", str(args.port), "--backlog", "4096"],
+        cwd=BACKEND_DIR,
+        env=app_env,
+    ))
+    wait_until_ready(f"http://127.0.0.1:{args.port}/health")
+    return servers
+
+
+def fetch_market_ids(http: str) -> List[str]:
+    ids: List[str] = []
+    for page in range(1, 6):
+        response = httpx.get(f"{http}/api/markets", params={"per_page": 100, "page": page}, timeout=30)
+        response.raise_for_status()
+        ids.extend(m["id"] for m in response.json()["markets"])
+    return list(dict.fromkeys(ids))
+
+
+def percentiles(values: np.ndarray, scale: float = 1000) -> Dict[str, Optional[float]]:
+    if not len(values):
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99]) * scale
+    return {"p50": round(p50, 1), "p90": round(p90, 1), "p99": round(p99, 1), "max": round(values.max() * scale, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=2, help="Load generator processes")
+    parser.add_argument("--connect-concurrency", type=int, default=100, help="Handshakes in flight per process")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to hold once every client is connected")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--format", choices=("json", "msgpack"), default="json")
+    parser.add_argument("--no-compression", action="store_true", help="Do not offer permessage-deflate")
+    parser.add_argument("--url", help="Existing /ws/markets endpoint; skips starting the app")
+    parser.add_argument("--server-pid", type=int, help="PID of the app behind --url, for RSS and CPU")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--upstream-port", type=int, default=8101)
+    parser.add_argument("--markets", type=int, default=200, help="Fake upstream markets per platform")
+    parser.add_argument("--cycle-seconds", type=float, default=5, help="Ingestion interval of the started app")
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--max-kb-per-connection", type=float)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    servers = [] if args.url else start_servers(args)
+    try:
+        url = args.url or f"ws://127.0.0.1:{args.port}/ws/markets"
+        http = url.replace("ws://", "http://", 1).replace("wss://", "https://", 1).rsplit("/ws/", 1)[0]
+        pid = servers[-1].pid if servers else args.server_pid
+        report = run(args, url, http, pid)
+    finally:
+        # App first, so its last ingestion cycle does not hit a dead upstream
+        for server in reversed(servers):
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(report, indent=2))
+    failures = []
+    p99 = report["update_latency_ms"]["p99"]
+    if args.max_p99_ms is not None and (p99 is None or p99 > args.max_p99_ms):
+        failures.append(f"p99 latency {p99}ms > {args.max_p99_ms}ms")
+    per_conn = report["server"].get("rss_kb_per_connection")
+    if args.max_kb_per_connection is not None and per_conn is not None and per_conn > args.max_kb_per_connection:
+        failures.append(f"{per_conn}KB per connection > {args.max_kb_per_connection}KB")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+def run(args, url: str, http: str, pid: Optional[int]) -> Dict[str, Any]:
+    market_ids = fetch_market_ids(http)
+    # Let ingestion populate the snapshot and delta tracker first
+    time.sleep(args.cycle_seconds if not args.url else 0)
+
+    rng = random.Random(args.seed)
+    subscriptions = [choose_topics(rng, args.mix, market_ids) for _ in range(args.clients)]
+    shares = [subscriptions[i::args.processes] for i in range(args.processes)]
+
+    baseline_rss = rss_bytes(pid) if pid else None
+    barrier = mp.Barrier(args.processes + 1)
+    results = mp.Queue()
+    workers = [
+        mp.Process(target=client_process, args=(
+            url, share, barrier, results, args.duration, args.connect_concurrency,
+            args.format == "msgpack", not args.no_compression,
+        ))
+        for share in shares
+    ]
+    ramp_start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    ramp_seconds = time.perf_counter() - ramp_start
+
+    server: Dict[str, Any] = {}
+    if pid:
+        connected_rss = rss_bytes(pid)
+        cpu_start, wall_start = cpu_seconds(pid), time.perf_counter()
+    time.sleep(args.duration)
+    if pid:
+        server["cpu_percent"] = round(100 * (cpu_seconds(pid) - cpu_start) / (time.perf_counter() - wall_start), 1)
+    server_metrics = httpx.get(f"{http}/metrics", timeout=10).json()
+    barrier.wait()
+
+    outcomes = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    errors = [o["error"] for o in outcomes if "error" in o]
+    if errors:
+        raise RuntimeError("; ".join(errors))
+
+    connect = np.concatenate([np.frombuffer(o["connect_seconds"]) for o in outcomes])
+    latencies = np.concatenate([np.frombuffer(o["latencies"]) for o in outcomes])
+    connected = len(connect)
+    if pid:
+        server["rss_mb"] = round(connected_rss / 2**20, 1)
+        if connected:
+            server["rss_kb_per_connection"] = round((connected_rss - baseline_rss) / 1024 / connected, 1)
+    counters = server_metrics.get("counters", {})
+    server.update({
+        "dropped": counters.get("ws.dropped", 0),
+        "conflated": counters.get("ws.conflated", 0),
+        "slow_disconnects": counters.get("ws.slow_disconnects", 0),
+        "connections": server_metrics.get("gauges", {}).get("ws_connections", {}).get("connections"),
+    })
+
+    return {
+        "clients": args.clients,
+        "connected": connected,
+        "failed": sum(o["failed"] for o in outcomes),
+        "closed_during_hold": sum(o["closed"] for o in outcomes),
+        "format": args.format,
+        "compression": not args.no_compression,
+        "ramp_seconds": round(ramp_seconds, 2),
+        "connects_per_second": round(connected / ramp_seconds, 1),
+        "connect_ms": percentiles(connect),
+        "messages_per_second": round(sum(o["messages"] for o in outcomes) / args.duration),
+        "frames_per_second": round(sum(o["frames"] for o in outcomes) / args.duration),
+        "payload_kb_per_second": round(sum(o["bytes"] for o in outcomes) / args.duration / 1024, 1),
+        "update_latency_ms": percentiles(latencies),
+        "server": server,
+        "load_generator_cpu_percent": round(100 * sum(o["cpu_seconds"] for o in outcomes) / args.duration, 1),
+    }
+
+
+if __name__ == "__main__":
+    main()
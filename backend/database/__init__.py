@@ -1,5 +1,6 @@
-from database.connection import get_db, init_db, close_db, Base
+from database.connection import get_db, init_db, close_db, is_database_configured, Base
+from database.replicas import get_read_db
 from database.models import *
 from database import crud
 
-__all__ = ["get_db", "init_db", "close_db", "Base", "crud"]
+__all__ = ["get_db", "init_db", "close_db", "is_database_configured", "get_read_db", "Base", "crud"]
@@ -1,39 +1,117 @@
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import create_engine
-from typing import AsyncGenerator
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from utils.metrics import metrics
 
 # Get database URL from environment
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://localhost/poly99")
 
-# Convert to async URL if needed
-if DATABASE_URL.startswith("postgresql://"):
-    ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-else:
-    ASYNC_DATABASE_URL = DATABASE_URL
-
-# Create async engine
-engine = create_async_engine(
-    ASYNC_DATABASE_URL,
-    echo=False,  # Set to True for SQL debugging
-    pool_size=5,
-    max_overflow=10,
-)
-
-# Create async session factory
-AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+
+def to_async_url(url: str) -> str:
+    """Convert to async URL if needed."""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+# Pool sizing
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# asyncpg prepared statements kept per connection (set 0 behind pgbouncer in
+# transaction mode) and SQLAlchemy's compiled-SQL cache shared by the engine
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1000"))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        with metrics.histogram("db_pool_checkout").time():
+            return super()._do_get()
+
+
+# Engine and session factory are created on first use, so importing this
+# module (tests, CLI tools, DB-less deployments) never touches the driver
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        _engine = build_engine(ASYNC_DATABASE_URL)
+        metrics.gauge("db_pool", lambda: pool_stats(_engine))
+    return _engine
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """Async engine with the shared pool and statement-cache settings."""
+    return create_async_engine(
+        url,
+        echo=False,  # Set to True for SQL debugging
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        query_cache_size=DB_QUERY_CACHE_SIZE,
+        connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+    )
+
+
+def build_session_factory(engine: AsyncEngine) -> sessionmaker:
+    return sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+def pool_stats(engine: Optional[AsyncEngine]) -> Dict[str, Any]:
+    """Connections in use / idle in an engine's pool (empty until it exists)."""
+    if engine is None:
+        return {}
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+
+def get_session_factory() -> sessionmaker:
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = build_session_factory(get_engine())
+    return _session_factory
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """New session from the lazily created factory."""
+    return get_session_factory()()
+
 
 # Base class for ORM models
 Base = declarative_base()
 
 
+def is_database_configured() -> bool:
+    """Whether DATABASE_URL was explicitly provided."""
+    return bool(os.getenv("DATABASE_URL"))
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session."""
     async with AsyncSessionLocal() as session:
@@ -44,11 +122,18 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def init_db():
-    """Initialize database tables."""
-    async with engine.begin() as conn:
+    """Initialize database tables and upgrade ones created by older versions."""
+    from database.upgrades import run_upgrades
+
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await run_upgrades(conn)
 
 
 async def close_db():
     """Close database connections."""
-    await engine.dispose()
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _session_factory = None
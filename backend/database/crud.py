@@ -1,18 +1,25 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, and_, or_
+from sqlalchemy import String, cast, delete, select, update, func, desc, and_, or_, lambda_stmt
+from sqlalchemy.dialects.postgresql import ARRAY, array, insert
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 
 from database.models import (
+    ROLLUP_FIELDS,
     MarketDB,
     MarketHistoryDB,
+    MarketRollupDB,
     SmartTraderDB,
     SmartTraderPositionDB,
     SmartTraderPositionHistoryDB,
     WatchlistDB,
     NotificationDB,
+    AlertDB,
+    generate_uuid,
 )
+from utils.metrics import metrics
 from models.schemas import (
     Market,
     MarketSummary,
@@ -26,12 +33,35 @@ from models.schemas import (
 )
 
 
+# Keeps multi-row INSERTs under asyncpg's 32767 bind-parameter limit
+BULK_CHUNK_SIZE = 1000
+
+# Hot read paths build their statements with lambda_stmt: the construct is
+# cached on first call keyed by the lambda's code, and later calls only
+# extract new bound values instead of rebuilding and recompiling select()s.
+
+
+def timed(func: Callable) -> Callable:
+    """Record the duration of a CRUD coroutine under db_query.<name>."""
+    histogram = metrics.histogram(f"db_query.{func.__name__}")
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        with histogram.time():
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
 # Market CRUD
+@timed
 async def get_market(db: AsyncSession, market_id: str) -> Optional[MarketDB]:
-    result = await db.execute(select(MarketDB).where(MarketDB.id == market_id))
+    stmt = lambda_stmt(lambda: select(MarketDB).where(MarketDB.id == market_id))
+    result = await db.execute(stmt)
     return result.scalar_one_or_none()
 
 
+@timed
 async def get_markets(
     db: AsyncSession,
     platform: Optional[str] = None,
@@ -40,72 +70,77 @@ async def get_markets(
     skip: int = 0,
     limit: int = 50,
 ) -> List[MarketDB]:
-    query = select(MarketDB)
+    stmt = lambda_stmt(lambda: select(MarketDB))
 
     if platform:
-        query = query.where(MarketDB.platform == platform)
+        stmt += lambda s: s.where(MarketDB.platform == platform)
     if category:
-        query = query.where(MarketDB.category == category)
+        stmt += lambda s: s.where(MarketDB.category == category)
     if status:
-        query = query.where(MarketDB.status == status)
+        stmt += lambda s: s.where(MarketDB.status == status)
 
-    query = query.offset(skip).limit(limit).order_by(desc(MarketDB.volume_24h))
-    result = await db.execute(query)
+    stmt += lambda s: s.offset(skip).limit(limit).order_by(desc(MarketDB.volume_24h))
+    result = await db.execute(stmt)
     return result.scalars().all()
 
 
+@timed
 async def get_markets_count(
     db: AsyncSession,
     platform: Optional[str] = None,
     category: Optional[str] = None,
     status: Optional[str] = None,
 ) -> int:
-    query = select(func.count(MarketDB.id))
+    stmt = lambda_stmt(lambda: select(func.count(MarketDB.id)))
 
     if platform:
-        query = query.where(MarketDB.platform == platform)
+        stmt += lambda s: s.where(MarketDB.platform == platform)
     if category:
-        query = query.where(MarketDB.category == category)
+        stmt += lambda s: s.where(MarketDB.category == category)
     if status:
-        query = query.where(MarketDB.status == status)
+        stmt += lambda s: s.where(MarketDB.status == status)
 
-    result = await db.execute(query)
+    result = await db.execute(stmt)
     return result.scalar()
 
 
+@timed
 async def get_top_markets_by_oi(db: AsyncSession, limit: int = 10) -> List[MarketDB]:
-    query = (
-        select(MarketDB)
+    stmt = lambda_stmt(
+        lambda: select(MarketDB)
         .where(MarketDB.status == "open")
         .order_by(desc(MarketDB.open_interest))
         .limit(limit)
     )
-    result = await db.execute(query)
+    result = await db.execute(stmt)
     return result.scalars().all()
 
 
+@timed
 async def get_top_markets_by_volume(db: AsyncSession, limit: int = 10) -> List[MarketDB]:
-    query = (
-        select(MarketDB)
+    stmt = lambda_stmt(
+        lambda: select(MarketDB)
         .where(MarketDB.status == "open")
         .order_by(desc(MarketDB.volume_24h))
         .limit(limit)
     )
-    result = await db.execute(query)
+    result = await db.execute(stmt)
     return result.scalars().all()
 
 
+@timed
 async def get_trending_markets(db: AsyncSession, limit: int = 10) -> List[MarketDB]:
-    query = (
-        select(MarketDB)
+    stmt = lambda_stmt(
+        lambda: select(MarketDB)
         .where(MarketDB.status == "open")
         .order_by(desc(MarketDB.change_24h))
         .limit(limit)
     )
-    result = await db.execute(query)
+    result = await db.execute(stmt)
     return result.scalars().all()
 
 
+@timed
 async def upsert_market(db: AsyncSession, market_data: dict) -> MarketDB:
     existing = await get_market(db, market_data["id"])
 
@@ -123,6 +158,35 @@ async def upsert_market(db: AsyncSession, market_data: dict) -> MarketDB:
     return existing
 
 
+@timed
+async def bulk_upsert_markets(db: AsyncSession, markets: List[Dict[str, Any]]) -> int:
+    if not markets:
+        return 0
+
+    columns = set(MarketDB.__table__.columns.keys())
+    # One row per id: ON CONFLICT cannot touch the same row twice in a statement
+    by_id = {m["id"]: {k: v for k, v in m.items() if k in columns} for m in markets}
+    rows = list(by_id.values())
+    now = datetime.utcnow()
+    for row in rows:
+        row["updated_at"] = now
+        end_date = row.get("end_date")
+        if end_date is not None and end_date.tzinfo is not None:
+            row["end_date"] = end_date.replace(tzinfo=None) - end_date.utcoffset()
+
+    for i in range(0, len(rows), BULK_CHUNK_SIZE):
+        stmt = insert(MarketDB).values(rows[i:i + BULK_CHUNK_SIZE])
+        update_columns = {
+            key: stmt.excluded[key]
+            for key in rows[0]
+            if key not in ("id", "created_at")
+        }
+        await db.execute(stmt.on_conflict_do_update(index_elements=["id"], set_=update_columns))
+    await db.commit()
+    return len(rows)
+
+
+@timed
 async def search_markets(db: AsyncSession, query: str, limit: int = 20) -> List[MarketDB]:
     search_query = (
         select(MarketDB)
@@ -140,6 +204,7 @@ async def search_markets(db: AsyncSession, query: str, limit: int = 20) -> List[
 
 
 # Market History CRUD
+@timed
 async def add_market_history(db: AsyncSession, history_data: dict) -> MarketHistoryDB:
     history = MarketHistoryDB(**history_data)
     db.add(history)
@@ -148,6 +213,17 @@ async def add_market_history(db: AsyncSession, history_data: dict) -> MarketHist
     return history
 
 
+@timed
+async def add_market_history_batch(db: AsyncSession, history_rows: List[Dict[str, Any]]) -> int:
+    if not history_rows:
+        return 0
+
+    await db.execute(insert(MarketHistoryDB), history_rows)
+    await db.commit()
+    return len(history_rows)
+
+
+@timed
 async def get_market_history(
     db: AsyncSession,
     market_id: str,
@@ -155,19 +231,108 @@ async def get_market_history(
     end_time: Optional[datetime] = None,
     limit: int = 100,
 ) -> List[MarketHistoryDB]:
-    query = select(MarketHistoryDB).where(MarketHistoryDB.market_id == market_id)
+    stmt = lambda_stmt(lambda: select(MarketHistoryDB).where(MarketHistoryDB.market_id == market_id))
 
     if start_time:
-        query = query.where(MarketHistoryDB.timestamp >= start_time)
+        stmt += lambda s: s.where(MarketHistoryDB.timestamp >= start_time)
     if end_time:
-        query = query.where(MarketHistoryDB.timestamp <= end_time)
+        stmt += lambda s: s.where(MarketHistoryDB.timestamp <= end_time)
 
-    query = query.order_by(desc(MarketHistoryDB.timestamp)).limit(limit)
-    result = await db.execute(query)
+    stmt += lambda s: s.order_by(desc(MarketHistoryDB.timestamp)).limit(limit)
+    result = await db.execute(stmt)
     return result.scalars().all()
 
 
+# Market Rollup CRUD
+def build_rollup_upsert(rows: List[Dict[str, Any]]):
+    stmt = insert(MarketRollupDB).values(rows)
+    table = MarketRollupDB.__table__.c
+    merge = {"samples": table.samples + stmt.excluded.samples, "updated_at": func.now()}
+    for field in ROLLUP_FIELDS:
+        merge[f"{field}_high"] = func.greatest(table[f"{field}_high"], stmt.excluded[f"{field}_high"])
+        merge[f"{field}_low"] = func.least(table[f"{field}_low"], stmt.excluded[f"{field}_low"])
+        merge[f"{field}_close"] = stmt.excluded[f"{field}_close"]
+
+    return stmt.on_conflict_do_update(
+        index_elements=["market_id", "resolution", "bucket_start"],
+        set_=merge,
+    )
+
+
+@timed
+async def upsert_market_rollups(db: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+    if not rows:
+        return 0
+
+    for i in range(0, len(rows), BULK_CHUNK_SIZE):
+        await db.execute(build_rollup_upsert(rows[i:i + BULK_CHUNK_SIZE]))
+    await db.commit()
+    return len(rows)
+
+
+def build_rollup_retention_delete(cutoffs: Dict[str, datetime]):
+    return delete(MarketRollupDB).where(or_(*(
+        and_(MarketRollupDB.resolution == resolution, MarketRollupDB.bucket_start < cutoff)
+        for resolution, cutoff in cutoffs.items()
+    )))
+
+
+@timed
+async def delete_expired_rollups(db: AsyncSession, cutoffs: Dict[str, datetime]) -> int:
+    """Drop buckets older than their resolution's cutoff; returns the number deleted."""
+    if not cutoffs:
+        return 0
+
+    result = await db.execute(build_rollup_retention_delete(cutoffs))
+    await db.commit()
+    return result.rowcount
+
+
+@timed
+async def get_market_rollups(
+    db: AsyncSession,
+    market_id: str,
+    resolution: str,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+) -> List[MarketRollupDB]:
+    stmt = lambda_stmt(
+        lambda: select(MarketRollupDB).where(
+            MarketRollupDB.market_id == market_id,
+            MarketRollupDB.resolution == resolution,
+        )
+    )
+
+    if start_time:
+        stmt += lambda s: s.where(MarketRollupDB.bucket_start >= start_time)
+    if end_time:
+        stmt += lambda s: s.where(MarketRollupDB.bucket_start <= end_time)
+
+    stmt += lambda s: s.order_by(MarketRollupDB.bucket_start)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+@timed
+async def get_rollup_closes_at(
+    db: AsyncSession,
+    resolution: str,
+    bucket_start: datetime,
+    field: str = "probability",
+) -> Dict[str, float]:
+    close_column = getattr(MarketRollupDB, f"{field}_close")
+    stmt = lambda_stmt(
+        lambda: select(MarketRollupDB.market_id, close_column).where(
+            MarketRollupDB.resolution == resolution,
+            MarketRollupDB.bucket_start == bucket_start,
+        )
+    )
+    result = await db.execute(stmt)
+    return {market_id: value for market_id, value in result.all()}
+
+
 # Smart Trader CRUD
+@timed
 async def get_smart_trader(db: AsyncSession, trader_id: str) -> Optional[SmartTraderDB]:
     result = await db.execute(
         select(SmartTraderDB)
@@ -177,6 +342,7 @@ async def get_smart_trader(db: AsyncSession, trader_id: str) -> Optional[SmartTr
     return result.scalar_one_or_none()
 
 
+@timed
 async def get_smart_traders(
     db: AsyncSession,
     skip: int = 0,
@@ -193,6 +359,7 @@ async def get_smart_traders(
     return result.scalars().all()
 
 
+@timed
 async def upsert_smart_trader(db: AsyncSession, trader_data: dict) -> SmartTraderDB:
     result = await db.execute(
         select(SmartTraderDB).where(SmartTraderDB.address == trader_data.get("address"))
@@ -214,75 +381,118 @@ async def upsert_smart_trader(db: AsyncSession, trader_data: dict) -> SmartTrade
 
 
 # Watchlist CRUD
+# Mutations are single statements (upsert / array_append / array_remove with
+# RETURNING) so concurrent edits to one list cannot overwrite each other.
+@timed
 async def get_watchlist(db: AsyncSession, user_id: str) -> Optional[WatchlistDB]:
-    result = await db.execute(
-        select(WatchlistDB).where(WatchlistDB.user_id == user_id)
-    )
+    stmt = lambda_stmt(lambda: select(WatchlistDB).where(WatchlistDB.user_id == user_id))
+    result = await db.execute(stmt)
     return result.scalar_one_or_none()
 
 
-async def create_or_update_watchlist(
-    db: AsyncSession,
-    user_id: str,
-    market_ids: List[str],
-) -> WatchlistDB:
-    watchlist = await get_watchlist(db, user_id)
+@timed
+async def get_all_watchlists(db: AsyncSession) -> List[Any]:
+    """(user_id, market_ids) for every watchlist; used to build the reverse index."""
+    result = await db.execute(select(WatchlistDB.user_id, WatchlistDB.market_ids))
+    return result.all()
 
-    if watchlist:
-        watchlist.market_ids = market_ids
-        watchlist.updated_at = datetime.utcnow()
-    else:
-        watchlist = WatchlistDB(user_id=user_id, market_ids=market_ids)
-        db.add(watchlist)
 
-    await db.commit()
-    await db.refresh(watchlist)
-    return watchlist
+def build_watchlist_upsert(user_id: str, market_ids: List[str]):
+    now = datetime.utcnow()
+    stmt = insert(WatchlistDB).values(
+        id=generate_uuid(), user_id=user_id, market_ids=market_ids, created_at=now, updated_at=now
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"market_ids": stmt.excluded.market_ids, "updated_at": now},
+    ).returning(WatchlistDB)
 
 
-async def add_to_watchlist(db: AsyncSession, user_id: str, market_id: str) -> WatchlistDB:
-    watchlist = await get_watchlist(db, user_id)
+def build_watchlist_add(user_id: str, market_id: str):
+    now = datetime.utcnow()
+    current = func.coalesce(WatchlistDB.__table__.c.market_ids, cast(array([], type_=String), ARRAY(String)))
+    stmt = insert(WatchlistDB).values(
+        id=generate_uuid(), user_id=user_id, market_ids=[market_id], created_at=now, updated_at=now
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"market_ids": func.array_append(current, market_id), "updated_at": now},
+        # Already present: leave the row untouched
+        where=~current.contains([market_id]),
+    ).returning(WatchlistDB)
+
+
+def build_watchlist_remove(user_id: str, market_id: str):
+    table = WatchlistDB.__table__.c
+    return (
+        update(WatchlistDB)
+        .where(WatchlistDB.user_id == user_id, table.market_ids.contains([market_id]))
+        .values(market_ids=func.array_remove(table.market_ids, market_id), updated_at=datetime.utcnow())
+        .returning(WatchlistDB)
+    )
 
-    if watchlist:
-        if market_id not in watchlist.market_ids:
-            watchlist.market_ids = watchlist.market_ids + [market_id]
-            watchlist.updated_at = datetime.utcnow()
-    else:
-        watchlist = WatchlistDB(user_id=user_id, market_ids=[market_id])
-        db.add(watchlist)
 
+async def _execute_returning(db: AsyncSession, stmt) -> Optional[WatchlistDB]:
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    watchlist = result.scalar_one_or_none()
     await db.commit()
-    await db.refresh(watchlist)
     return watchlist
 
 
-async def remove_from_watchlist(db: AsyncSession, user_id: str, market_id: str) -> Optional[WatchlistDB]:
-    watchlist = await get_watchlist(db, user_id)
+@timed
+async def create_or_update_watchlist(
+    db: AsyncSession,
+    user_id: str,
+    market_ids: List[str],
+) -> WatchlistDB:
+    return await _execute_returning(db, build_watchlist_upsert(user_id, market_ids))
 
-    if watchlist and market_id in watchlist.market_ids:
-        watchlist.market_ids = [m for m in watchlist.market_ids if m != market_id]
-        watchlist.updated_at = datetime.utcnow()
-        await db.commit()
-        await db.refresh(watchlist)
 
-    return watchlist
+@timed
+async def add_to_watchlist(db: AsyncSession, user_id: str, market_id: str) -> WatchlistDB:
+    watchlist = await _execute_returning(db, build_watchlist_add(user_id, market_id))
+    # No row returned means the market was already on the list
+    return watchlist or await get_watchlist(db, user_id)
+
+
+@timed
+async def remove_from_watchlist(db: AsyncSession, user_id: str, market_id: str) -> Optional[WatchlistDB]:
+    watchlist = await _execute_returning(db, build_watchlist_remove(user_id, market_id))
+    return watchlist or await get_watchlist(db, user_id)
 
 
 # Notification CRUD
+@timed
+async def get_active_notifications(db: AsyncSession) -> List[Any]:
+    """(id, user_id, market_id, type, threshold) for every active rule; loads the evaluation engine."""
+    result = await db.execute(
+        select(
+            NotificationDB.id,
+            NotificationDB.user_id,
+            NotificationDB.market_id,
+            NotificationDB.type,
+            NotificationDB.threshold,
+        ).where(NotificationDB.is_active == True)
+    )
+    return result.all()
+
+
+@timed
 async def get_notifications(
     db: AsyncSession,
     user_id: str,
     active_only: bool = True,
 ) -> List[NotificationDB]:
-    query = select(NotificationDB).where(NotificationDB.user_id == user_id)
+    stmt = lambda_stmt(lambda: select(NotificationDB).where(NotificationDB.user_id == user_id))
 
     if active_only:
-        query = query.where(NotificationDB.is_active == True)
+        stmt += lambda s: s.where(NotificationDB.is_active == True)
 
-    result = await db.execute(query)
+    result = await db.execute(stmt)
     return result.scalars().all()
 
 
+@timed
 async def create_notification(
     db: AsyncSession,
     user_id: str,
@@ -302,6 +512,7 @@ async def create_notification(
     return notification
 
 
+@timed
 async def update_notification_status(
     db: AsyncSession,
     notification_id: str,
@@ -320,6 +531,7 @@ async def update_notification_status(
     return notification
 
 
+@timed
 async def delete_notification(db: AsyncSession, notification_id: str) -> bool:
     result = await db.execute(
         select(NotificationDB).where(NotificationDB.id == notification_id)
@@ -334,30 +546,49 @@ async def delete_notification(db: AsyncSession, notification_id: str) -> bool:
     return False
 
 
+# Alerts
+@timed
+async def add_alerts_batch(db: AsyncSession, alerts: List[Dict[str, Any]]) -> int:
+    if not alerts:
+        return 0
+
+    columns = AlertDB.__table__.columns.keys()
+    await db.execute(insert(AlertDB), [{c: alert.get(c) for c in columns} for alert in alerts])
+    await db.commit()
+    return len(alerts)
+
+
+@timed
+async def mark_alerts_delivered(db: AsyncSession, alert_ids: List[str], delivered_at: datetime) -> None:
+    if not alert_ids:
+        return
+    await db.execute(update(AlertDB).where(AlertDB.id.in_(alert_ids)).values(delivered_at=delivered_at))
+    await db.commit()
+
+
 # Global Stats
+@timed
 async def get_global_stats(db: AsyncSession) -> dict:
-    # Get counts
-    total_markets = await db.execute(select(func.count(MarketDB.id)))
-    active_markets = await db.execute(
-        select(func.count(MarketDB.id)).where(MarketDB.status == "open")
-    )
-    polymarket_count = await db.execute(
-        select(func.count(MarketDB.id)).where(MarketDB.platform == "polymarket")
-    )
-    kalshi_count = await db.execute(
-        select(func.count(MarketDB.id)).where(MarketDB.platform == "kalshi")
+    # One pass over markets instead of a round trip per figure
+    stmt = lambda_stmt(
+        lambda: select(
+            func.count(MarketDB.id),
+            func.count(MarketDB.id).filter(MarketDB.status == "open"),
+            func.count(MarketDB.id).filter(MarketDB.platform == "polymarket"),
+            func.count(MarketDB.id).filter(MarketDB.platform == "kalshi"),
+            func.sum(MarketDB.open_interest),
+            func.sum(MarketDB.volume_24h),
+        )
     )
-
-    # Get totals
-    total_oi = await db.execute(select(func.sum(MarketDB.open_interest)))
-    total_volume = await db.execute(select(func.sum(MarketDB.volume_24h)))
+    result = await db.execute(stmt)
+    total_markets, active_markets, polymarket_count, kalshi_count, total_oi, total_volume = result.one()
 
     return {
-        "total_markets": total_markets.scalar() or 0,
-        "active_markets": active_markets.scalar() or 0,
-        "polymarket_count": polymarket_count.scalar() or 0,
-        "kalshi_count": kalshi_count.scalar() or 0,
-        "total_open_interest": total_oi.scalar() or 0,
-        "total_volume_24h": total_volume.scalar() or 0,
+        "total_markets": total_markets or 0,
+        "active_markets": active_markets or 0,
+        "polymarket_count": polymarket_count or 0,
+        "kalshi_count": kalshi_count or 0,
+        "total_open_interest": total_oi or 0,
+        "total_volume_24h": total_volume or 0,
         "updated_at": datetime.utcnow(),
     }
@@ -2,6 +2,7 @@ from sqlalchemy import Column, String, Float, DateTime, Boolean, Integer, Enum,
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Dict, Final
 import uuid
 
 from database.connection import Base
@@ -66,6 +67,41 @@ class MarketHistoryDB(Base):
     )
 
 
+# Rollup field -> market snapshot key it is sampled from; each gets open/high/low/close columns
+ROLLUP_FIELDS: Final[Dict[str, str]] = {
+    "probability": "probability",
+    "open_interest": "open_interest",
+    "volume": "volume_24h",
+}
+
+
+class MarketRollupDB(Base):
+    __tablename__ = "market_rollups"
+
+    market_id = Column(String, ForeignKey("markets.id"), primary_key=True)
+    resolution = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    probability_open = Column(Float, default=0.5)
+    probability_high = Column(Float, default=0.5)
+    probability_low = Column(Float, default=0.5)
+    probability_close = Column(Float, default=0.5)
+    open_interest_open = Column(Float, default=0)
+    open_interest_high = Column(Float, default=0)
+    open_interest_low = Column(Float, default=0)
+    open_interest_close = Column(Float, default=0)
+    volume_open = Column(Float, default=0)
+    volume_high = Column(Float, default=0)
+    volume_low = Column(Float, default=0)
+    volume_close = Column(Float, default=0)
+    samples = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Cross-market reads of one bucket and the retention delete
+        Index("ix_market_rollups_resolution_bucket", "resolution", "bucket_start"),
+    )
+
+
 class SmartTraderDB(Base):
     __tablename__ = "smart_traders"
 
@@ -123,13 +159,14 @@ class WatchlistDB(Base):
     __tablename__ = "watchlists"
 
     id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, nullable=False, index=True)
+    user_id = Column(String, nullable=False)
     market_ids = Column(ARRAY(String), default=[])
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
-        Index("ix_watchlists_user_id", "user_id"),
+        # One watchlist per user; the upserts in crud conflict on it
+        Index("ix_watchlists_user_id", "user_id", unique=True),
     )
 
 
@@ -147,3 +184,22 @@ class NotificationDB(Base):
     __table_args__ = (
         Index("ix_notifications_user_active", "user_id", "is_active"),
     )
+
+
+class AlertDB(Base):
+    """One triggered notification; delivered_at stays NULL until a client receives it."""
+    __tablename__ = "alerts"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    notification_id = Column(String, nullable=False, index=True)
+    user_id = Column(String, nullable=False)
+    market_id = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+    threshold = Column(Float, nullable=False)
+    value = Column(Float)
+    triggered_at = Column(DateTime, nullable=False)
+    delivered_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_alerts_user_triggered", "user_id", "triggered_at"),
+    )
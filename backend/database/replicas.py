@@ -0,0 +1,202 @@
+"""Routes read-only sessions to streaming replicas.
+
+Replicas come from ``DATABASE_REPLICA_URLS`` (comma-separated). A background
+loop checks each one every ``REPLICA_HEALTH_INTERVAL_SECONDS`` and measures
+replay lag; replicas that fail the check or fall more than
+``REPLICA_MAX_LAG_SECONDS`` behind stop receiving reads until they recover.
+With no healthy replica (or none configured) reads go to the primary.
+
+Only use read sessions where slightly stale data is acceptable (history,
+rollups, analytics-style reads). Read-your-writes paths such as a user's own
+watchlist stay on ``get_db``.
+
+To try it locally, point ``DATABASE_URL`` and ``DATABASE_REPLICA_URLS`` at
+two Postgres instances; a non-standby instance reports zero lag.
+"""
+import asyncio
+import os
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database.connection import (
+    AsyncSessionLocal,
+    build_engine,
+    build_session_factory,
+    is_database_configured,
+    pool_stats,
+    to_async_url,
+)
+from utils.metrics import metrics
+
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", "15"))
+REPLICA_HEALTH_TIMEOUT_SECONDS = float(os.getenv("REPLICA_HEALTH_TIMEOUT_SECONDS", "2"))
+
+# Zero when the replica has replayed everything it received (an idle primary
+# would otherwise look lagged) and NULL-safe on instances that are not standbys
+REPLICATION_LAG_SQL = text(
+    """
+    SELECT COALESCE(
+        CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END,
+        0
+    )
+    """
+)
+
+
+class Replica:
+    """One replica engine plus the result of its last health check."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[sessionmaker] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = build_engine(to_async_url(self.url))
+        return self._engine
+
+    def session(self) -> AsyncSession:
+        if self._session_factory is None:
+            self._session_factory = build_session_factory(self.engine)
+        return self._session_factory()
+
+    async def measure_lag(self) -> float:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(REPLICATION_LAG_SQL)
+            return float(result.scalar() or 0)
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._session_factory = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+            "pool": pool_stats(self._engine),
+        }
+
+
+class ReplicaRouter:
+    """Round-robins read sessions over healthy replicas, falling back to primary."""
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+        interval: float = REPLICA_HEALTH_INTERVAL_SECONDS,
+        timeout: float = REPLICA_HEALTH_TIMEOUT_SECONDS,
+    ):
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.interval = interval
+        self.timeout = timeout
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Replica]:
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+    def read_session(self) -> AsyncSession:
+        """Session on a healthy replica, or on the primary when none is usable."""
+        replica = self.choose()
+        if replica is None:
+            metrics.counter("db_reads.primary").inc()
+            return AsyncSessionLocal()
+        metrics.counter("db_reads.replica").inc()
+        return replica.session()
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            lag = await asyncio.wait_for(replica.measure_lag(), self.timeout)
+        except Exception as e:
+            replica.healthy = False
+            replica.lag_seconds = None
+            replica.last_error = str(e) or type(e).__name__
+        else:
+            replica.lag_seconds = lag
+            replica.healthy = lag <= self.max_lag
+            replica.last_error = None if replica.healthy else f"lag {lag:.1f}s over {self.max_lag:.1f}s"
+        replica.last_checked = time.time()
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(r) for r in self.replicas))
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.check_all()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error checking replicas: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.replicas and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {r.url.rsplit("@", 1)[-1]: r.stats() for r in self.replicas}
+
+
+# Singleton instance
+_replica_router: Optional[ReplicaRouter] = None
+
+
+def get_replica_router() -> ReplicaRouter:
+    global _replica_router
+    if _replica_router is None:
+        _replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+        metrics.gauge("db_replicas", _replica_router.stats)
+    return _replica_router
+
+
+async def get_read_db() -> AsyncGenerator[Optional[AsyncSession], None]:
+    """Dependency for read-only sessions (replica when healthy, else primary).
+
+    Yields None without a configured database, so no engine is built.
+    """
+    if not is_database_configured():
+        yield None
+        return
+    async with get_replica_router().read_session() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
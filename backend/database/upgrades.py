@@ -0,0 +1,110 @@
+"""In-place upgrades for databases created by older versions.
+
+``create_all`` only creates missing tables and indexes, so a definition that
+changes under an existing name is never applied. Each upgrade here checks
+whether it is still needed, runs inside the caller's transaction and is safe
+to repeat; ``init_db`` runs them on every start. To run them by hand:
+
+    python -m database.upgrades
+"""
+import asyncio
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Serializes upgrades when several workers start at once
+UPGRADE_LOCK_ID = 0x6F6464
+
+WATCHLIST_INDEX_IS_UNIQUE_SQL = text(
+    """
+    SELECT i.indisunique
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = 'ix_watchlists_user_id'
+    """
+)
+
+DUPLICATE_WATCHLISTS_SQL = text(
+    """
+    SELECT id, user_id, market_ids
+    FROM watchlists
+    WHERE user_id IN (SELECT user_id FROM watchlists GROUP BY user_id HAVING count(*) > 1)
+    ORDER BY user_id, updated_at DESC NULLS LAST, created_at DESC NULLS LAST, id
+    """
+)
+
+
+def merge_duplicate_watchlists(
+    rows: Sequence[Tuple[str, str, List[str]]],
+) -> Tuple[Dict[str, List[str]], List[str]]:
+    """Collapse watchlist rows to one per user.
+
+    ``rows`` are ``(id, user_id, market_ids)`` ordered newest first within
+    each user. The newest row is kept with the other rows' markets appended
+    after its own, in order and without repeats. Returns the kept row ids
+    mapped to their merged market ids, and the ids of the rows to delete.
+    """
+    kept: Dict[str, List[str]] = {}
+    keeper_by_user: Dict[str, str] = {}
+    deleted: List[str] = []
+    for row_id, user_id, market_ids in rows:
+        keeper = keeper_by_user.get(user_id)
+        if keeper is None:
+            keeper_by_user[user_id] = row_id
+            kept[row_id] = list(dict.fromkeys(market_ids or []))
+            continue
+        merged = kept[keeper]
+        merged.extend(m for m in dict.fromkeys(market_ids or []) if m not in merged)
+        deleted.append(row_id)
+    return kept, deleted
+
+
+async def upgrade_watchlist_index(conn: AsyncConnection) -> bool:
+    """Make ``ix_watchlists_user_id`` unique, merging duplicate rows first.
+
+    The index was created non-unique before the watchlist upserts started
+    conflicting on ``user_id``. Returns True when it was rebuilt.
+    """
+    result = await conn.execute(WATCHLIST_INDEX_IS_UNIQUE_SQL)
+    if result.scalar() is not False:
+        # Already unique, or missing (create_all just built it unique)
+        return False
+
+    rows = (await conn.execute(DUPLICATE_WATCHLISTS_SQL)).all()
+    kept, deleted = merge_duplicate_watchlists(rows)
+    for row_id, market_ids in kept.items():
+        await conn.execute(
+            text("UPDATE watchlists SET market_ids = :market_ids WHERE id = :id"),
+            {"id": row_id, "market_ids": market_ids},
+        )
+    if deleted:
+        await conn.execute(
+            text("DELETE FROM watchlists WHERE id = ANY(:ids)"),
+            {"ids": deleted},
+        )
+
+    await conn.execute(text("DROP INDEX ix_watchlists_user_id"))
+    await conn.execute(text("CREATE UNIQUE INDEX ix_watchlists_user_id ON watchlists (user_id)"))
+    print(f"Upgraded ix_watchlists_user_id to unique ({len(deleted)} duplicate watchlists merged)")
+    return True
+
+
+async def run_upgrades(conn: AsyncConnection) -> Dict[str, Any]:
+    """Run every upgrade on ``conn``; returns which ones changed something."""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": UPGRADE_LOCK_ID})
+    return {"watchlist_index": await upgrade_watchlist_index(conn)}
+
+
+async def _main() -> None:
+    from database.connection import close_db, get_engine
+
+    try:
+        async with get_engine().begin() as conn:
+            print(await run_upgrades(conn))
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
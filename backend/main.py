@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
 from routers import (
@@ -10,10 +11,20 @@ from routers import (
     users_router,
     smart_traders_router,
     websocket_router,
+    analytics_router,
+    sse_router,
 )
+from routers.websocket import broadcaster, cluster
 from services.polymarket_service import close_polymarket_service
 from services.kalshi_service import close_kalshi_service
+from services.alert_outbox import get_alert_outbox
+from services.ingestion import INGESTION_ENABLED, get_market_ingestor
+from services.compressed_history import COMPRESSED_HISTORY_PATH, get_compressed_history
+from services.snapshot_archive import get_snapshot_archive
+from services.market_snapshot import SNAPSHOT_CHECKPOINT_PATH, get_market_snapshot
 from database.connection import init_db, close_db
+from database.replicas import get_replica_router
+from utils.metrics import metrics
 
 
 @asynccontextmanager
@@ -30,11 +41,56 @@ async def lifespan(app: FastAPI):
             print("Database initialized")
         except Exception as e:
             print(f"Database initialization skipped: {e}")
+        # Health-check read replicas; reads use the primary until one passes
+        get_replica_router().start()
+        try:
+            await get_market_ingestor().reload_user_state()
+        except Exception as e:
+            print(f"Watchlist and notification load skipped: {e}")
+
+    # Restore compressed in-memory history from the last run
+    if COMPRESSED_HISTORY_PATH and os.path.exists(COMPRESSED_HISTORY_PATH):
+        try:
+            get_compressed_history().load(COMPRESSED_HISTORY_PATH)
+            print("Compressed history loaded")
+        except Exception as e:
+            print(f"Compressed history load skipped: {e}")
+
+    # Serve the last checkpointed snapshot (marked stale) until ingestion refreshes it
+    if INGESTION_ENABLED and SNAPSHOT_CHECKPOINT_PATH and os.path.exists(SNAPSHOT_CHECKPOINT_PATH):
+        try:
+            get_market_snapshot().load(SNAPSHOT_CHECKPOINT_PATH)
+            print("Market snapshot checkpoint loaded")
+        except Exception as e:
+            print(f"Market snapshot checkpoint load skipped: {e}")
+
+    # Shared stats/trending pushes for every WebSocket client, and the
+    # backplane that fans ingestion cycles and alerts out across workers
+    broadcaster.start()
+    cluster.start()
+
+    # Start periodic market ingestion (history, rollups)
+    ingestor = get_market_ingestor()
+    if INGESTION_ENABLED:
+        get_alert_outbox().start(cluster)
+        ingestor.start()
 
     yield
 
     # Shutdown
     print("Shutting down...")
+    await broadcaster.stop()
+    await ingestor.stop()
+    await get_alert_outbox().stop()
+    await cluster.stop()
+    if COMPRESSED_HISTORY_PATH:
+        get_compressed_history().save(COMPRESSED_HISTORY_PATH)
+    snapshot = get_market_snapshot()
+    if SNAPSHOT_CHECKPOINT_PATH and snapshot.markets and not snapshot.stale:
+        snapshot.save(SNAPSHOT_CHECKPOINT_PATH)
+    if get_snapshot_archive():
+        await asyncio.to_thread(get_snapshot_archive().flush)
+    await get_replica_router().stop()
     await close_polymarket_service()
     await close_kalshi_service()
     await close_db()
@@ -67,6 +123,8 @@ app.include_router(kalshi_router)
 app.include_router(users_router)
 app.include_router(smart_traders_router)
 app.include_router(websocket_router)
+app.include_router(analytics_router)
+app.include_router(sse_router)
 
 
 @app.get("/")
@@ -82,6 +140,8 @@ async def root():
             "kalshi": "/api/kalshi/markets",
             "smart_traders": "/api/smart-traders",
             "websocket": "/ws/markets",
+            "sse": "/sse/markets",
+            "analytics": "/api/analytics",
             "docs": "/docs",
         },
     }
@@ -96,6 +156,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Process-local runtime metrics."""
+    return metrics.to_dict()
+
+
 @app.get("/api")
 async def api_info():
     """API information endpoint."""
@@ -127,6 +193,11 @@ async def api_info():
                 "methods": ["GET"],
                 "description": "Get global market statistics",
             },
+            {
+                "path": "/api/markets/batch?ids=",
+                "methods": ["GET"],
+                "description": "Get several markets in one call",
+            },
             {
                 "path": "/api/markets/{market_id}",
                 "methods": ["GET"],
@@ -152,15 +223,35 @@ async def api_info():
                 "methods": ["GET", "POST"],
                 "description": "Manage user watchlist",
             },
+            {
+                "path": "/api/users/{user_id}/watchlist/markets",
+                "methods": ["GET"],
+                "description": "Get market data for a user's watchlist",
+            },
             {
                 "path": "/api/users/{user_id}/notifications",
                 "methods": ["GET", "POST"],
                 "description": "Manage user notifications",
             },
+            {
+                "path": "/api/analytics/{category-oi-trends,platform-volume-share,top-movers}",
+                "methods": ["GET"],
+                "description": "DuckDB analytics over the snapshot archive",
+            },
+            {
+                "path": "/metrics",
+                "methods": ["GET"],
+                "description": "Runtime metrics (counters, gauges, histograms)",
+            },
             {
                 "path": "/ws/markets",
                 "methods": ["WebSocket"],
-                "description": "Real-time market updates",
+                "description": "Real-time market updates (pass user_id for notification alerts)",
+            },
+            {
+                "path": "/sse/markets",
+                "methods": ["GET"],
+                "description": "Server-Sent Events stream of stats, trending and market updates (resumes from Last-Event-ID)",
             },
         ],
     }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+from typing import Dict, Optional, List, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -66,7 +66,9 @@ class Market(MarketBase):
     price_no: float = Field(ge=0, le=1)
     end_date: Optional[datetime] = None
     location: Optional[Location] = None
+    change_1h: Optional[float] = None
     change_24h: float = 0
+    change_7d: Optional[float] = None
     image_url: Optional[str] = None
 
     class Config:
@@ -197,21 +199,59 @@ class MarketsResponse(BaseModel):
     per_page: int = 50
 
 
+class MarketBatchResponse(BaseModel):
+    markets: List[Market]
+    missing: List[str] = []
+
+
 class TrendingMarketsResponse(BaseModel):
     markets: List[MarketSummary]
     updated_at: datetime
+    stale: bool = False
 
 
 class TopMarketsResponse(BaseModel):
     markets: List[MarketSummary]
     metric: Literal["open_interest", "volume"]
     updated_at: datetime
+    stale: bool = False
+
+
+class MarketHistoryBucket(BaseModel):
+    market_id: str
+    resolution: str
+    bucket_start: datetime
+    probability_open: float
+    probability_high: float
+    probability_low: float
+    probability_close: float
+    open_interest_open: float
+    open_interest_high: float
+    open_interest_low: float
+    open_interest_close: float
+    volume_open: float
+    volume_high: float
+    volume_low: float
+    volume_close: float
+    samples: int = 0
+
+    class Config:
+        from_attributes = True
 
 
 class HistoryResponse(BaseModel):
     market_id: str
-    data: List[MarketHistoryEntry]
+    data: List[MarketHistoryBucket]
     timeframe: str
+    resolution: Optional[str] = None
+
+
+class HistorySeriesResponse(BaseModel):
+    market_id: str
+    timeframe: Optional[str] = None
+    resolution: Optional[str] = None
+    points: int
+    columns: Dict[str, List[float]]
 
 
 # WebSocket Messages
@@ -230,3 +270,4 @@ class GlobalStats(BaseModel):
     polymarket_count: int
     kalshi_count: int
     updated_at: datetime
+    stale: bool = False
@@ -4,6 +4,8 @@ from routers.kalshi import router as kalshi_router
 from routers.users import router as users_router
 from routers.smart_traders import router as smart_traders_router
 from routers.websocket import router as websocket_router
+from routers.analytics import router as analytics_router
+from routers.sse import router as sse_router
 
 __all__ = [
     "markets_router",
@@ -12,4 +14,6 @@ __all__ = [
     "users_router",
     "smart_traders_router",
     "websocket_router",
+    "analytics_router",
+    "sse_router",
 ]
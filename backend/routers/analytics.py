@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Query, HTTPException
+from datetime import datetime
+import asyncio
+
+from services.analytics import AnalyticsUnavailableError, get_analytics_service
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+
+async def run_query(method_name: str, **params):
+    try:
+        service = get_analytics_service()
+    except AnalyticsUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    rows = await asyncio.to_thread(getattr(service, method_name), **params)
+    return {
+        "data": rows,
+        "snapshot_version": service.archive.version(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+@router.get("/category-oi-trends")
+async def get_category_oi_trends(
+    days: int = Query(7, ge=1, le=365, description="Lookback window in days"),
+    limit: int = Query(50, ge=1, le=200, description="Number of categories to return"),
+):
+    """Open interest change per category over the window, largest gain first."""
+    return await run_query("category_oi_trends", days=days, limit=limit)
+
+
+@router.get("/platform-volume-share")
+async def get_platform_volume_share(
+    hours: int = Query(24, ge=1, le=24 * 365, description="Lookback window in hours"),
+):
+    """Share of 24h volume per platform, from each market's latest snapshot."""
+    return await run_query("platform_volume_share", hours=hours)
+
+
+@router.get("/top-movers")
+async def get_top_movers(
+    hours: int = Query(24, ge=1, le=24 * 365, description="Lookback window in hours"),
+    limit: int = Query(10, ge=1, le=100, description="Number of markets to return"),
+):
+    """Markets with the largest probability move (percentage points) over the window."""
+    return await run_query("top_movers", hours=hours, limit=limit)
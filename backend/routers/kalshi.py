@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Query, HTTPException
 from typing import List, Optional
+import asyncio
 from datetime import datetime
 
 from services.kalshi_service import get_kalshi_service
-from models.schemas import Market, MarketSummary, MarketsResponse
+from services.snapshot_archive import get_snapshot_archive
+from models.schemas import Market, MarketSummary, MarketsResponse, HistorySeriesResponse
+from utils.downsample import downsample_series
 
 router = APIRouter(prefix="/api/kalshi", tags=["Kalshi"])
 
@@ -50,12 +53,29 @@ async def get_kalshi_market(ticker: str):
 async def get_kalshi_market_history(
     ticker: str,
     limit: int = Query(100, ge=1, le=500, description="Number of history entries"),
+    points: Optional[int] = Query(None, ge=3, le=5000, description="Downsample to this many points (column arrays)"),
 ):
     """Get historical data for a Kalshi market."""
     service = get_kalshi_service()
 
     original_ticker = ticker.replace("kalshi_", "")
     history = await service.get_market_history(original_ticker, limit=limit)
+    columns = None
+
+    # Cold-storage fallback: our own archived snapshots of this market
+    archive = get_snapshot_archive()
+    if not history and archive:
+        archived = await asyncio.to_thread(archive.series, f"kalshi_{original_ticker}")
+        columns = {key: values.tolist() for key, values in archived.items()}
+        history = service.columns_to_history(columns)[-limit:]
+
+    if points:
+        columns = downsample_series(columns or service.history_to_columns(history), points)
+        return HistorySeriesResponse(
+            market_id=ticker,
+            points=len(columns["timestamp"]),
+            columns=columns,
+        )
 
     return {
         "ticker": ticker,
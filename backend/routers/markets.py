@@ -1,21 +1,40 @@
 from fastapi import APIRouter, Query, HTTPException, Depends
 from typing import List, Optional
+import asyncio
 from datetime import datetime
 
+from database import crud
+from database.connection import is_database_configured
+from database.replicas import get_replica_router
 from services.data_aggregator import get_data_aggregator
+from services.compressed_history import get_compressed_history
+from services.rollups import (
+    ROLLUP_RESOLUTIONS,
+    TIMEFRAME_RESOLUTIONS,
+    bucket_series,
+    resolve_timeframe,
+    rollups_to_columns,
+    to_epoch,
+)
+from services.snapshot_archive import get_snapshot_archive
+from utils.downsample import downsample_series
 from models.schemas import (
     Market,
     MarketSummary,
     MarketsResponse,
+    MarketBatchResponse,
     TrendingMarketsResponse,
     TopMarketsResponse,
     GlobalStats,
     HistoryResponse,
-    MarketHistoryEntry,
+    HistorySeriesResponse,
+    MarketHistoryBucket,
 )
 
 router = APIRouter(prefix="/api/markets", tags=["Markets"])
 
+MAX_BATCH_IDS = 200
+
 
 @router.get("", response_model=MarketsResponse)
 async def get_markets(
@@ -86,6 +105,7 @@ async def get_trending_markets(
             for m in markets
         ],
         updated_at=datetime.utcnow(),
+        stale=aggregator.snapshot.warm,
     )
 
 
@@ -114,6 +134,7 @@ async def get_top_oi_markets(
         ],
         metric="open_interest",
         updated_at=datetime.utcnow(),
+        stale=aggregator.snapshot.warm,
     )
 
 
@@ -142,6 +163,7 @@ async def get_top_volume_markets(
         ],
         metric="volume",
         updated_at=datetime.utcnow(),
+        stale=aggregator.snapshot.warm,
     )
 
 
@@ -161,6 +183,18 @@ async def get_global_stats():
     return GlobalStats(**stats)
 
 
+@router.get("/batch", response_model=MarketBatchResponse)
+async def get_markets_batch(
+    ids: str = Query(..., description="Comma-separated market ids"),
+):
+    """Resolve many markets in one call, in the order requested."""
+    market_ids = [i.strip() for i in ids.split(",") if i.strip()]
+    if len(market_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    markets, missing = await get_data_aggregator().resolve_markets(market_ids)
+    return MarketBatchResponse(markets=[Market(**m) for m in markets], missing=missing)
+
+
 @router.get("/{market_id}", response_model=Market)
 async def get_market(market_id: str):
     """Get a specific market by ID."""
@@ -176,13 +210,53 @@ async def get_market(market_id: str):
 @router.get("/{market_id}/history")
 async def get_market_history(
     market_id: str,
-    timeframe: str = Query("24h", description="Timeframe (1h, 24h, 7d, 30d)"),
+    timeframe: str = Query("24h", description="Timeframe (1h, 24h, 7d, 30d, 90d, 1y)"),
+    points: Optional[int] = Query(None, ge=3, le=5000, description="Downsample to this many points (column arrays)"),
 ):
-    """Get historical data for a market."""
-    # For now, return empty history since we're not persisting yet
-    # This will be populated when we add the database ingestion
+    """Get OHLC history for a market at the rollup resolution suited to the timeframe.
+
+    With ``points`` set, bucket closes are LTTB-downsampled and returned as column arrays.
+    """
+    try:
+        resolution, start_time = resolve_timeframe(timeframe, datetime.utcnow())
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid timeframe. Use one of: {', '.join(TIMEFRAME_RESOLUTIONS)}",
+        )
+
+    buckets = []
+    if is_database_configured():
+        async with get_replica_router().read_session() as db:
+            buckets = await crud.get_market_rollups(db, market_id, resolution, start_time=start_time)
+
+    if not buckets:
+        # Samples the ingestion loop kept in memory, bucketed on the fly
+        series = await asyncio.to_thread(get_compressed_history().read, market_id, start_time)
+        width = ROLLUP_RESOLUTIONS[resolution].total_seconds()
+        covered = len(series["timestamp"]) and series["timestamp"][0] < to_epoch(start_time) + width
+        # Cold storage reaches back further than the in-memory retention
+        archive = get_snapshot_archive()
+        if archive and not covered:
+            buckets = await asyncio.to_thread(archive.rollups, market_id, resolution, start_time)
+        if not buckets:
+            buckets = bucket_series(market_id, resolution, series)
+
+    buckets = [MarketHistoryBucket.model_validate(b) for b in buckets]
+
+    if points:
+        columns = downsample_series(rollups_to_columns(buckets), points)
+        return HistorySeriesResponse(
+            market_id=market_id,
+            timeframe=timeframe,
+            resolution=resolution,
+            points=len(columns["timestamp"]),
+            columns=columns,
+        )
+
     return HistoryResponse(
         market_id=market_id,
-        data=[],
+        data=buckets,
         timeframe=timeframe,
+        resolution=resolution,
     )
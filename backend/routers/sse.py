@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+import asyncio
+import json
+import os
+
+from services.event_stream import EventStream, get_event_stream
+from utils.metrics import metrics
+from utils.ws_frames import Frame
+
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
+
+router = APIRouter(tags=["Server-Sent Events"])
+
+
+def format_event(event_id: str, frame: Frame) -> str:
+    return f"id: {event_id}\nevent: {frame.message['type']}\ndata: {frame.text}\n\n"
+
+
+async def event_source(stream: EventStream, last_event_id: Optional[str]) -> AsyncIterator[str]:
+    """SSE text for one client: missed events first, then live ones."""
+    # Subscribe and read the replay buffer without yielding in between, so
+    # no event lands in both or neither
+    queue = stream.subscribe()
+    missed = stream.replay(last_event_id)
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        if missed is None:
+            # Too far behind (or from another worker): start over from REST
+            metrics.counter("sse.resets").inc()
+            yield f"event: reset\ndata: {json.dumps({'reason': 'Last-Event-ID can no longer be resumed'})}\n\n"
+        elif missed:
+            metrics.counter("sse.replayed").inc(len(missed))
+            for seq, frame in missed:
+                yield format_event(stream.event_id(seq), frame)
+        else:
+            # Gives a client that has seen nothing yet an id to resume from
+            yield f"id: {stream.event_id(stream.last_seq)}\nevent: connected\ndata: {{}}\n\n"
+
+        while True:
+            try:
+                events = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if events is None:
+                # Fell behind; the client reconnects and resumes from the buffer
+                break
+            yield "".join(format_event(stream.event_id(seq), frame) for seq, frame in events)
+    finally:
+        stream.unsubscribe(queue)
+
+
+@router.get("/sse/markets")
+async def sse_markets(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    resume_from: Optional[str] = Query(None, description="Event id to resume after, for clients that cannot set Last-Event-ID"),
+):
+    """One-way stream of stats_update, trending_update and market_update events."""
+    return StreamingResponse(
+        event_source(get_event_stream(), last_event_id or resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
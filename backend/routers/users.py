@@ -5,7 +5,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.connection import get_db
 from database import crud
+from services.notification_engine import get_notification_engine
+from services.watchlist_index import get_watchlist_index
+from services.data_aggregator import get_data_aggregator
 from models.schemas import (
+    Market,
+    MarketBatchResponse,
     Watchlist,
     WatchlistCreate,
     WatchlistAddMarket,
@@ -48,6 +53,17 @@ async def get_user_watchlist(
     )
 
 
+@router.get("/{user_id}/watchlist/markets", response_model=MarketBatchResponse)
+async def get_user_watchlist_markets(
+    user_id: str,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get full market data for every market on the user's watchlist."""
+    watchlist = await crud.get_watchlist(db, user_id)
+    markets, missing = await get_data_aggregator().resolve_markets(watchlist.market_ids or [] if watchlist else [])
+    return MarketBatchResponse(markets=[Market(**m) for m in markets], missing=missing)
+
+
 @router.post("/{user_id}/watchlist", response_model=Watchlist)
 async def update_user_watchlist(
     user_id: str,
@@ -56,6 +72,7 @@ async def update_user_watchlist(
 ):
     """Update user's entire watchlist."""
     watchlist = await crud.create_or_update_watchlist(db, user_id, data.market_ids)
+    get_watchlist_index().set_watchlist(user_id, watchlist.market_ids if watchlist else [])
 
     return Watchlist(
         id=watchlist.id,
@@ -74,6 +91,7 @@ async def add_to_watchlist(
 ):
     """Add a market to user's watchlist."""
     watchlist = await crud.add_to_watchlist(db, user_id, data.market_id)
+    get_watchlist_index().set_watchlist(user_id, watchlist.market_ids if watchlist else [])
 
     return Watchlist(
         id=watchlist.id,
@@ -92,6 +110,7 @@ async def remove_from_watchlist(
 ):
     """Remove a market from user's watchlist."""
     watchlist = await crud.remove_from_watchlist(db, user_id, market_id)
+    get_watchlist_index().set_watchlist(user_id, watchlist.market_ids if watchlist else [])
 
     if not watchlist:
         return Watchlist(
@@ -149,6 +168,12 @@ async def create_notification(
         threshold=data.threshold,
     )
 
+    engine = get_notification_engine()
+    if notification.is_active:
+        engine.add(notification.id, notification.user_id, notification.market_id, notification.type, notification.threshold)
+    else:
+        engine.remove(notification.id)
+
     return Notification(
         id=notification.id,
         user_id=notification.user_id,
@@ -173,6 +198,12 @@ async def toggle_notification(
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
 
+    engine = get_notification_engine()
+    if notification.is_active:
+        engine.add(notification.id, notification.user_id, notification.market_id, notification.type, notification.threshold)
+    else:
+        engine.remove(notification.id)
+
     return Notification(
         id=notification.id,
         user_id=notification.user_id,
@@ -196,4 +227,5 @@ async def delete_notification(
     if not success:
         raise HTTPException(status_code=404, detail="Notification not found")
 
+    get_notification_engine().remove(notification_id)
     return {"success": True, "message": "Notification deleted"}
@@ -1,72 +1,276 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List, Dict, Set
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from typing import Any, Deque, List, Dict, Optional, Set
+from collections import deque
 import asyncio
-import json
+import os
+import time
+import uuid
 from datetime import datetime
 
+from services.backplane import BACKPLANE_ACK_SECONDS, BACKPLANE_PRESENCE_SECONDS, WORKER_ID, RemotePresence, get_backplane
 from services.data_aggregator import get_data_aggregator
+from services.event_stream import get_event_stream
+from services.market_deltas import MarketDelta, get_market_delta_tracker
+from services.market_snapshot import get_market_snapshot
+from services.topic_index import TopicIndex, parse_topic
+from services.watchlist_index import get_watchlist_index
+from utils.metrics import metrics
+from utils.ws_frames import MSGPACK_SUBPROTOCOL, Frame, decode_client_message, encode_batch, negotiate_format
+
+WS_UPDATE_INTERVAL_SECONDS = float(os.getenv("WS_UPDATE_INTERVAL_SECONDS", "30"))
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+WS_SLOW_CONSUMER_SECONDS = float(os.getenv("WS_SLOW_CONSUMER_SECONDS", "10"))
+WS_BATCH_WINDOW_MS = float(os.getenv("WS_BATCH_WINDOW_MS", "100"))
 
 router = APIRouter(tags=["WebSocket"])
 
 
+class ClientConnection:
+    """Bounded outbound queue for one socket, drained by its own writer task.
+
+    A slow client only backs up its own queue. When the queue is full, a
+    frame keyed by market id replaces the queued frame for that market
+    (latest value wins); any other frame is dropped. A client whose queue
+    stays full for ``slow_after`` seconds is reported as ``slow`` so the
+    manager can disconnect it. There is no partial-drain threshold: the
+    writer takes the whole queue for each send, which clears ``full_since``,
+    so a client only turns slow while a single send has been stuck since
+    its queue filled.
+
+    The writer sends at most one socket frame per ``batch_window`` seconds:
+    a frame queued on an idle connection goes out at once, and everything
+    queued while the writer waits is packed into a single ``batch`` frame.
+    ``binary`` clients get MessagePack frames instead of JSON text.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_size: int = WS_SEND_QUEUE_SIZE,
+        slow_after: float = WS_SLOW_CONSUMER_SECONDS,
+        binary: bool = False,
+        batch_window: float = WS_BATCH_WINDOW_MS / 1000,
+    ):
+        self.websocket = websocket
+        self.max_size = max_size
+        self.slow_after = slow_after
+        self.binary = binary
+        self.batch_window = batch_window
+        # [key, frame] entries; keyed points at the newest entry per key
+        self.queue: Deque[list] = deque()
+        self.keyed: Dict[str, list] = {}
+        self.full_since: Optional[float] = None
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    def put(self, frame: Frame, key: Optional[str] = None) -> bool:
+        """Queue a frame; False if it was dropped."""
+        if self.closed:
+            return False
+        if len(self.queue) >= self.max_size:
+            if self.full_since is None:
+                self.full_since = time.monotonic()
+            entry = self.keyed.get(key) if key is not None else None
+            if entry is None:
+                metrics.counter("ws.dropped").inc()
+                return False
+            entry[1] = frame
+            metrics.counter("ws.conflated").inc()
+            return True
+
+        entry = [key, frame]
+        self.queue.append(entry)
+        if key is not None:
+            self.keyed[key] = entry
+        self._ready.set()
+        return True
+
+    @property
+    def slow(self) -> bool:
+        return self.full_since is not None and time.monotonic() - self.full_since > self.slow_after
+
+    async def run(self):
+        while not self.closed:
+            await self._ready.wait()
+            frames = [frame for _, frame in self.queue]
+            self.queue.clear()
+            self.keyed.clear()
+            self.full_since = None
+            self._ready.clear()
+
+            payload = encode_batch(frames, self.binary)
+            try:
+                if self.binary:
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+            except Exception:
+                self.closed = True
+                return
+            metrics.counter("ws.frames_sent").inc()
+            metrics.counter("ws.messages_sent").inc(len(frames))
+            # Text frames are ASCII-only JSON (ensure_ascii), so characters are bytes
+            metrics.counter("ws.bytes_sent").inc(len(payload))
+
+            if self.batch_window > 0:
+                # Let updates accumulate so the next send carries them together
+                await asyncio.sleep(self.batch_window)
+
+    def stop(self):
+        self.closed = True
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def close(self, code: int = 1013):
+        self.stop()
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), 1)
+        except Exception:
+            pass
+
+
 class ConnectionManager:
-    """Manage WebSocket connections."""
+    """Manage WebSocket connections.
+
+    Sends never await the socket: frames go onto each connection's
+    ``ClientConnection`` queue and its writer task delivers them in order.
+    """
 
     def __init__(self):
         self.active_connections: List[WebSocket] = []
-        self.subscriptions: Dict[str, Set[WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.topics = TopicIndex(get_watchlist_index())
+        # Sockets per user, for alert delivery
+        self.user_connections: Dict[str, Set[WebSocket]] = {}
+        self.connection_users: Dict[WebSocket, str] = {}
+        self._closing: Set[asyncio.Task] = set()
+
+    async def connect(self, websocket: WebSocket, subprotocol: Optional[str] = None, binary: Optional[bool] = None):
+        if subprotocol:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
+        if binary is None:
+            binary = subprotocol == MSGPACK_SUBPROTOCOL
+        client = ClientConnection(websocket, binary=binary)
+        client.start()
+        self.clients[websocket] = client
         self.active_connections.append(websocket)
 
+    def identify(self, websocket: WebSocket, user_id: str):
+        self.forget_user(websocket)
+        self.connection_users[websocket] = user_id
+        self.user_connections.setdefault(user_id, set()).add(websocket)
+
+    def forget_user(self, websocket: WebSocket):
+        user_id = self.connection_users.pop(websocket, None)
+        if user_id is not None:
+            sockets = self.user_connections[user_id]
+            sockets.discard(websocket)
+            if not sockets:
+                del self.user_connections[user_id]
+
+    def is_online(self, user_id: str) -> bool:
+        return user_id in self.user_connections
+
     def disconnect(self, websocket: WebSocket):
+        client = self.clients.pop(websocket, None)
+        if client is not None:
+            client.stop()
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
-        # Remove from all subscriptions
-        for market_id in list(self.subscriptions.keys()):
-            self.subscriptions[market_id].discard(websocket)
-            if not self.subscriptions[market_id]:
-                del self.subscriptions[market_id]
+        self.forget_user(websocket)
+        self.topics.remove(websocket)
 
     def subscribe(self, websocket: WebSocket, market_id: str):
-        if market_id not in self.subscriptions:
-            self.subscriptions[market_id] = set()
-        self.subscriptions[market_id].add(websocket)
+        self.topics.subscribe(websocket, f"market:{market_id}")
 
     def unsubscribe(self, websocket: WebSocket, market_id: str):
-        if market_id in self.subscriptions:
-            self.subscriptions[market_id].discard(websocket)
+        self.topics.unsubscribe(websocket, f"market:{market_id}")
+
+    def enqueue(self, websocket: WebSocket, frame: Frame, key: Optional[str] = None) -> bool:
+        client = self.clients.get(websocket)
+        if client is None:
+            return False
+        queued = client.put(frame, key)
+        if client.slow:
+            self.drop_slow_consumer(websocket)
+        return queued
+
+    def drop_slow_consumer(self, websocket: WebSocket):
+        client = self.clients.get(websocket)
+        self.disconnect(websocket)
+        metrics.counter("ws.slow_disconnects").inc()
+        task = asyncio.create_task(client.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
 
     async def send_personal(self, websocket: WebSocket, message: dict):
-        try:
-            await websocket.send_json(message)
-        except Exception:
-            pass
+        self.enqueue(websocket, Frame(message))
+
+    async def send_to_user(self, user_id: str, message: dict) -> bool:
+        """Queue for every socket of a user; True if at least one accepted it."""
+        frame = Frame(message)
+        queued = [self.enqueue(c, frame) for c in list(self.user_connections.get(user_id, ()))]
+        return any(queued)
+
+    async def broadcast_frame(self, frame: Frame, key: Optional[str] = None):
+        """Queue one frame, encoded at most once per format, for every connection."""
+        for connection in list(self.active_connections):
+            self.enqueue(connection, frame, key)
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                pass
+        await self.broadcast_frame(Frame(message), message.get("market_id"))
 
     async def broadcast_to_market(self, market_id: str, message: dict):
-        if market_id in self.subscriptions:
-            for connection in self.subscriptions[market_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    pass
+        frame = Frame(message)
+        for connection in list(self.topics.subscribers.get(f"market:{market_id}", ())):
+            self.enqueue(connection, frame, market_id)
+
+    async def publish_market(self, market: dict, frame: Frame) -> int:
+        """Queue a market's frame for every socket whose topics match it."""
+        matched = self.topics.match(market, lambda user_id: self.user_connections.get(user_id, ()))
+        if matched:
+            for connection in matched:
+                self.enqueue(connection, frame, market["id"])
+        return len(matched)
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [len(c.queue) for c in self.clients.values()]
+        return {
+            "connections": len(depths),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            **self.topics.stats(),
+        }
 
 
 manager = ConnectionManager()
+metrics.gauge("ws_connections", manager.stats)
 
 
 @router.websocket("/ws/markets")
-async def websocket_markets(websocket: WebSocket):
-    """WebSocket endpoint for real-time market updates."""
-    await manager.connect(websocket)
+async def websocket_markets(
+    websocket: WebSocket,
+    user_id: Optional[str] = Query(None, description="Receive this user's notification alerts"),
+    format: Optional[str] = Query(None, description="msgpack for binary MessagePack frames"),
+):
+    """WebSocket endpoint for real-time market updates.
+
+    Frames are JSON text unless the client offers the ``oddsradar.msgpack``
+    subprotocol (or passes ``format=msgpack``), in which case they are
+    MessagePack binary; either way the client may send JSON or MessagePack.
+    """
+    subprotocol, binary = negotiate_format(websocket.scope.get("subprotocols", []), format)
+    await manager.connect(websocket, subprotocol, binary)
+    if user_id:
+        manager.identify(websocket, user_id)
+        await cluster.announce()
 
     try:
         # Send initial connection confirmation
@@ -76,28 +280,25 @@ async def websocket_markets(websocket: WebSocket):
             "timestamp": datetime.utcnow().isoformat(),
         })
 
-        # Start background task to send periodic updates
-        update_task = asyncio.create_task(
-            send_periodic_updates(websocket)
-        )
-
         while True:
             try:
                 # Receive messages from client
-                data = await websocket.receive_json()
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                data = decode_client_message(message)
                 await handle_client_message(websocket, data)
             except WebSocketDisconnect:
                 break
-            except json.JSONDecodeError:
+            except ValueError:
                 await manager.send_personal(websocket, {
                     "type": "error",
-                    "message": "Invalid JSON",
+                    "message": "Invalid message",
                 })
 
     except WebSocketDisconnect:
         pass
     finally:
-        update_task.cancel()
         manager.disconnect(websocket)
 
 
@@ -106,22 +307,50 @@ async def handle_client_message(websocket: WebSocket, data: dict):
     msg_type = data.get("type")
 
     if msg_type == "subscribe":
-        market_id = data.get("market_id")
-        if market_id:
-            manager.subscribe(websocket, market_id)
+        topic = message_topic(data)
+        if topic is None:
+            await send_error(websocket, "Unknown topic")
+        elif topic == "watchlist" and websocket not in manager.connection_users:
+            await send_error(websocket, "Identify before subscribing to your watchlist")
+        else:
+            manager.topics.subscribe(websocket, topic)
             await manager.send_personal(websocket, {
                 "type": "subscribed",
-                "market_id": market_id,
+                "topic": topic,
+                "market_id": data.get("market_id"),
                 "timestamp": datetime.utcnow().isoformat(),
             })
-
-    elif msg_type == "unsubscribe":
+            if topic.startswith("market:"):
+                await send_market_snapshot(websocket, topic[len("market:"):])
+            else:
+                await send_topic_snapshot(websocket, topic)
+
+    elif msg_type == "resync":
+        # Client saw a sequence gap or a market it has no state for; deltas
+        # resume from the snapshot's seq
         market_id = data.get("market_id")
         if market_id:
-            manager.unsubscribe(websocket, market_id)
+            await send_market_snapshot(websocket, market_id)
+
+    elif msg_type == "unsubscribe":
+        topic = message_topic(data)
+        if topic:
+            manager.topics.unsubscribe(websocket, topic)
             await manager.send_personal(websocket, {
                 "type": "unsubscribed",
-                "market_id": market_id,
+                "topic": topic,
+                "market_id": data.get("market_id"),
+                "timestamp": datetime.utcnow().isoformat(),
+            })
+
+    elif msg_type == "identify":
+        user_id = data.get("user_id")
+        if user_id:
+            manager.identify(websocket, user_id)
+            await cluster.announce()
+            await manager.send_personal(websocket, {
+                "type": "identified",
+                "user_id": user_id,
                 "timestamp": datetime.utcnow().isoformat(),
             })
 
@@ -132,59 +361,312 @@ async def handle_client_message(websocket: WebSocket, data: dict):
         })
 
 
-async def send_periodic_updates(websocket: WebSocket):
-    """Send periodic market updates to connected client."""
-    aggregator = get_data_aggregator()
+def build_periodic_messages(stats: dict, trending: list) -> List[Frame]:
+    """stats_update and trending_update frames, encoded once for every client."""
+    timestamp = datetime.utcnow().isoformat()
+    return [
+        Frame({
+            "type": "stats_update",
+            "data": stats,
+            "timestamp": timestamp,
+        }),
+        Frame({
+            "type": "trending_update",
+            "data": [
+                {
+                    "id": m["id"],
+                    "title": m["title"],
+                    "probability": m["probability"],
+                    "change_24h": m["change_24h"],
+                }
+                for m in trending
+            ],
+            "timestamp": timestamp,
+        }),
+    ]
+
+
+class PeriodicBroadcaster:
+    """One task per process that sends stats and trending updates to all sockets.
+
+    Each tick fetches and encodes the payloads once, then fans the same
+    frames out to every connection and to the SSE event stream; ticks with
+    no WebSocket or SSE clients are skipped.
+    """
+
+    def __init__(self, connections: ConnectionManager, interval: float = WS_UPDATE_INTERVAL_SECONDS):
+        self.connections = connections
+        self.interval = interval
+        self.stream = get_event_stream()
+        self._task: Optional[asyncio.Task] = None
+
+    async def tick(self) -> None:
+        if not self.connections.active_connections and not self.stream.subscribers:
+            return
+
+        start = time.perf_counter()
+        aggregator = get_data_aggregator()
+        stats = await aggregator.get_global_stats()
+        trending = await aggregator.get_trending_markets(limit=5)
+        frames = build_periodic_messages(stats, trending)
+
+        with metrics.histogram("ws.broadcast.fanout").time():
+            for frame in frames:
+                await self.connections.broadcast_frame(frame)
+            self.stream.publish(frames)
+        metrics.histogram("ws.broadcast.tick").observe(time.perf_counter() - start)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.interval)
+                await self.tick()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error in periodic updates: {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
 
-    while True:
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+broadcaster = PeriodicBroadcaster(manager)
+
+
+class ClusterConnections:
+    """This worker's side of the backplane.
+
+    Applies published ingestion cycles and user messages to local sockets,
+    announces which users are connected here, and is the delivery target
+    for the alert outbox: a user is online if any worker holds a socket for
+    them. Messages for a local user are queued directly; others go out
+    through the backplane and count as sent only once the worker holding
+    the socket acknowledges queueing them, so the outbox keeps everything
+    else pending.
+    """
+
+    def __init__(
+        self,
+        local: ConnectionManager,
+        interval: float = BACKPLANE_PRESENCE_SECONDS,
+        ack_timeout: float = BACKPLANE_ACK_SECONDS,
+        worker: str = WORKER_ID,
+    ):
+        self.local = local
+        self.interval = interval
+        self.ack_timeout = ack_timeout
+        self.worker = worker
+        self.backplane = get_backplane()
+        self.presence = RemotePresence()
+        # delivery_id -> resolved when some worker acknowledges it
+        self._acks: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def is_online(self, user_id: str) -> bool:
+        return self.local.is_online(user_id) or self.presence.is_online(user_id)
+
+    async def send_to_user(self, user_id: str, message: dict) -> bool:
+        """True only if a socket of the user accepted the message, here or on another worker."""
+        if self.local.is_online(user_id):
+            return await self.local.send_to_user(user_id, message)
+        if not self.presence.is_online(user_id):
+            return False
+
+        delivery_id = uuid.uuid4().hex
+        acked = self._acks[delivery_id] = asyncio.get_running_loop().create_future()
         try:
-            await asyncio.sleep(30)  # Update every 30 seconds
+            await self.backplane.publish({
+                "kind": "user",
+                "origin": self.worker,
+                "user_id": user_id,
+                "message": message,
+                "delivery_id": delivery_id,
+            })
+            await asyncio.wait_for(asyncio.shield(acked), self.ack_timeout)
+            return True
+        except asyncio.TimeoutError:
+            metrics.counter("backplane.unacked").inc()
+            return False
+        finally:
+            self._acks.pop(delivery_id, None)
+
+    async def handle(self, envelope: dict):
+        kind = envelope.get("kind")
+        if kind == "cycle":
+            await apply_cycle(envelope)
+        elif kind == "quotes":
+            await apply_quotes(envelope)
+        elif kind == "user":
+            # The sender already tried its own sockets
+            if envelope["origin"] != self.worker and await self.local.send_to_user(envelope["user_id"], envelope["message"]):
+                await self.backplane.publish({"kind": "ack", "delivery_id": envelope["delivery_id"], "worker": self.worker})
+        elif kind == "ack":
+            acked = self._acks.get(envelope["delivery_id"])
+            if acked is not None and not acked.done():
+                acked.set_result(envelope["worker"])
+        elif kind == "presence" and envelope["worker"] != self.worker:
+            self.presence.record(envelope["worker"], envelope["users"])
+
+    async def announce(self):
+        """Publish the users connected to this worker."""
+        if self.backplane.distributed:
+            await self.backplane.publish({
+                "kind": "presence",
+                "worker": self.worker,
+                "users": list(self.local.user_connections),
+            })
+
+    async def run(self):
+        while True:
+            try:
+                await self.announce()
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error announcing presence: {e}")
+                await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.handle not in self.backplane.handlers:
+            self.backplane.subscribe(self.handle)
+        self.backplane.start()
+        if self.backplane.distributed and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.backplane.stop()
 
-            # Get fresh stats
-            stats = await aggregator.get_global_stats()
 
-            await manager.send_personal(websocket, {
-                "type": "stats_update",
-                "data": stats,
-                "timestamp": datetime.utcnow().isoformat(),
-            })
+cluster = ClusterConnections(manager)
 
-            # Get trending markets
-            trending = await aggregator.get_trending_markets(limit=5)
 
-            await manager.send_personal(websocket, {
-                "type": "trending_update",
-                "data": [
-                    {
-                        "id": m["id"],
-                        "title": m["title"],
-                        "probability": m["probability"],
-                        "change_24h": m["change_24h"],
-                    }
-                    for m in trending
-                ],
-                "timestamp": datetime.utcnow().isoformat(),
-            })
+def message_topic(data: dict) -> Optional[str]:
+    """Topic named by a (un)subscribe message; a bare market_id means market:<id>."""
+    if data.get("topic"):
+        return parse_topic(str(data["topic"]))
+    if data.get("market_id"):
+        return f"market:{data['market_id']}"
+    return None
+
 
-        except asyncio.CancelledError:
-            break
-        except Exception as e:
-            print(f"Error in periodic updates: {e}")
-            await asyncio.sleep(10)
+async def send_error(websocket: WebSocket, message: str):
+    await manager.send_personal(websocket, {
+        "type": "error",
+        "message": message,
+    })
 
 
-# Function to broadcast market updates (called by data ingestion)
-async def broadcast_market_update(market_id: str, data: dict):
-    """Broadcast a market update to all subscribers."""
-    message = {
-        "type": "market_update",
+async def send_market_snapshot(websocket: WebSocket, market_id: str):
+    """Full streamed fields for one market; later market_update deltas apply on top."""
+    tracker = get_market_delta_tracker()
+    snapshot = tracker.snapshot(market_id)
+    if snapshot is not None:
+        seq, data = snapshot
+    else:
+        # Not ingested yet: seq 0, the first delta will carry every field
+        market = await get_data_aggregator().get_market_by_id(market_id)
+        seq, data = 0, {f: market.get(f) for f in tracker.fields} if market else None
+
+    await manager.send_personal(websocket, {
+        "type": "market_snapshot",
         "market_id": market_id,
+        "seq": seq,
         "data": data,
         "timestamp": datetime.utcnow().isoformat(),
-    }
-
-    # Broadcast to market-specific subscribers
-    await manager.broadcast_to_market(market_id, message)
-
-    # Also broadcast to general connection for trending/stats updates
-    await manager.broadcast(message)
+    })
+
+
+async def send_topic_snapshot(websocket: WebSocket, topic: str):
+    """Snapshots of every market currently under a topic, in one frame."""
+    snapshot = get_market_snapshot()
+    tracker = get_market_delta_tracker()
+    manager.topics.update_ranks(snapshot.leaderboards)
+    user_id = manager.connection_users.get(websocket)
+
+    markets = []
+    for market in snapshot.markets:
+        state = tracker.snapshot(market["id"])
+        if state is not None and manager.topics.matches(topic, market, user_id):
+            seq, data = state
+            markets.append({"market_id": market["id"], "seq": seq, "data": data})
+
+    await manager.send_personal(websocket, {
+        "type": "market_snapshots",
+        "topic": topic,
+        "markets": markets,
+        "timestamp": datetime.utcnow().isoformat(),
+    })
+
+
+async def apply_cycle(envelope: dict):
+    """Fan one published ingestion cycle out to this worker's sockets."""
+    markets = envelope["markets"]
+    if envelope["origin"] != WORKER_ID:
+        # The leader updated its own snapshot before publishing
+        get_market_snapshot().update(markets, envelope["timestamp"])
+    await broadcast_market_updates(get_market_delta_tracker().diff(markets))
+
+
+async def apply_quotes(envelope: dict):
+    """Apply streamed prices between ingestion cycles and fan out the deltas.
+
+    ``quotes.latency`` records how long after the feed event each quote was
+    handed to the client queues.
+    """
+    markets = get_market_snapshot().apply_quotes(envelope["quotes"])
+    await broadcast_market_updates(get_market_delta_tracker().diff(markets))
+    now = time.time()
+    latency = metrics.histogram("quotes.latency")
+    for received_at in envelope.get("received_at", {}).values():
+        latency.observe(max(0.0, now - received_at))
+
+
+async def broadcast_market_updates(deltas: List[MarketDelta]):
+    """Send each changed market's delta to the sockets whose topics match it.
+
+    Every delta also goes to the SSE event stream, even with no SSE clients
+    connected, so a reconnecting client can replay what it missed. The whole
+    batch is one publish, so a large cycle takes one slot of an SSE client's
+    queue rather than one per market.
+    """
+    snapshot = get_market_snapshot()
+    timestamp = datetime.utcnow().isoformat()
+    frames = [
+        Frame({
+            "type": "market_update",
+            "market_id": market_id,
+            "seq": seq,
+            "changes": changes,
+            "timestamp": timestamp,
+        })
+        for market_id, seq, changes in deltas
+    ]
+    get_event_stream().publish(frames)
+    if not manager.topics.subscribers:
+        return
+    manager.topics.update_ranks(snapshot.leaderboards)
+    for (market_id, _, _), frame in zip(deltas, frames):
+        market = snapshot.get(market_id)
+        if market is None:
+            continue
+        sent = await manager.publish_market(market, frame)
+        if sent:
+            metrics.counter("ws.market_updates").inc(sent)
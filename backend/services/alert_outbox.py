@@ -0,0 +1,194 @@
+"""Batched delivery of triggered notification alerts.
+
+The ingestion loop only appends to a bounded in-memory queue. A background
+task drains it in batches: each batch is written to the ``alerts`` table in
+one statement, then every affected user gets a single ``alerts`` message over
+their WebSocket connections. Alerts for users who are not connected are kept
+(per-user cap and TTL) and retried on every flush until they reconnect.
+"""
+import asyncio
+import os
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from database import crud
+from database.connection import AsyncSessionLocal, is_database_configured
+from database.models import generate_uuid
+from utils.metrics import metrics
+
+ALERT_OUTBOX_MAX_SIZE = int(os.getenv("ALERT_OUTBOX_MAX_SIZE", "10000"))
+ALERT_OUTBOX_BATCH_SIZE = int(os.getenv("ALERT_OUTBOX_BATCH_SIZE", "500"))
+ALERT_OUTBOX_FLUSH_SECONDS = float(os.getenv("ALERT_OUTBOX_FLUSH_SECONDS", "1"))
+ALERT_PENDING_PER_USER = int(os.getenv("ALERT_PENDING_PER_USER", "100"))
+ALERT_PENDING_TTL_SECONDS = float(os.getenv("ALERT_PENDING_TTL_SECONDS", "86400"))
+
+
+def alert_payload(alert: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": alert["id"],
+        "notification_id": alert["notification_id"],
+        "market_id": alert["market_id"],
+        "type": alert["type"],
+        "threshold": alert["threshold"],
+        "value": alert["value"],
+        "triggered_at": alert["triggered_at"].isoformat(),
+    }
+
+
+class AlertOutbox:
+    """Bounded alert queue with batched persistence and per-user delivery.
+
+    ``connections`` is anything with ``is_online(user_id)`` and an async
+    ``send_to_user(user_id, message) -> bool`` (the WebSocket
+    ``ConnectionManager``); it is attached by ``start``.
+    """
+
+    def __init__(
+        self,
+        connections: Any = None,
+        max_size: int = ALERT_OUTBOX_MAX_SIZE,
+        batch_size: int = ALERT_OUTBOX_BATCH_SIZE,
+        flush_seconds: float = ALERT_OUTBOX_FLUSH_SECONDS,
+        pending_per_user: int = ALERT_PENDING_PER_USER,
+        pending_ttl: float = ALERT_PENDING_TTL_SECONDS,
+    ):
+        self.connections = connections
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.pending_per_user = pending_per_user
+        self.pending_ttl = timedelta(seconds=pending_ttl)
+        self.pending: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, alerts: Iterable[Dict[str, Any]]) -> None:
+        """Queue alerts without blocking; the oldest are dropped when full."""
+        for alert in alerts:
+            alert = {**alert, "id": generate_uuid()}
+            if self.queue.full():
+                self.queue.get_nowait()
+                metrics.counter("alerts.dropped").inc()
+            self.queue.put_nowait(alert)
+            metrics.counter("alerts.enqueued").inc()
+
+    async def next_batch(self) -> List[Dict[str, Any]]:
+        """Up to ``batch_size`` alerts, waiting at most ``flush_seconds`` for the first."""
+        try:
+            batch = [await asyncio.wait_for(self.queue.get(), self.flush_seconds)]
+        except asyncio.TimeoutError:
+            return []
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def process(self, batch: List[Dict[str, Any]]) -> None:
+        if batch:
+            if is_database_configured():
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await crud.add_alerts_batch(db, batch)
+                except Exception as e:
+                    print(f"Error persisting alerts: {e}")
+            for alert in batch:
+                user_pending = self.pending.get(alert["user_id"])
+                if user_pending is None:
+                    user_pending = self.pending[alert["user_id"]] = deque(maxlen=self.pending_per_user)
+                user_pending.append(alert)
+            self.expire(datetime.utcnow())
+        await self.deliver()
+
+    def expire(self, now: datetime) -> None:
+        """Forget alerts that waited longer than the TTL for their user to connect."""
+        cutoff = now - self.pending_ttl
+        for user_id in list(self.pending):
+            user_pending = self.pending[user_id]
+            while user_pending and user_pending[0]["triggered_at"] < cutoff:
+                user_pending.popleft()
+                metrics.counter("alerts.expired").inc()
+            if not user_pending:
+                del self.pending[user_id]
+
+    async def deliver(self) -> None:
+        """Push one coalesced message to each connected user with pending alerts."""
+        if self.connections is None or not self.pending:
+            return
+
+        online = [u for u in self.pending if self.connections.is_online(u)]
+        delivered = await asyncio.gather(*(self.deliver_to_user(u) for u in online))
+        alert_ids = [alert_id for ids in delivered for alert_id in ids]
+        if alert_ids and is_database_configured():
+            try:
+                async with AsyncSessionLocal() as db:
+                    await crud.mark_alerts_delivered(db, alert_ids, datetime.utcnow())
+            except Exception as e:
+                print(f"Error marking alerts delivered: {e}")
+
+    async def deliver_to_user(self, user_id: str) -> List[str]:
+        alerts = list(self.pending[user_id])
+        message = {
+            "type": "alerts",
+            "alerts": [alert_payload(a) for a in alerts],
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+        if not await self.connections.send_to_user(user_id, message):
+            return []
+
+        del self.pending[user_id]
+        now = datetime.utcnow()
+        latency = metrics.histogram("alerts.delivery_latency")
+        for alert in alerts:
+            latency.observe((now - alert["triggered_at"]).total_seconds())
+        metrics.counter("alerts.delivered").inc(len(alerts))
+        return [a["id"] for a in alerts]
+
+    async def flush(self) -> None:
+        """Process everything queued right now."""
+        while not self.queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self.process(batch)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.process(await self.next_batch())
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error delivering alerts: {e}")
+
+    def start(self, connections: Any) -> None:
+        self.connections = connections
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "pending_users": len(self.pending),
+            "pending_alerts": sum(len(p) for p in self.pending.values()),
+        }
+
+
+# Singleton instance
+_alert_outbox: Optional[AlertOutbox] = None
+
+
+def get_alert_outbox() -> AlertOutbox:
+    global _alert_outbox
+    if _alert_outbox is None:
+        _alert_outbox = AlertOutbox()
+        metrics.gauge("alert_outbox", _alert_outbox.stats)
+    return _alert_outbox
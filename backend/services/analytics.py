@@ -0,0 +1,172 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from services.snapshot_archive import SnapshotArchive, get_snapshot_archive
+from utils.metrics import metrics
+
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "256"))
+
+# Latest sample per market within the window
+_LATEST_PER_MARKET = """
+    SELECT
+        id,
+        arg_max(platform, snapshot_ts) AS platform,
+        arg_max(category, snapshot_ts) AS category,
+        arg_max(title, snapshot_ts) AS title,
+        arg_max(volume_24h, snapshot_ts) AS volume_24h,
+        arg_max(open_interest, snapshot_ts) AS open_interest
+    FROM snapshots
+    WHERE snapshot_ts >= $since
+    GROUP BY id
+"""
+
+QUERIES: Dict[str, str] = {
+    "category_oi_trends": """
+        WITH daily AS (
+            SELECT category, CAST(snapshot_ts AS DATE) AS day, id,
+                   arg_max(open_interest, snapshot_ts) AS open_interest
+            FROM snapshots
+            WHERE snapshot_ts >= $since
+            GROUP BY ALL
+        ),
+        per_category AS (
+            SELECT category, day, sum(open_interest) AS open_interest
+            FROM daily
+            GROUP BY ALL
+        )
+        SELECT
+            coalesce(category, 'Other') AS category,
+            arg_min(open_interest, day) AS start_open_interest,
+            arg_max(open_interest, day) AS end_open_interest,
+            arg_max(open_interest, day) - arg_min(open_interest, day) AS open_interest_change,
+            list(open_interest ORDER BY day) AS daily_open_interest
+        FROM per_category
+        GROUP BY ALL
+        ORDER BY open_interest_change DESC
+        LIMIT $limit
+    """,
+    "platform_volume_share": f"""
+        WITH latest AS ({_LATEST_PER_MARKET})
+        SELECT
+            platform,
+            count(*) AS markets,
+            sum(volume_24h) AS volume_24h,
+            sum(volume_24h) / nullif(sum(sum(volume_24h)) OVER (), 0) AS share
+        FROM latest
+        GROUP BY platform
+        ORDER BY volume_24h DESC
+        LIMIT $limit
+    """,
+    "top_movers": """
+        SELECT
+            id,
+            arg_max(platform, snapshot_ts) AS platform,
+            arg_max(title, snapshot_ts) AS title,
+            arg_min(probability, snapshot_ts) AS start_probability,
+            arg_max(probability, snapshot_ts) AS end_probability,
+            (arg_max(probability, snapshot_ts) - arg_min(probability, snapshot_ts)) * 100 AS change
+        FROM snapshots
+        WHERE snapshot_ts >= $since
+        GROUP BY id
+        ORDER BY abs(change) DESC
+        LIMIT $limit
+    """,
+}
+
+
+class AnalyticsUnavailableError(RuntimeError):
+    """Raised when DuckDB or the snapshot archive is not available."""
+
+
+class AnalyticsService:
+    """Runs pre-built analytical queries in-process with embedded DuckDB.
+
+    Queries scan the Parquet snapshot archive directly; results are cached
+    per archive version, so repeated calls between flushes are free. Queries
+    run in worker threads, so the cache and its counters sit behind a lock.
+    """
+
+    def __init__(self, archive: SnapshotArchive):
+        # Imported here so the app does not pay for duckdb until analytics is used
+        try:
+            import duckdb
+        except ImportError:  # pragma: no cover - optional dependency
+            raise AnalyticsUnavailableError("duckdb is not installed (pip install duckdb)")
+        self.archive = archive
+        self.conn = duckdb.connect(":memory:")
+        self._cache: LRUCache = LRUCache(maxsize=ANALYTICS_CACHE_SIZE)
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _snapshots_source(self) -> str:
+        pattern = os.path.join(self.archive.root, "*", "*.parquet").replace("'", "''")
+        return f"read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)"
+
+    def query(self, name: str, since: datetime, limit: int = 50) -> List[Dict[str, Any]]:
+        """Run a named query over snapshots newer than ``since`` (blocking)."""
+        version = self.archive.version()
+        if version is None:
+            return []
+
+        key: Tuple = (name, since, limit, version)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"CREATE OR REPLACE TEMP VIEW snapshots AS SELECT * FROM {self._snapshots_source()}")
+            result = cursor.execute(QUERIES[name], {"since": since, "limit": limit})
+            columns = [d[0] for d in result.description]
+            rows = [dict(zip(columns, row)) for row in result.fetchall()]
+        finally:
+            cursor.close()
+
+        with self._cache_lock:
+            self._cache[key] = rows
+        return rows
+
+    def category_oi_trends(self, days: int = 7, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.query("category_oi_trends", _window_start(timedelta(days=days)), limit)
+
+    def platform_volume_share(self, hours: int = 24) -> List[Dict[str, Any]]:
+        return self.query("platform_volume_share", _window_start(timedelta(hours=hours)), 10)
+
+    def top_movers(self, hours: int = 24, limit: int = 10) -> List[Dict[str, Any]]:
+        return self.query("top_movers", _window_start(timedelta(hours=hours)), limit)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            return {
+                "cache_entries": len(self._cache),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+            }
+
+
+def _window_start(window: timedelta) -> datetime:
+    # Minute granularity keeps cache keys stable across requests in the same minute
+    return (datetime.utcnow() - window).replace(second=0, microsecond=0)
+
+
+# Singleton instance
+_analytics_service: Optional[AnalyticsService] = None
+
+
+def get_analytics_service() -> AnalyticsService:
+    global _analytics_service
+    if _analytics_service is None:
+        archive = get_snapshot_archive()
+        if archive is None:
+            raise AnalyticsUnavailableError("Snapshot archive is not configured (set SNAPSHOT_ARCHIVE_DIR)")
+        _analytics_service = AnalyticsService(archive)
+        metrics.gauge("analytics", _analytics_service.stats)
+    return _analytics_service
@@ -0,0 +1,204 @@
+"""Pub/sub backplane that lets every worker fan out updates to its own sockets.
+
+With ``WS_BACKPLANE_URL`` set (a Redis URL), workers share one pub/sub
+channel. A Redis lock elects a single ingestion leader; the leader publishes
+each cycle's markets and per-user alert messages, and every worker
+(including the leader) applies them and pushes to the sockets it holds.
+Workers also publish which users they have connected so the leader only
+delivers alerts to users who are online somewhere, and acknowledge each
+alert message they actually queue so the leader keeps the rest pending.
+
+Without a URL, ``LocalBackplane`` hands messages straight to the local
+handlers and this process is always the leader, so a single worker behaves
+exactly as before.
+
+Envelopes are msgpack dicts with a ``kind``:
+
+- ``cycle``: ``origin``, ``markets``, ``timestamp``
+- ``quotes``: ``origin``, ``quotes`` (market id -> streamed price fields),
+  ``received_at`` (market id -> epoch seconds the feed event arrived)
+- ``user``: ``origin``, ``user_id``, ``message``, ``delivery_id``
+- ``ack``: ``delivery_id``, ``worker`` (sent once a worker queued a ``user``
+  message for one of its sockets)
+- ``presence``: ``worker``, ``users``
+"""
+import asyncio
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.market_snapshot import packb, unpackb
+from utils.metrics import metrics
+
+WS_BACKPLANE_URL = os.getenv("WS_BACKPLANE_URL")
+WS_BACKPLANE_CHANNEL = os.getenv("WS_BACKPLANE_CHANNEL", "oddsradar:updates")
+BACKPLANE_PRESENCE_SECONDS = float(os.getenv("BACKPLANE_PRESENCE_SECONDS", "5"))
+# How long a user message waits for the worker holding the socket to acknowledge it
+BACKPLANE_ACK_SECONDS = float(os.getenv("BACKPLANE_ACK_SECONDS", "2"))
+LEADER_KEY = "oddsradar:ingestion-leader"
+
+# Identifies this process on the backplane and in the leader lock
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Renew the lock only while we still hold it, otherwise try to take it
+_LEADER_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RemotePresence:
+    """Users connected to other workers, from their periodic presence messages."""
+
+    def __init__(self, ttl: float = 3 * BACKPLANE_PRESENCE_SECONDS):
+        self.ttl = ttl
+        self.workers: Dict[str, Tuple[Set[str], float]] = {}
+
+    def record(self, worker: str, users: Iterable[str], now: Optional[float] = None) -> None:
+        self.workers[worker] = (set(users), time.monotonic() if now is None else now)
+
+    def is_online(self, user_id: str, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        for worker, (users, seen) in list(self.workers.items()):
+            if now - seen > self.ttl:
+                del self.workers[worker]
+            elif user_id in users:
+                return True
+        return False
+
+
+async def _dispatch(handlers: List[Handler], envelope: Dict[str, Any]) -> None:
+    for handler in handlers:
+        try:
+            await handler(envelope)
+        except Exception as e:
+            print(f"Error handling backplane message: {e}")
+
+
+class LocalBackplane:
+    """In-process stand-in: publish dispatches to this process's handlers."""
+
+    distributed = False
+
+    def __init__(self):
+        self.handlers: List[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        self.handlers.append(handler)
+
+    async def publish(self, envelope: Dict[str, Any]) -> None:
+        # Round-trip through the wire format so behaviour matches Redis
+        await _dispatch(self.handlers, unpackb(packb(envelope)))
+        metrics.counter("backplane.published").inc()
+
+    async def is_leader(self, ttl: float) -> bool:
+        return True
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": "local", "leader": True}
+
+
+class RedisBackplane:
+    """Redis pub/sub channel shared by every worker, plus the leader lock."""
+
+    distributed = True
+
+    def __init__(self, url: str, channel: str = WS_BACKPLANE_CHANNEL):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url)
+        self.channel = channel
+        self.handlers: List[Handler] = []
+        self.leader = False
+        self._leader_script = self.redis.register_script(_LEADER_SCRIPT)
+        self._release_script = self.redis.register_script(_RELEASE_SCRIPT)
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, handler: Handler) -> None:
+        self.handlers.append(handler)
+
+    async def publish(self, envelope: Dict[str, Any]) -> None:
+        await self.redis.publish(self.channel, packb(envelope))
+        metrics.counter("backplane.published").inc()
+
+    async def is_leader(self, ttl: float) -> bool:
+        """Take or renew the ingestion lock for ``ttl`` seconds."""
+        try:
+            held = await self._leader_script(keys=[LEADER_KEY], args=[WORKER_ID, int(ttl * 1000)])
+        except Exception as e:
+            print(f"Error renewing ingestion leadership: {e}")
+            held = 0
+        self.leader = bool(held)
+        return self.leader
+
+    async def run(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        metrics.counter("backplane.received").inc()
+                        await _dispatch(self.handlers, unpackb(message["data"]))
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error in backplane subscription: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.leader:
+            # Hand over right away instead of waiting for the lock to expire
+            await self._release_script(keys=[LEADER_KEY], args=[WORKER_ID])
+            self.leader = False
+        await self.redis.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": "redis", "worker": WORKER_ID, "leader": self.leader}
+
+
+# Singleton instance
+_backplane = None
+
+
+def get_backplane():
+    """Redis backplane when WS_BACKPLANE_URL is set, otherwise the local stand-in."""
+    global _backplane
+    if _backplane is None:
+        _backplane = RedisBackplane(WS_BACKPLANE_URL) if WS_BACKPLANE_URL else LocalBackplane()
+        metrics.gauge("backplane", _backplane.stats)
+    return _backplane
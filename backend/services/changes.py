@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Final, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from services.timeseries_store import TimeSeriesStore, get_timeseries_store
+
+# Market field -> lookback window, in probability percentage points
+CHANGE_WINDOWS: Final[Dict[str, timedelta]] = {
+    "change_1h": timedelta(hours=1),
+    "change_24h": timedelta(hours=24),
+    "change_7d": timedelta(days=7),
+}
+
+
+class ChangeTracker:
+    """Derives 1h/24h/7d probability changes from our own retained history.
+
+    Windows that fit in the in-memory ring buffers are answered from there;
+    longer windows use baselines supplied by the caller (DB rollups), as do
+    markets whose buffered sample at the window start is missing or more than
+    ``max_staleness`` old (new markets, gaps in ingestion). Markets without
+    a baseline keep whatever change the upstream parser provided.
+    """
+
+    def __init__(self, store: Optional[TimeSeriesStore] = None, max_staleness: Optional[timedelta] = None):
+        self.store = store or get_timeseries_store()
+        # Cycles start an interval after the previous one ends, so allow one late cycle
+        self.max_staleness = max_staleness or 2 * self.store.sample_interval
+        self.changes: Dict[str, Dict[str, float]] = {}
+        self.computed_at: Optional[datetime] = None
+
+    def buffered_baselines(self, market_ids: Sequence[str], timestamp: datetime, window: timedelta) -> np.ndarray:
+        """Ring buffer values at the start of ``window``, NaN where missing or stale."""
+        return self.store.values_at(market_ids, timestamp - window, max_age=self.max_staleness)
+
+    def windows_needing_baselines(
+        self,
+        market_ids: Optional[Sequence[str]] = None,
+        timestamp: Optional[datetime] = None,
+    ) -> Dict[str, timedelta]:
+        """Windows longer than the ring buffer retention, plus any the buffers miss for these markets."""
+        needed = {}
+        for key, window in CHANGE_WINDOWS.items():
+            if window > self.store.retention:
+                needed[key] = window
+            elif market_ids and timestamp and np.isnan(self.buffered_baselines(market_ids, timestamp, window)).any():
+                needed[key] = window
+        return needed
+
+    def compute(
+        self,
+        markets: List[Dict[str, Any]],
+        timestamp: datetime,
+        baselines: Optional[Mapping[str, Mapping[str, float]]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Compute every window's change for every market in one pass."""
+        ids = [m["id"] for m in markets]
+        current = np.array([float(m.get("probability") or 0) for m in markets])
+        baselines = baselines or {}
+
+        deltas = {}
+        for key, window in CHANGE_WINDOWS.items():
+            provided = baselines.get(key, {})
+            if window <= self.store.retention:
+                base = self.buffered_baselines(ids, timestamp, window)
+                for i in np.flatnonzero(np.isnan(base)):
+                    base[i] = provided.get(ids[i], np.nan)
+            else:
+                base = np.array([provided.get(m, np.nan) for m in ids], dtype=np.float64)
+            deltas[key] = (current - base) * 100
+
+        keys = list(CHANGE_WINDOWS)
+        matrix = np.column_stack([deltas[key] for key in keys])
+        known = ~np.isnan(matrix)
+        self.changes = {
+            market_id: {keys[j]: float(row[j]) for j in np.flatnonzero(mask)}
+            for market_id, row, mask in zip(ids, matrix, known)
+            if mask.any()
+        }
+        self.computed_at = timestamp
+        return deltas
+
+    def apply(self, markets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Overlay the latest computed changes onto freshly parsed markets."""
+        if not self.changes:
+            return markets
+        for market in markets:
+            changes = self.changes.get(market["id"])
+            if changes:
+                market.update(changes)
+        return markets
+
+
+# Singleton instance
+_change_tracker: Optional[ChangeTracker] = None
+
+
+def get_change_tracker() -> ChangeTracker:
+    global _change_tracker
+    if _change_tracker is None:
+        _change_tracker = ChangeTracker()
+    return _change_tracker
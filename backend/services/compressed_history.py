@@ -0,0 +1,215 @@
+import os
+import struct
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.rollups import ROLLUP_FIELDS as SERIES_FIELDS, to_epoch
+from utils.gorilla import decode_block, encode_block
+from utils.metrics import metrics
+
+COMPRESSED_HISTORY_PATH = os.getenv("COMPRESSED_HISTORY_PATH")
+COMPRESSED_HISTORY_BLOCK_SIZE = int(os.getenv("COMPRESSED_HISTORY_BLOCK_SIZE", "720"))
+COMPRESSED_HISTORY_RETENTION_DAYS = float(os.getenv("COMPRESSED_HISTORY_RETENTION_DAYS", "30"))
+# Open chunks of markets that stop appearing in the feed are sealed after this long
+COMPRESSED_HISTORY_IDLE_HOURS = float(os.getenv("COMPRESSED_HISTORY_IDLE_HOURS", "6"))
+
+FILE_MAGIC = b"GRLH"
+_FILE_HEADER = struct.Struct("<4sI")
+_MARKET_HEADER = struct.Struct("<HI")
+_BLOCK_HEADER = struct.Struct("<qqI")
+
+
+class CompressedHistory:
+    """Per-market history kept as sealed Gorilla blocks plus one open chunk.
+
+    Samples accumulate uncompressed until ``block_size`` is reached, then the
+    chunk is encoded and only the bytes are kept. Each snapshot also seals
+    the open chunks of markets that have had no sample for ``idle_hours`` and
+    drops blocks whose newest sample falls outside the retention window, so
+    markets that leave the feed age out like the rest.
+
+    ``read`` and ``write`` only touch references taken up front and may run
+    in a worker thread while the event loop keeps appending.
+    """
+
+    def __init__(
+        self,
+        block_size: int = COMPRESSED_HISTORY_BLOCK_SIZE,
+        retention_days: float = COMPRESSED_HISTORY_RETENTION_DAYS,
+        idle_hours: float = COMPRESSED_HISTORY_IDLE_HOURS,
+    ):
+        self.block_size = block_size
+        self.retention_seconds = retention_days * 86400
+        self.idle_seconds = idle_hours * 3600
+        # market_id -> [(first_ts, last_ts, block bytes)]
+        self.blocks: Dict[str, List[Tuple[int, int, bytes]]] = {}
+        self.pending: Dict[str, Dict[str, list]] = {}
+
+    def append(self, market_id: str, timestamp: int, values: Dict[str, float]) -> bool:
+        """Add one sample; returns True when it sealed a block."""
+        chunk = self.pending.get(market_id)
+        if chunk is None:
+            chunk = {"timestamp": [], **{field: [] for field in SERIES_FIELDS}}
+            self.pending[market_id] = chunk
+
+        chunk["timestamp"].append(timestamp)
+        for field in SERIES_FIELDS:
+            chunk[field].append(values.get(field, 0.0))
+
+        if len(chunk["timestamp"]) >= self.block_size:
+            self._seal(market_id)
+            return True
+        return False
+
+    def append_snapshot(self, markets: Iterable[Dict[str, Any]], timestamp: datetime) -> int:
+        """Record one ingestion cycle; returns the number of blocks sealed."""
+        ts = int(to_epoch(timestamp))
+        sealed = 0
+        for m in markets:
+            values = {field: float(m.get(key) or 0) for field, key in SERIES_FIELDS.items()}
+            sealed += self.append(m["id"], ts, values)
+        return sealed + self.expire(ts)
+
+    def expire(self, now: int) -> int:
+        """Seal idle open chunks and drop expired blocks; returns blocks sealed."""
+        idle = [
+            market_id for market_id, chunk in self.pending.items()
+            if chunk["timestamp"][-1] < now - self.idle_seconds
+        ]
+        for market_id in idle:
+            self._seal(market_id)
+
+        cutoff = now - self.retention_seconds
+        for market_id in list(self.blocks):
+            if self.blocks[market_id][0][1] < cutoff:
+                kept = [b for b in self.blocks[market_id] if b[1] >= cutoff]
+                if kept:
+                    self.blocks[market_id] = kept
+                else:
+                    del self.blocks[market_id]
+        return len(idle)
+
+    def _seal(self, market_id: str) -> None:
+        chunk = self.pending.pop(market_id, None)
+        if not chunk or not chunk["timestamp"]:
+            return
+
+        timestamps = chunk["timestamp"]
+        block = encode_block(timestamps, {field: chunk[field] for field in SERIES_FIELDS})
+        self.blocks[market_id] = [*self.blocks.get(market_id, ()), (timestamps[0], timestamps[-1], block)]
+
+    def read(
+        self,
+        market_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Decode the samples of one market within [start, end], oldest first."""
+        lo = to_epoch(start) if start else -np.inf
+        hi = to_epoch(end) if end else np.inf
+
+        # Block lists are replaced, never mutated; an open chunk may be mid-append
+        blocks = self.blocks.get(market_id, [])
+        chunk = self.pending.get(market_id)
+
+        parts = []
+        for first_ts, last_ts, block in blocks:
+            if last_ts >= lo and first_ts <= hi:
+                timestamps, columns = decode_block(block)
+                parts.append({"timestamp": timestamps, **columns})
+
+        if chunk:
+            n = min(len(values) for values in chunk.values())
+            if n:
+                parts.append({key: np.asarray(values[:n]) for key, values in chunk.items()})
+
+        keys = ["timestamp", *SERIES_FIELDS]
+        if not parts:
+            return {key: np.empty(0) for key in keys}
+
+        merged = {key: np.concatenate([p[key] for p in parts]) for key in keys}
+        mask = (merged["timestamp"] >= lo) & (merged["timestamp"] <= hi)
+        return {key: values[mask] for key, values in merged.items()}
+
+    def save(self, path: str) -> None:
+        """Write every market's blocks (open chunks sealed as partial blocks)."""
+        for market_id in list(self.pending):
+            self._seal(market_id)
+        self.write(path, dict(self.blocks))
+
+    @staticmethod
+    def write(path: str, blocks_by_market: Dict[str, List[Tuple[int, int, bytes]]]) -> None:
+        """Write sealed blocks to ``path``; off the loop, pass a shallow copy of ``blocks``."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_FILE_HEADER.pack(FILE_MAGIC, len(blocks_by_market)))
+            for market_id, blocks in blocks_by_market.items():
+                encoded_id = market_id.encode("utf-8")
+                f.write(_MARKET_HEADER.pack(len(encoded_id), len(blocks)))
+                f.write(encoded_id)
+                for first_ts, last_ts, block in blocks:
+                    f.write(_BLOCK_HEADER.pack(first_ts, last_ts, len(block)))
+                    f.write(block)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, n_markets = _FILE_HEADER.unpack_from(data, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{path} is not a compressed history file")
+        offset = _FILE_HEADER.size
+
+        for _ in range(n_markets):
+            id_len, n_blocks = _MARKET_HEADER.unpack_from(data, offset)
+            offset += _MARKET_HEADER.size
+            market_id = data[offset:offset + id_len].decode("utf-8")
+            offset += id_len
+            blocks = []
+            for _ in range(n_blocks):
+                first_ts, last_ts, length = _BLOCK_HEADER.unpack_from(data, offset)
+                offset += _BLOCK_HEADER.size
+                blocks.append((first_ts, last_ts, data[offset:offset + length]))
+                offset += length
+            self.blocks[market_id] = blocks
+
+    @property
+    def compressed_bytes(self) -> int:
+        return sum(len(b) for blocks in self.blocks.values() for _, _, b in blocks)
+
+    @property
+    def sealed_samples(self) -> int:
+        # Sample count sits right after the magic in each block header
+        return sum(
+            int.from_bytes(b[4:8], "little")
+            for blocks in self.blocks.values()
+            for _, _, b in blocks
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        samples = self.sealed_samples
+        raw_bytes = samples * 8 * (1 + len(SERIES_FIELDS))
+        return {
+            "markets": len(self.blocks.keys() | self.pending.keys()),
+            "blocks": sum(len(b) for b in self.blocks.values()),
+            "sealed_samples": samples,
+            "pending_samples": sum(len(c["timestamp"]) for c in self.pending.values()),
+            "compressed_bytes": self.compressed_bytes,
+            "compression_ratio": raw_bytes / self.compressed_bytes if self.compressed_bytes else 0.0,
+        }
+
+
+# Singleton instance
+_compressed_history: Optional[CompressedHistory] = None
+
+
+def get_compressed_history() -> CompressedHistory:
+    global _compressed_history
+    if _compressed_history is None:
+        _compressed_history = CompressedHistory()
+        metrics.gauge("compressed_history", _compressed_history.stats)
+    return _compressed_history
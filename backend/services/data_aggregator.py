@@ -1,11 +1,16 @@
 import asyncio
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
 
 from services.polymarket_service import get_polymarket_service
 from services.kalshi_service import get_kalshi_service
+from services.changes import get_change_tracker
+from services.market_snapshot import get_market_snapshot, rank_markets, summarize_markets
 from utils.cache import market_cache, stats_cache
 
+# Ids per upstream multi-market request, and how many requests run at once
+BATCH_CHUNK_SIZE = 50
+BATCH_CONCURRENCY = 4
+
 
 class DataAggregator:
     """Aggregates data from multiple prediction market sources."""
@@ -13,6 +18,8 @@ class DataAggregator:
     def __init__(self):
         self.polymarket = get_polymarket_service()
         self.kalshi = get_kalshi_service()
+        self.changes = get_change_tracker()
+        self.snapshot = get_market_snapshot()
 
     async def fetch_all_markets(
         self,
@@ -21,6 +28,47 @@ class DataAggregator:
         platform: Optional[str] = None,
         category: Optional[str] = None,
         status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch markets, answering from the restored snapshot until the first live refresh."""
+        if self.snapshot.warm:
+            return self.filter_snapshot(limit, active_only, platform, category, status)
+        return await self.fetch_live_markets(limit, active_only, platform, category, status)
+
+    def filter_snapshot(
+        self,
+        limit: int,
+        active_only: bool,
+        platform: Optional[str],
+        category: Optional[str],
+        status: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """Apply fetch_all_markets filters to the snapshot (at most ``limit`` per platform)."""
+        if status is None and active_only:
+            status = "open"
+        category_lower = category.lower() if category else None
+
+        per_platform: Dict[str, int] = {}
+        markets = []
+        for m in sorted(self.snapshot.markets, key=lambda x: x.get("volume_24h", 0), reverse=True):
+            if platform and m["platform"] != platform:
+                continue
+            if status and m["status"] != status:
+                continue
+            if category_lower and m.get("category", "").lower() != category_lower:
+                continue
+            if per_platform.get(m["platform"], 0) >= limit:
+                continue
+            per_platform[m["platform"]] = per_platform.get(m["platform"], 0) + 1
+            markets.append(m)
+        return markets
+
+    async def fetch_live_markets(
+        self,
+        limit: int = 50,
+        active_only: bool = True,
+        platform: Optional[str] = None,
+        category: Optional[str] = None,
+        status: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Fetch markets from all sources with optional filtering at source level."""
         # Determine which platforms to fetch based on filter
@@ -61,6 +109,9 @@ class DataAggregator:
             else:
                 all_markets.extend(result)
 
+        # Replace upstream change estimates with ones derived from our history
+        self.changes.apply(all_markets)
+
         # Apply category filter if specified (needs to be done after fetch since APIs don't support it)
         if category:
             category_lower = category.lower()
@@ -84,15 +135,13 @@ class DataAggregator:
         cached = await market_cache.get(cache_key)
         if cached:
             return cached
+        if self.snapshot.warm:
+            return self.snapshot.leaderboard("trending", limit)
 
         all_markets = await self.fetch_all_markets(limit=100)
 
         # Sort by absolute change
-        trending = sorted(
-            all_markets,
-            key=lambda x: abs(x.get("change_24h", 0)),
-            reverse=True,
-        )[:limit]
+        trending = rank_markets(all_markets, "trending", limit)
 
         await market_cache.set(cache_key, trending)
         return trending
@@ -103,15 +152,13 @@ class DataAggregator:
         cached = await market_cache.get(cache_key)
         if cached:
             return cached
+        if self.snapshot.warm:
+            return self.snapshot.leaderboard("top_oi", limit)
 
         all_markets = await self.fetch_all_markets(limit=100)
 
         # Sort by open interest
-        top_oi = sorted(
-            all_markets,
-            key=lambda x: x.get("open_interest", 0),
-            reverse=True,
-        )[:limit]
+        top_oi = rank_markets(all_markets, "top_oi", limit)
 
         await market_cache.set(cache_key, top_oi)
         return top_oi
@@ -122,15 +169,13 @@ class DataAggregator:
         cached = await market_cache.get(cache_key)
         if cached:
             return cached
+        if self.snapshot.warm:
+            return self.snapshot.leaderboard("top_volume", limit)
 
         all_markets = await self.fetch_all_markets(limit=100)
 
         # Sort by volume
-        top_volume = sorted(
-            all_markets,
-            key=lambda x: x.get("volume_24h", 0),
-            reverse=True,
-        )[:limit]
+        top_volume = rank_markets(all_markets, "top_volume", limit)
 
         await market_cache.set(cache_key, top_volume)
         return top_volume
@@ -141,24 +186,11 @@ class DataAggregator:
         cached = await stats_cache.get(cache_key)
         if cached:
             return cached
+        if self.snapshot.warm and self.snapshot.global_stats:
+            return {**self.snapshot.global_stats, "stale": True}
 
         all_markets = await self.fetch_all_markets(limit=500)
-
-        total_oi = sum(m.get("open_interest", 0) for m in all_markets)
-        total_volume = sum(m.get("volume_24h", 0) for m in all_markets)
-
-        poly_count = len([m for m in all_markets if m["platform"] == "polymarket"])
-        kalshi_count = len([m for m in all_markets if m["platform"] == "kalshi"])
-
-        stats = {
-            "total_markets": len(all_markets),
-            "total_open_interest": total_oi,
-            "total_volume_24h": total_volume,
-            "active_markets": len([m for m in all_markets if m["status"] == "open"]),
-            "polymarket_count": poly_count,
-            "kalshi_count": kalshi_count,
-            "updated_at": datetime.utcnow().isoformat(),
-        }
+        stats = summarize_markets(all_markets)
 
         await stats_cache.set(cache_key, stats)
         return stats
@@ -187,25 +219,97 @@ class DataAggregator:
         cached = await market_cache.get(cache_key)
         if cached:
             return cached
+        if self.snapshot.warm and self.snapshot.get(market_id):
+            return self.snapshot.get(market_id)
+
+        return await self.fetch_live_market(market_id)
+
+    async def fetch_live_market(self, market_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch one market from its platform and refresh its cache entry."""
+        cache_key = f"market_{market_id}"
 
         # Determine platform from ID prefix
         if market_id.startswith("poly_"):
             original_id = market_id.replace("poly_", "")
             raw = await self.polymarket.get_market(original_id)
             if raw:
-                market = self.polymarket.parse_market(raw)
+                market = self.changes.apply([self.polymarket.parse_market(raw)])[0]
                 await market_cache.set(cache_key, market)
                 return market
         elif market_id.startswith("kalshi_"):
             ticker = market_id.replace("kalshi_", "")
             raw = await self.kalshi.get_market(ticker)
             if raw:
-                market = self.kalshi.parse_market(raw)
+                market = self.changes.apply([self.kalshi.parse_market(raw)])[0]
                 await market_cache.set(cache_key, market)
                 return market
 
         return None
 
+    async def get_markets_by_ids(self, market_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Resolve many markets at once: cache and snapshot hits first, then batched fetches."""
+        found: Dict[str, Dict[str, Any]] = {}
+        misses = []
+        for market_id in dict.fromkeys(market_ids):
+            market = await market_cache.get(f"market_{market_id}") or self.snapshot.get(market_id)
+            if market:
+                found[market_id] = market
+            else:
+                misses.append(market_id)
+
+        if misses:
+            found.update(await self.fetch_live_markets_by_ids(misses))
+        return found
+
+    async def resolve_markets(self, market_ids: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Markets in request order without duplicates, plus the ids that could not be resolved."""
+        found = await self.get_markets_by_ids(market_ids)
+        ordered = list(dict.fromkeys(market_ids))
+        return [found[i] for i in ordered if i in found], [i for i in ordered if i not in found]
+
+    async def fetch_live_markets_by_ids(self, market_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch markets from their platforms using multi-id queries with bounded concurrency."""
+        poly_ids = [i.replace("poly_", "", 1) for i in market_ids if i.startswith("poly_")]
+        tickers = [i.replace("kalshi_", "", 1) for i in market_ids if i.startswith("kalshi_")]
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def fetch_chunk(fetch_batch, parse, chunk: List[str], prefix: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                raws = await fetch_batch(chunk)
+            if raws is not None:
+                return [parse(raw) for raw in raws]
+
+            # Multi-id query unavailable: fall back to one request per market
+            async def fetch_one(original_id: str) -> Optional[Dict[str, Any]]:
+                async with semaphore:
+                    return await self.fetch_live_market(f"{prefix}{original_id}")
+
+            results = await asyncio.gather(*(fetch_one(i) for i in chunk))
+            return [m for m in results if m]
+
+        sources = [
+            (self.polymarket.get_markets_by_ids, self.polymarket.parse_market, poly_ids, "poly_"),
+            (self.kalshi.get_markets_by_tickers, self.kalshi.parse_market, tickers, "kalshi_"),
+        ]
+        tasks = [
+            fetch_chunk(fetch_batch, parse, ids[i:i + BATCH_CHUNK_SIZE], prefix)
+            for fetch_batch, parse, ids, prefix in sources
+            for i in range(0, len(ids), BATCH_CHUNK_SIZE)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        requested = set(market_ids)
+        found: Dict[str, Dict[str, Any]] = {}
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Error fetching market batch: {result}")
+                continue
+            for market in self.changes.apply(result):
+                if market["id"] in requested:
+                    found[market["id"]] = market
+                    await market_cache.set(f"market_{market['id']}", market)
+        return found
+
     async def get_markets_by_category(
         self,
         category: str,
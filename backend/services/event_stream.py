@@ -0,0 +1,102 @@
+"""Replayable stream of broadcast messages behind ``/sse/markets``.
+
+Every stats, trending and market_update message the WebSocket broadcaster
+sends is also published here under an increasing event id. The last
+``SSE_REPLAY_SIZE`` events are kept so a client reconnecting with
+``Last-Event-ID`` receives exactly what it missed. Ids carry a per-process
+epoch; an id from another worker or an earlier run, or one that has already
+fallen out of the buffer, cannot be resumed and the client is told to
+reload instead.
+
+Each subscriber has a bounded queue holding one item per ``publish`` call:
+an ingestion cycle's deltas go in together, however many markets moved. One
+that falls more than ``SSE_QUEUE_SIZE`` publishes behind is cut off; it
+reconnects and catches up from the replay buffer rather than holding memory
+for a stalled reader.
+"""
+import asyncio
+import os
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from utils.metrics import metrics
+from utils.ws_frames import Frame
+
+SSE_REPLAY_SIZE = int(os.getenv("SSE_REPLAY_SIZE", "5000"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "256"))
+
+# (sequence number, frame)
+Event = Tuple[int, Frame]
+
+
+class EventStream:
+    """Bounded replay log plus live fan-out to subscriber queues."""
+
+    def __init__(self, replay_size: int = SSE_REPLAY_SIZE, queue_size: int = SSE_QUEUE_SIZE):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.log: Deque[Event] = deque(maxlen=replay_size)
+        self.last_seq = 0
+        self.queue_size = queue_size
+        self.subscribers: Set[asyncio.Queue] = set()
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def publish(self, frames: Sequence[Frame]) -> None:
+        """Log frames under consecutive ids and hand them to subscribers as one item."""
+        if not frames:
+            return
+        events = []
+        for frame in frames:
+            self.last_seq += 1
+            events.append((self.last_seq, frame))
+        self.log.extend(events)
+        for queue in list(self.subscribers):
+            if queue.qsize() >= self.queue_size:
+                # The spare slot holds the sentinel that ends its stream
+                self.subscribers.discard(queue)
+                queue.put_nowait(None)
+                metrics.counter("sse.overflows").inc()
+            else:
+                queue.put_nowait(events)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size + 1)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    def replay(self, last_event_id: Optional[str]) -> Optional[List[Event]]:
+        """Buffered events after ``last_event_id``, or None if they cannot be resumed."""
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.last_seq:
+            return None
+        seq = int(seq)
+        oldest = self.log[0][0] if self.log else self.last_seq + 1
+        if seq < oldest - 1:
+            return None
+        return [event for event in self.log if event[0] > seq]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "buffered": len(self.log),
+            "last_event_id": self.event_id(self.last_seq),
+        }
+
+
+# Singleton instance
+_event_stream: Optional[EventStream] = None
+
+
+def get_event_stream() -> EventStream:
+    global _event_stream
+    if _event_stream is None:
+        _event_stream = EventStream()
+        metrics.gauge("sse", _event_stream.stats)
+    return _event_stream
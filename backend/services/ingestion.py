@@ -0,0 +1,215 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from database import crud
+from database.connection import AsyncSessionLocal, is_database_configured
+from database.replicas import get_replica_router
+from services.data_aggregator import get_data_aggregator
+from services.changes import get_change_tracker
+from services.compressed_history import COMPRESSED_HISTORY_PATH, CompressedHistory, get_compressed_history
+from services.alert_outbox import get_alert_outbox
+from services.backplane import WORKER_ID, get_backplane
+from services.notification_engine import get_notification_engine
+from services.kalshi_stream import KALSHI_STREAM_ENABLED, get_kalshi_stream
+from services.polymarket_stream import POLYMARKET_STREAM_ENABLED, get_polymarket_stream
+from services.market_snapshot import (
+    SNAPSHOT_CHECKPOINT_EVERY_CYCLES,
+    SNAPSHOT_CHECKPOINT_PATH,
+    MarketSnapshot,
+    get_market_snapshot,
+)
+from services.rollups import bucket_start, build_rollup_rows, retention_cutoffs
+from services.snapshot_archive import get_snapshot_archive
+from services.timeseries_store import get_timeseries_store
+from services.watchlist_index import get_watchlist_index
+
+INGESTION_ENABLED = os.getenv("INGESTION_ENABLED", "true").strip().lower() == "true"
+INGESTION_INTERVAL_SECONDS = float(os.getenv("INGESTION_INTERVAL_SECONDS", "60"))
+INGESTION_MARKET_LIMIT = int(os.getenv("INGESTION_MARKET_LIMIT", "500"))
+# Watched markets outside the top INGESTION_MARKET_LIMIT fetched separately per cycle
+INGESTION_WATCHED_LIMIT = int(os.getenv("INGESTION_WATCHED_LIMIT", "200"))
+USER_STATE_RELOAD_CYCLES = 10
+# Rollup retention is measured in days, so an hourly sweep (at the default interval) is plenty
+ROLLUP_EXPIRY_CYCLES = 60
+LEADER_TTL_INTERVALS = 3
+
+
+class MarketIngestor:
+    """Periodically snapshots markets from all platforms and records history."""
+
+    def __init__(self, interval: float = INGESTION_INTERVAL_SECONDS):
+        self.interval = interval
+        self.aggregator = get_data_aggregator()
+        self.timeseries = get_timeseries_store()
+        self.changes = get_change_tracker()
+        self.history = get_compressed_history()
+        self.archive = get_snapshot_archive()
+        self.snapshot = get_market_snapshot()
+        self.watchlists = get_watchlist_index()
+        self.notifications = get_notification_engine()
+        self.outbox = get_alert_outbox()
+        self.backplane = get_backplane()
+        # Upstream WebSocket feeds, held by the ingestion leader only
+        self.streams = []
+        if POLYMARKET_STREAM_ENABLED:
+            self.streams.append(get_polymarket_stream())
+        if KALSHI_STREAM_ENABLED:
+            self.streams.append(get_kalshi_stream())
+        self.cycles = 0
+        self.last_cycle_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_cycle(self) -> List[Dict[str, Any]]:
+        """Fetch one snapshot of every market and persist it."""
+        markets = await self.aggregator.fetch_live_markets(limit=INGESTION_MARKET_LIMIT)
+        markets = list({m["id"]: m for m in markets}.values())
+        markets += await self.fetch_watched(m["id"] for m in markets)
+        for stream in self.streams:
+            # Live feed quotes are fresher than the polled prices
+            await stream.track(markets)
+            stream.overlay(markets)
+        timestamp = datetime.utcnow()
+
+        self.timeseries.append_snapshot(markets, timestamp)
+        if self.history.append_snapshot(markets, timestamp) and COMPRESSED_HISTORY_PATH:
+            # Sealed blocks only; open chunks are sealed by the shutdown save
+            await asyncio.to_thread(CompressedHistory.write, COMPRESSED_HISTORY_PATH, dict(self.history.blocks))
+
+        baselines = {}
+        if is_database_configured():
+            baselines = await self.load_change_baselines([m["id"] for m in markets], timestamp)
+        self.changes.compute(markets, timestamp, baselines)
+        self.changes.apply(markets)
+        # Delivery happens on the outbox task, never inline with the cycle
+        self.outbox.enqueue(self.notifications.evaluate(markets, timestamp))
+
+        self.snapshot.update(markets, timestamp)
+        # Every worker, this one included, streams the cycle to its own sockets
+        await self.backplane.publish({
+            "kind": "cycle",
+            "origin": WORKER_ID,
+            "markets": markets,
+            "timestamp": timestamp,
+        })
+        self.cycles += 1
+        if is_database_configured() and self.cycles % USER_STATE_RELOAD_CYCLES == 0:
+            # Picks up edits made through other workers
+            await self.reload_user_state()
+        if SNAPSHOT_CHECKPOINT_PATH and self.cycles % SNAPSHOT_CHECKPOINT_EVERY_CYCLES == 0:
+            await asyncio.to_thread(MarketSnapshot.write, SNAPSHOT_CHECKPOINT_PATH, self.snapshot.sections())
+
+        if self.archive:
+            self.archive.append(markets, timestamp)
+            if self.archive.due:
+                await asyncio.to_thread(self.archive.write_closed)
+
+        if is_database_configured():
+            await self.persist(markets, timestamp)
+            if self.cycles % ROLLUP_EXPIRY_CYCLES == 0:
+                await self.expire_rollups(timestamp)
+
+        self.last_cycle_at = timestamp
+        return markets
+
+    async def fetch_watched(self, fetched_ids) -> List[Dict[str, Any]]:
+        """Watched markets that did not make the top-N fetch, so watchers always get updates."""
+        missing = sorted(self.watchlists.watched_markets() - set(fetched_ids))[:INGESTION_WATCHED_LIMIT]
+        if not missing:
+            return []
+
+        return list((await self.aggregator.fetch_live_markets_by_ids(missing)).values())
+
+    async def reload_user_state(self) -> None:
+        """Rebuild the watchlist index and notification rules from the database."""
+        async with AsyncSessionLocal() as db:
+            self.watchlists.load(await crud.get_all_watchlists(db))
+            self.notifications.load(await crud.get_active_notifications(db))
+
+    async def load_change_baselines(self, market_ids: List[str], timestamp: datetime) -> Dict[str, Dict[str, float]]:
+        """Hourly rollup closes for change windows the ring buffers do not cover."""
+        baselines = {}
+        async with get_replica_router().read_session() as db:
+            for key, window in self.changes.windows_needing_baselines(market_ids, timestamp).items():
+                baselines[key] = await crud.get_rollup_closes_at(
+                    db, "1h", bucket_start(timestamp - window, "1h")
+                )
+        return baselines
+
+    async def persist(self, markets: List[Dict[str, Any]], timestamp: datetime) -> None:
+        """Write market rows, raw history and rollup buckets for one cycle."""
+        history_rows = [
+            {
+                "market_id": m["id"],
+                "timestamp": timestamp,
+                "open_interest": m.get("open_interest", 0),
+                "volume": m.get("volume_24h", 0),
+                "price_yes": m.get("price_yes", 0.5),
+                "price_no": m.get("price_no", 0.5),
+                "probability": m.get("probability", 0.5),
+            }
+            for m in markets
+        ]
+
+        async with AsyncSessionLocal() as db:
+            await crud.bulk_upsert_markets(db, markets)
+            await crud.add_market_history_batch(db, history_rows)
+            await crud.upsert_market_rollups(db, build_rollup_rows(markets, timestamp))
+
+    async def expire_rollups(self, timestamp: datetime) -> None:
+        """Delete rollup buckets past their resolution's retention."""
+        async with AsyncSessionLocal() as db:
+            await crud.delete_expired_rollups(db, retention_cutoffs(timestamp))
+
+    async def follow(self) -> None:
+        """Tick on workers that are not the ingestion leader."""
+        self.cycles += 1
+        if is_database_configured() and self.cycles % USER_STATE_RELOAD_CYCLES == 0:
+            await self.reload_user_state()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                # The lock outlives a slow cycle but expires soon after a leader dies
+                if await self.backplane.is_leader(LEADER_TTL_INTERVALS * self.interval):
+                    await self.run_cycle()
+                    for stream in self.streams:
+                        stream.start()
+                else:
+                    # Only the leader holds upstream stream connections
+                    for stream in self.streams:
+                        if stream.running:
+                            await stream.stop()
+                    await self.follow()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error in ingestion cycle: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for stream in self.streams:
+            await stream.stop()
+
+
+# Singleton instance
+_market_ingestor: Optional[MarketIngestor] = None
+
+
+def get_market_ingestor() -> MarketIngestor:
+    global _market_ingestor
+    if _market_ingestor is None:
+        _market_ingestor = MarketIngestor()
+    return _market_ingestor
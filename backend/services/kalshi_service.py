@@ -61,6 +61,19 @@ class KalshiService:
             print(f"Error fetching Kalshi market {ticker}: {e}")
             return None
 
+    async def get_markets_by_tickers(self, tickers: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Fetch several markets in one request via the ``tickers`` filter; None on error."""
+        try:
+            response = await self.client.get(
+                "/markets",
+                params={"tickers": ",".join(tickers), "limit": len(tickers)},
+            )
+            response.raise_for_status()
+            return response.json().get("markets", [])
+        except httpx.HTTPError as e:
+            print(f"Error fetching Kalshi markets by ticker: {e}")
+            return None
+
     async def get_market_history(
         self,
         ticker: str,
@@ -119,12 +132,13 @@ class KalshiService:
         # Open interest
         open_interest = raw.get("open_interest", 0) or 0
 
-        # Change calculation
-        previous_price = raw.get("previous_yes_ask", 0)
-        current_price = raw.get("yes_ask", 0)
+        # Upstream 24h change in percentage points (last trade vs. price a day ago);
+        # replaced by our own history-derived change once enough samples are retained
+        previous_price = raw.get("previous_price", 0)
+        last_price = raw.get("last_price", 0)
         change_24h = 0
-        if previous_price and current_price:
-            change_24h = ((current_price - previous_price) / previous_price * 100) if previous_price else 0
+        if previous_price and last_price:
+            change_24h = float(last_price - previous_price)
 
         # Parse end date
         end_date = None
@@ -161,6 +175,28 @@ class KalshiService:
             "resolution_source": raw.get("result_source"),
         }
 
+    def history_to_columns(self, history: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+        """Convert raw Kalshi history entries into chart columns (oldest first)."""
+        entries = sorted(
+            (h for h in history if h.get("ts") is not None),
+            key=lambda h: h["ts"],
+        )
+        return {
+            "timestamp": [float(h["ts"]) for h in entries],
+            "probability": [(h.get("yes_price") or 0) / 100 for h in entries],
+            "open_interest": [float(h.get("open_interest") or 0) for h in entries],
+            "volume": [float(h.get("volume") or 0) for h in entries],
+        }
+
+    def columns_to_history(self, columns: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+        """Convert chart columns (e.g. from the snapshot archive) back into history entries."""
+        return [
+            {"ts": int(ts), "yes_price": round(probability * 100), "open_interest": open_interest, "volume": volume}
+            for ts, probability, open_interest, volume in zip(
+                columns["timestamp"], columns["probability"], columns["open_interest"], columns["volume"]
+            )
+        ]
+
     async def fetch_and_parse_markets(
         self,
         limit: int = 100,
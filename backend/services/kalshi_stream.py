@@ -0,0 +1,331 @@
+"""Live Kalshi prices from the trade API WebSocket.
+
+The ingestion leader keeps one connection to ``KALSHI_WS_URL`` subscribed to
+the ``ticker`` and ``orderbook_delta`` channels for every Kalshi market in the
+latest ingestion cycle, and adds or removes tickers on the open subscription
+as the tracked set changes; markets tracked before a channel's ``subscribed``
+reply are added once its sid is known. ``orderbook_snapshot`` replaces a
+market's book, ``orderbook_delta`` adjusts one price level and ``ticker``
+carries the last trade and top of book. Quotes are published through the
+shared ``QuoteStream`` plumbing (see ``services.market_stream``).
+
+Kalshi books hold bids only, in cents, on both sides: the YES ask is
+``100 - best NO bid`` and the NO ask ``100 - best YES bid``. A market's price
+follows ``KalshiService.parse_market``: the YES ask, else the last trade.
+
+Orderbook messages carry a per-subscription ``seq``. A skipped number means
+a delta was lost and every book of that subscription may be wrong, so they
+are all re-fetched with ``KalshiService.get_market_orderbook``. Until its
+fetched book lands a market keeps applying deltas to the old one, so its
+quote stays live, and the fetched book then replaces it wholesale: it was
+served after every delta received before it. REST books carry no ``seq``,
+so a delta sent after the exchange served the book but received before the
+response is lost until the next snapshot; the window is one round trip. If
+a resync request fails the connection is dropped so the reconnect's fresh
+snapshots rebuild the books.
+
+The connection is authenticated with ``KALSHI_API_KEY_ID`` and an RSA-PSS
+signature from the key at ``KALSHI_PRIVATE_KEY_PATH``; signing needs the
+``cryptography`` package, imported only when a key is configured.
+"""
+import asyncio
+import base64
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+import websockets
+
+from services.kalshi_service import get_kalshi_service
+from services.market_stream import QuoteStream
+from utils.metrics import metrics
+
+KALSHI_WS_URL = os.getenv("KALSHI_WS_URL", "wss://api.elections.kalshi.com/trade-api/ws/v2")
+KALSHI_API_KEY_ID = os.getenv("KALSHI_API_KEY_ID", "")
+KALSHI_PRIVATE_KEY_PATH = os.getenv("KALSHI_PRIVATE_KEY_PATH", "")
+# The WebSocket requires an API key, so streaming defaults on only when one is set
+KALSHI_STREAM_ENABLED = os.getenv("KALSHI_STREAM_ENABLED", "true" if KALSHI_API_KEY_ID else "false").strip().lower() == "true"
+KALSHI_STREAM_FLUSH_SECONDS = float(os.getenv("KALSHI_STREAM_FLUSH_SECONDS", "0.5"))
+KALSHI_STREAM_MAX_MARKETS = int(os.getenv("KALSHI_STREAM_MAX_MARKETS", "500"))
+CHANNELS = ("ticker", "orderbook_delta")
+RESYNC_CONCURRENCY = 5
+
+
+def auth_headers(url: str, key_id: str = KALSHI_API_KEY_ID, key_path: str = KALSHI_PRIVATE_KEY_PATH) -> Dict[str, str]:
+    """Signed Kalshi API headers for the WebSocket handshake; empty without a key."""
+    if not key_id:
+        return {}
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    with open(key_path, "rb") as f:
+        key = serialization.load_pem_private_key(f.read(), password=None)
+    timestamp = str(int(time.time() * 1000))
+    signature = key.sign(
+        f"{timestamp}GET{urlparse(url).path}".encode(),
+        padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.DIGEST_LENGTH),
+        hashes.SHA256(),
+    )
+    return {
+        "KALSHI-ACCESS-KEY": key_id,
+        "KALSHI-ACCESS-SIGNATURE": base64.b64encode(signature).decode(),
+        "KALSHI-ACCESS-TIMESTAMP": timestamp,
+    }
+
+
+class KalshiBook:
+    """Resting bids for one market: cents -> contracts on the YES and NO sides."""
+
+    def __init__(self, yes: Optional[Iterable] = None, no: Optional[Iterable] = None):
+        self.yes: Dict[int, int] = {int(p): int(q) for p, q in yes or () if q > 0}
+        self.no: Dict[int, int] = {int(p): int(q) for p, q in no or () if q > 0}
+
+    def apply_delta(self, side: str, price: int, delta: int) -> None:
+        levels = self.yes if side == "yes" else self.no
+        size = levels.get(price, 0) + delta
+        if size > 0:
+            levels[price] = size
+        else:
+            levels.pop(price, None)
+
+    @property
+    def yes_ask(self) -> Optional[int]:
+        return 100 - max(self.no) if self.no else None
+
+    @property
+    def no_ask(self) -> Optional[int]:
+        return 100 - max(self.yes) if self.yes else None
+
+
+class KalshiStream(QuoteStream):
+    """Ticker and orderbook channel client with sequence-gap resync."""
+
+    name = "kalshi_stream"
+
+    def __init__(
+        self,
+        url: str = KALSHI_WS_URL,
+        flush_interval: float = KALSHI_STREAM_FLUSH_SECONDS,
+        reconnect_delay: float = 1.0,
+        kalshi=None,
+    ):
+        super().__init__(url, flush_interval, reconnect_delay)
+        # Defaults to the shared KalshiService on first resync
+        self.kalshi = kalshi
+        self.tickers: List[str] = []
+        self.tracked: Set[str] = set()
+        self.books: Dict[str, KalshiBook] = {}
+        # ticker -> latest ticker channel message
+        self.ticks: Dict[str, Dict[str, Any]] = {}
+        # channel -> sid, and sid -> last seq seen
+        self.sids: Dict[str, int] = {}
+        self.seqs: Dict[int, int] = {}
+        # channel -> tickers requested on this connection
+        self.subscribed: Dict[str, Set[str]] = {}
+        # Channels whose sid just arrived and may lag the tracked set
+        self._catch_up: List[str] = []
+        # Tickers whose book is being re-fetched over REST
+        self.resyncing: Set[str] = set()
+        self._resync_task: Optional[asyncio.Task] = None
+        self._ws = None
+        self._next_id = 0
+
+    @staticmethod
+    def market_id(ticker: str) -> str:
+        return f"kalshi_{ticker}"
+
+    async def track(self, markets: Iterable[Dict[str, Any]]) -> None:
+        """Follow every Kalshi market, adjusting the subscription live."""
+        wanted: List[str] = []
+        for m in markets:
+            if m.get("platform") == "kalshi" and len(wanted) < KALSHI_STREAM_MAX_MARKETS:
+                wanted.append(m["id"][len("kalshi_"):])
+
+        tracked = set(wanted)
+        removed = [t for t in self.tickers if t not in tracked]
+        self.tickers, self.tracked = wanted, tracked
+        for ticker in removed:
+            self.forget(ticker)
+        if wanted:
+            self._has_markets.set()
+        else:
+            self._has_markets.clear()
+
+        if self._ws is not None and self.connected:
+            try:
+                # Channels still awaiting their sid catch up when it arrives
+                await self.sync_subscriptions(list(self.sids))
+            except websockets.ConnectionClosed:
+                pass
+
+    async def sync_subscriptions(self, channels: List[str]) -> None:
+        """Add and delete markets on each channel until it matches the tracked set."""
+        for action in ("add_markets", "delete_markets"):
+            for channel in channels:
+                subscribed = self.subscribed.setdefault(channel, set())
+                if action == "add_markets":
+                    tickers = [t for t in self.tickers if t not in subscribed]
+                    subscribed.update(tickers)
+                else:
+                    tickers = sorted(subscribed - self.tracked)
+                    subscribed.difference_update(tickers)
+                if tickers:
+                    await self.command("update_subscription", {
+                        "sids": [self.sids[channel]], "market_tickers": tickers, "action": action,
+                    })
+
+    def forget(self, ticker: str) -> None:
+        self.books.pop(ticker, None)
+        self.ticks.pop(ticker, None)
+        self.resyncing.discard(ticker)
+        self.quotes.pop(self.market_id(ticker), None)
+        self.dirty.pop(self.market_id(ticker), None)
+
+    async def command(self, cmd: str, params: Dict[str, Any]) -> None:
+        self._next_id += 1
+        await self._ws.send(json.dumps({"id": self._next_id, "cmd": cmd, "params": params}))
+
+    def handle_message(self, text: str) -> None:
+        message = json.loads(text)
+        kind = message.get("type")
+        msg = message.get("msg") or {}
+        if kind == "subscribed":
+            self.sids[msg["channel"]] = msg["sid"]
+            self._catch_up.append(msg["channel"])
+            return
+        if kind == "error":
+            print(f"Kalshi stream error {msg.get('code')}: {msg.get('msg')}")
+            return
+        if kind not in ("orderbook_snapshot", "orderbook_delta", "ticker"):
+            return
+
+        if "seq" in message:
+            self.check_seq(message["sid"], message["seq"])
+        ticker = msg.get("market_ticker")
+        if ticker not in self.tracked:
+            return
+
+        if kind == "orderbook_snapshot":
+            self.books[ticker] = KalshiBook(msg.get("yes"), msg.get("no"))
+            # A fresh snapshot supersedes any in-flight REST fetch
+            self.resyncing.discard(ticker)
+        elif kind == "orderbook_delta":
+            self.books.setdefault(ticker, KalshiBook()).apply_delta(msg["side"], int(msg["price"]), int(msg["delta"]))
+        else:
+            self.ticks[ticker] = msg
+
+        self.event_received()
+        self.requote(ticker)
+
+    def check_seq(self, sid: int, seq: int) -> None:
+        last = self.seqs.get(sid)
+        self.seqs[sid] = seq
+        if last is not None and seq != last + 1:
+            metrics.counter("kalshi_stream.gaps").inc()
+            self.start_resync()
+
+    def start_resync(self) -> None:
+        """Re-fetch every tracked book in the background."""
+        self.resyncing.update(self.tickers)
+        if self._resync_task is None or self._resync_task.done():
+            self._resync_task = asyncio.create_task(self.resync())
+
+    async def resync(self) -> None:
+        kalshi = self.kalshi or get_kalshi_service()
+        semaphore = asyncio.Semaphore(RESYNC_CONCURRENCY)
+
+        async def fetch(ticker: str) -> bool:
+            async with semaphore:
+                result = await kalshi.get_market_orderbook(ticker)
+            if result is None:
+                return False
+            if ticker not in self.resyncing:
+                # Untracked, or a snapshot arrived first
+                return True
+            self.resyncing.discard(ticker)
+            orderbook = result.get("orderbook") or {}
+            self.books[ticker] = KalshiBook(orderbook.get("yes"), orderbook.get("no"))
+            self.requote(ticker)
+            return True
+
+        # A gap while this runs re-marks tickers, so repeat until none are left
+        while self.resyncing:
+            with metrics.histogram("kalshi_stream.resync").time():
+                results = await asyncio.gather(*(fetch(t) for t in list(self.resyncing)))
+            metrics.counter("kalshi_stream.resyncs").inc()
+            if not all(results):
+                print("Error resyncing Kalshi books; reconnecting for fresh snapshots")
+                if self._ws is not None:
+                    await self._ws.close()
+                return
+
+    def requote(self, ticker: str) -> None:
+        self.set_quote(self.market_id(ticker), self.quote(ticker))
+
+    def quote(self, ticker: str) -> Optional[Dict[str, float]]:
+        book = self.books.get(ticker)
+        tick = self.ticks.get(ticker, {})
+        yes_ask = (book.yes_ask if book else None) or tick.get("yes_ask")
+        if yes_ask:
+            no_ask = book.no_ask if book else None
+            yes_price = yes_ask / 100
+            no_price = no_ask / 100 if no_ask else round(1 - yes_price, 4)
+        elif tick.get("price"):
+            yes_price = tick["price"] / 100
+            no_price = round(1 - yes_price, 4)
+        else:
+            return None
+        return {"probability": yes_price, "price_yes": yes_price, "price_no": no_price}
+
+    async def connect_once(self) -> None:
+        headers = auth_headers(self.url)
+        async with websockets.connect(self.url, extra_headers=headers, max_size=None) as ws:
+            self._ws = ws
+            self.connected = True
+            self.subscribed = {channel: set(self.tickers) for channel in CHANNELS}
+            await self.command("subscribe", {"channels": list(CHANNELS), "market_tickers": list(self.tickers)})
+            async for message in ws:
+                try:
+                    self.handle_message(message)
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"Error handling Kalshi stream message: {e}")
+                if self._catch_up:
+                    # Markets tracked between the subscribe and its reply
+                    channels, self._catch_up = self._catch_up, []
+                    await self.sync_subscriptions(channels)
+
+    def reset(self) -> None:
+        super().reset()
+        if self._resync_task is not None:
+            self._resync_task.cancel()
+            self._resync_task = None
+        self._ws = None
+        self.books.clear()
+        self.ticks.clear()
+        self.sids.clear()
+        self.seqs.clear()
+        self.subscribed.clear()
+        self._catch_up.clear()
+        self.resyncing.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "markets": len(self.tickers),
+            "books": len(self.books),
+            "resyncing": len(self.resyncing),
+        }
+
+
+# Singleton instance
+_kalshi_stream: Optional[KalshiStream] = None
+
+
+def get_kalshi_stream() -> KalshiStream:
+    global _kalshi_stream
+    if _kalshi_stream is None:
+        _kalshi_stream = KalshiStream()
+        metrics.gauge("kalshi_stream", _kalshi_stream.stats)
+    return _kalshi_stream
@@ -0,0 +1,78 @@
+"""Per-market change tracking for the WebSocket market_update stream.
+
+Each ingestion cycle is diffed against the last values seen for every
+market; only fields that changed are emitted, tagged with a per-market
+sequence number that increases by one per update. Clients apply deltas on
+top of the ``market_snapshot`` they receive when subscribing and ask for a
+new snapshot (``resync``) whenever a sequence number is not the previous
+one plus one, which covers conflated or dropped frames and server restarts.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.metrics import metrics
+
+# Fields streamed to subscribers; everything else changes too rarely to matter
+DELTA_FIELDS = (
+    "probability",
+    "price_yes",
+    "price_no",
+    "open_interest",
+    "volume_24h",
+    "change_1h",
+    "change_24h",
+    "status",
+)
+
+# (market_id, seq, changed fields)
+MarketDelta = Tuple[str, int, Dict[str, Any]]
+
+
+class MarketDeltaTracker:
+    """Last streamed values and sequence number per market."""
+
+    def __init__(self, fields: Sequence[str] = DELTA_FIELDS):
+        self.fields = tuple(fields)
+        self.values: Dict[str, Dict[str, Any]] = {}
+        self.seqs: Dict[str, int] = {}
+
+    def diff(self, markets: Sequence[Dict[str, Any]]) -> List[MarketDelta]:
+        """Record a snapshot and return the changed fields of each market that moved."""
+        deltas = []
+        for m in markets:
+            market_id = m["id"]
+            previous = self.values.get(market_id)
+            current = {field: m.get(field) for field in self.fields}
+            if previous is None:
+                changes = current
+            else:
+                changes = {k: v for k, v in current.items() if previous.get(k) != v}
+                if not changes:
+                    continue
+            self.values[market_id] = current
+            seq = self.seqs[market_id] = self.seqs.get(market_id, 0) + 1
+            deltas.append((market_id, seq, changes))
+
+        metrics.counter("market_deltas.changed").inc(len(deltas))
+        return deltas
+
+    def snapshot(self, market_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """(seq, full field values) to send before the deltas that follow seq."""
+        values = self.values.get(market_id)
+        if values is None:
+            return None
+        return self.seqs[market_id], dict(values)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"markets": len(self.values)}
+
+
+# Singleton instance
+_market_delta_tracker: Optional[MarketDeltaTracker] = None
+
+
+def get_market_delta_tracker() -> MarketDeltaTracker:
+    global _market_delta_tracker
+    if _market_delta_tracker is None:
+        _market_delta_tracker = MarketDeltaTracker()
+        metrics.gauge("market_deltas", _market_delta_tracker.stats)
+    return _market_delta_tracker
@@ -0,0 +1,212 @@
+"""Latest market snapshot with derived leaderboards and global stats.
+
+The ingestion loop refreshes the snapshot every cycle and checkpoints it to
+``SNAPSHOT_CHECKPOINT_PATH``. On boot the checkpoint is memory-mapped back in
+and marked stale, so leaderboards, stats and market lookups are answered
+immediately instead of every worker hitting upstream at once; the first
+live refresh clears the flag.
+
+Checkpoint layout (little-endian)::
+
+    magic "OSNP" | version u16 | n_sections u16
+    per section: name_len u16 | name utf-8 | length u32 | msgpack payload
+"""
+import mmap
+import os
+import struct
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import msgpack
+
+from utils.metrics import metrics
+
+SNAPSHOT_CHECKPOINT_PATH = os.getenv("SNAPSHOT_CHECKPOINT_PATH")
+SNAPSHOT_CHECKPOINT_EVERY_CYCLES = int(os.getenv("SNAPSHOT_CHECKPOINT_EVERY_CYCLES", "5"))
+LEADERBOARD_SIZE = 50
+
+FILE_MAGIC = b"OSNP"
+FILE_VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_DATETIME_EXT = 1
+
+# Leaderboard name -> sort key (descending)
+LEADERBOARDS: Dict[str, Callable[[Dict[str, Any]], float]] = {
+    "trending": lambda m: abs(m.get("change_24h") or 0),
+    "top_oi": lambda m: m.get("open_interest") or 0,
+    "top_volume": lambda m: m.get("volume_24h") or 0,
+}
+
+
+def rank_markets(markets: List[Dict[str, Any]], leaderboard: str, limit: int) -> List[Dict[str, Any]]:
+    return sorted(markets, key=LEADERBOARDS[leaderboard], reverse=True)[:limit]
+
+
+def summarize_markets(markets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Global statistics across all platforms (shape of GlobalStats)."""
+    return {
+        "total_markets": len(markets),
+        "total_open_interest": sum(m.get("open_interest", 0) for m in markets),
+        "total_volume_24h": sum(m.get("volume_24h", 0) for m in markets),
+        "active_markets": len([m for m in markets if m["status"] == "open"]),
+        "polymarket_count": len([m for m in markets if m["platform"] == "polymarket"]),
+        "kalshi_count": len([m for m in markets if m["platform"] == "kalshi"]),
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_DATETIME_EXT, value.isoformat().encode("utf-8"))
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _decode_ext(code: int, data: bytes) -> Any:
+    if code == _DATETIME_EXT:
+        return datetime.fromisoformat(data.decode("utf-8"))
+    return msgpack.ExtType(code, data)
+
+
+def packb(value: Any) -> bytes:
+    """msgpack with datetimes preserved; shared by checkpoints and the backplane."""
+    return msgpack.packb(value, default=_encode_default, use_bin_type=True)
+
+
+def unpackb(data: Any) -> Any:
+    return msgpack.unpackb(data, ext_hook=_decode_ext, raw=False)
+
+
+class MarketSnapshot:
+    """Most recent full set of markets, leaderboards and stats."""
+
+    def __init__(self):
+        self.markets: List[Dict[str, Any]] = []
+        self.leaderboards: Dict[str, List[Dict[str, Any]]] = {}
+        self.global_stats: Optional[Dict[str, Any]] = None
+        self.updated_at: Optional[datetime] = None
+        self.stale = False
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, markets: List[Dict[str, Any]], timestamp: datetime) -> None:
+        """Replace the snapshot with a live refresh."""
+        self.markets = markets
+        self.leaderboards = {
+            name: rank_markets(markets, name, LEADERBOARD_SIZE) for name in LEADERBOARDS
+        }
+        self.global_stats = summarize_markets(markets)
+        self.updated_at = timestamp
+        self.stale = False
+        self._by_id = {m["id"]: m for m in markets}
+
+    def apply_quotes(self, quotes: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Update price fields of known markets in place between refreshes.
+
+        Leaderboards and stats do not depend on prices, so they stay valid.
+        Returns the markets that were updated.
+        """
+        updated = []
+        for market_id, fields in quotes.items():
+            market = self._by_id.get(market_id)
+            if market is not None:
+                market.update(fields)
+                updated.append(market)
+        return updated
+
+    @property
+    def warm(self) -> bool:
+        """True while serving a restored checkpoint that has not been refreshed yet."""
+        return self.stale and bool(self.markets)
+
+    def leaderboard(self, name: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        board = self.leaderboards.get(name)
+        return board[:limit] if board is not None else None
+
+    def get(self, market_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(market_id)
+
+    def sections(self) -> Dict[str, Any]:
+        """Checkpoint sections copied from the current state.
+
+        Market dicts are copied too, since ``apply_quotes`` edits them in
+        place, so the result can be written off the loop while cycles continue.
+        """
+        return {
+            "meta": {"updated_at": self.updated_at},
+            "markets": [dict(m) for m in self.markets],
+            "leaderboards": {name: [m["id"] for m in board] for name, board in self.leaderboards.items()},
+            "stats": dict(self.global_stats) if self.global_stats is not None else None,
+        }
+
+    def save(self, path: str) -> None:
+        """Atomically write the snapshot as a checkpoint file."""
+        self.write(path, self.sections())
+
+    @staticmethod
+    def write(path: str, sections: Dict[str, Any]) -> None:
+        """Write checkpoint ``sections`` to ``path``; off the loop, pass ``sections()``."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(FILE_MAGIC, FILE_VERSION, len(sections)))
+            for name, value in sections.items():
+                encoded_name = name.encode("utf-8")
+                payload = packb(value)
+                f.write(_U16.pack(len(encoded_name)))
+                f.write(encoded_name)
+                f.write(_U32.pack(len(payload)))
+                f.write(payload)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        """Restore a checkpoint via mmap; the result stays stale until ``update``."""
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                magic, version, n_sections = _HEADER.unpack_from(view, 0)
+                if magic != FILE_MAGIC or version != FILE_VERSION:
+                    raise ValueError(f"{path} is not a snapshot checkpoint")
+                offset = _HEADER.size
+
+                sections = {}
+                for _ in range(n_sections):
+                    (name_len,) = _U16.unpack_from(view, offset)
+                    offset += _U16.size
+                    name = bytes(view[offset:offset + name_len]).decode("utf-8")
+                    offset += name_len
+                    (length,) = _U32.unpack_from(view, offset)
+                    offset += _U32.size
+                    sections[name] = unpackb(view[offset:offset + length])
+                    offset += length
+            finally:
+                view.release()
+
+        self.markets = sections["markets"]
+        self._by_id = {m["id"]: m for m in self.markets}
+        self.leaderboards = {
+            name: [self._by_id[i] for i in ids if i in self._by_id]
+            for name, ids in sections["leaderboards"].items()
+        }
+        self.global_stats = sections["stats"]
+        self.updated_at = sections["meta"]["updated_at"]
+        self.stale = True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "markets": len(self.markets),
+            "stale": self.stale,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+# Singleton instance
+_market_snapshot: Optional[MarketSnapshot] = None
+
+
+def get_market_snapshot() -> MarketSnapshot:
+    global _market_snapshot
+    if _market_snapshot is None:
+        _market_snapshot = MarketSnapshot()
+        metrics.gauge("market_snapshot", _market_snapshot.status)
+    return _market_snapshot
@@ -0,0 +1,150 @@
+"""Shared plumbing for upstream market data WebSocket feeds.
+
+A ``QuoteStream`` holds one reconnecting connection to a platform feed and
+keeps the latest price fields per market. Markets whose quote moved are
+published on the backplane every ``flush_interval`` seconds as a ``quotes``
+envelope::
+
+    {"kind": "quotes", "origin": ..., "quotes": {market_id: fields},
+     "received_at": {market_id: epoch seconds of the first unflushed event}}
+
+Each worker applies the envelope to its snapshot and streams the resulting
+market_update deltas; ``received_at`` lets it measure feed-to-client
+latency. Ingestion cycles ``overlay`` live quotes onto the polled markets so
+a poll never rolls a price back. On disconnect every quote is dropped,
+prices fall back to polling, and the stream reconnects with exponential
+backoff; subclasses resubscribe in ``connect_once``.
+"""
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.backplane import WORKER_ID, get_backplane
+from utils.metrics import metrics
+
+MAX_BACKOFF_SECONDS = 30
+
+
+class QuoteStream:
+    """Base class: quote bookkeeping, backplane flushes and the reconnect loop.
+
+    Subclasses implement ``connect_once`` (connect, subscribe and read until
+    the connection ends) and extend ``reset`` to drop their own state.
+    """
+
+    name = "stream"
+
+    def __init__(self, url: str, flush_interval: float, reconnect_delay: float = 1.0):
+        self.url = url
+        self.flush_interval = flush_interval
+        self.reconnect_delay = reconnect_delay
+        self.backplane = get_backplane()
+        # market_id -> probability/price_yes/price_no
+        self.quotes: Dict[str, Dict[str, float]] = {}
+        # market_id -> when the first event since the last flush arrived
+        self.dirty: Dict[str, float] = {}
+        self.connected = False
+        self.last_event_at: Optional[float] = None
+        self._has_markets = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def set_quote(self, market_id: str, fields: Optional[Dict[str, float]]) -> None:
+        if fields is not None and fields != self.quotes.get(market_id):
+            self.quotes[market_id] = fields
+            self.dirty.setdefault(market_id, self.last_event_at or time.time())
+
+    def event_received(self) -> None:
+        metrics.counter(f"{self.name}.events").inc()
+        self.last_event_at = time.time()
+
+    def overlay(self, markets: Iterable[Dict[str, Any]]) -> None:
+        """Replace polled prices with live quotes where the stream has one."""
+        if not self.connected:
+            return
+        for m in markets:
+            fields = self.quotes.get(m["id"])
+            if fields is not None:
+                m.update(fields)
+
+    def take_quotes(self) -> Dict[str, Dict[str, float]]:
+        """Price fields of every market whose quote moved since the last call."""
+        quotes = {market_id: self.quotes[market_id] for market_id in self.dirty if market_id in self.quotes}
+        self.dirty.clear()
+        return quotes
+
+    async def flush(self) -> None:
+        received_at = dict(self.dirty)
+        quotes = self.take_quotes()
+        if quotes:
+            await self.backplane.publish({
+                "kind": "quotes",
+                "origin": WORKER_ID,
+                "quotes": quotes,
+                "received_at": {market_id: received_at[market_id] for market_id in quotes},
+            })
+            metrics.counter(f"{self.name}.quotes").inc(len(quotes))
+
+    async def connect_once(self) -> None:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget connection-scoped state after a disconnect."""
+        self.connected = False
+        self.quotes.clear()
+        self.dirty.clear()
+
+    async def run(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            started = time.monotonic()
+            try:
+                await self._has_markets.wait()
+                await self.connect_once()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error in {self.name}: {e}")
+            finally:
+                self.reset()
+
+            metrics.counter(f"{self.name}.reconnects").inc()
+            if time.monotonic() - started > MAX_BACKOFF_SECONDS:
+                # A connection that stayed up for a while starts the backoff over
+                delay = self.reconnect_delay
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+
+    async def run_flusher(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Error publishing {self.name} quotes: {e}")
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self.run()), asyncio.create_task(self.run_flusher())]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "quotes": len(self.quotes),
+            "last_event_age_s": round(time.time() - self.last_event_at, 1) if self.last_event_at else None,
+        }
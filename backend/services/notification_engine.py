@@ -0,0 +1,299 @@
+"""Evaluates every active notification rule against each ingestion snapshot.
+
+Rules live in parallel numpy arrays (one slot per rule) that reference a
+per-market slot, so a cycle is a handful of array operations regardless of
+how many rules exist. Rule types and their ``threshold``:
+
+- ``oi_spike``: open interest rose at least ``threshold`` percent since the
+  previous cycle.
+- ``volume_spike``: 24h volume rose at least ``threshold`` percent since the
+  previous cycle.
+- ``probability_change``: the 24h probability change is at least
+  ``threshold`` percentage points in either direction.
+- ``price_alert``: probability crossed ``threshold`` (0-1, or 0-100 as a
+  percentage) in either direction since the previous cycle.
+
+A rule fires when its condition becomes true (not while it stays true) and
+at most once per cooldown; duplicate rules for the same user, market and
+type produce a single alert per cycle.
+
+A market missing from a snapshot keeps its last observed values and its
+rules keep their holding state, so a market that skips a cycle is compared
+against where it was rather than firing again on its return. State older
+than ``RULE_WINDOW_SECONDS`` is forgotten, and the market index only keeps
+markets that live rules point at.
+"""
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.rollups import to_epoch
+from utils.metrics import metrics
+
+NOTIFICATION_COOLDOWN_SECONDS = float(os.getenv("NOTIFICATION_COOLDOWN_SECONDS", "3600"))
+# Longest lookback of any rule (probability_change reads the 24h change)
+RULE_WINDOW_SECONDS = 86400
+
+NOTIFICATION_TYPES = ("oi_spike", "volume_spike", "probability_change", "price_alert")
+_TYPE_CODES = {name: code for code, name in enumerate(NOTIFICATION_TYPES)}
+_PRICE_ALERT = _TYPE_CODES["price_alert"]
+
+# (id, user_id, market_id, type, threshold)
+RuleRow = Tuple[str, str, str, str, float]
+
+
+def _normalize_threshold(notification_type: str, threshold: float) -> float:
+    if notification_type == "price_alert" and threshold > 1:
+        return threshold / 100
+    return threshold
+
+
+def _percent_increase(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous > 0, (current - previous) / previous * 100, np.nan)
+
+
+class NotificationEngine:
+    """Columnar index of active notification rules keyed by market slot."""
+
+    _COLUMNS = {
+        "rule_ids": object,
+        "user_ids": object,
+        "market_slots": np.int32,
+        "types": np.int8,
+        "thresholds": np.float64,
+        "enabled": bool,
+        "holding": bool,
+        "last_fired": np.float64,
+    }
+
+    def __init__(
+        self,
+        cooldown: float = NOTIFICATION_COOLDOWN_SECONDS,
+        capacity: int = 1024,
+        market_window: float = RULE_WINDOW_SECONDS,
+    ):
+        self.cooldown = cooldown
+        self.market_window = market_window
+        self.size = 0
+        self.tombstones = 0
+        self.positions: Dict[str, int] = {}
+        self.market_index: Dict[str, int] = {}
+        # Last observed values per market slot, plus "seen_at" (epoch, NaN if never)
+        self.previous: Optional[Dict[str, np.ndarray]] = None
+        self.last_eval_seconds = 0.0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        for name, dtype in self._COLUMNS.items():
+            column = np.zeros(capacity, dtype=dtype)
+            if name == "last_fired":
+                column.fill(-np.inf)
+            old = getattr(self, name, None)
+            if old is not None:
+                column[:self.size] = old[:self.size]
+            setattr(self, name, column)
+
+    def _market_slot(self, market_id: str) -> int:
+        slot = self.market_index.get(market_id)
+        if slot is None:
+            slot = self.market_index[market_id] = len(self.market_index)
+        return slot
+
+    def add(self, rule_id: str, user_id: str, market_id: str, notification_type: str, threshold: float) -> None:
+        """Insert or replace one rule."""
+        position = self.positions.get(rule_id)
+        if position is None:
+            if self.size == len(self.rule_ids):
+                self._allocate(2 * len(self.rule_ids))
+            position = self.positions[rule_id] = self.size
+            self.size += 1
+
+        self.rule_ids[position] = rule_id
+        self.user_ids[position] = user_id
+        self.market_slots[position] = self._market_slot(market_id)
+        self.types[position] = _TYPE_CODES[notification_type]
+        self.thresholds[position] = _normalize_threshold(notification_type, threshold)
+        self.enabled[position] = True
+        self.holding[position] = False
+        self.last_fired[position] = -np.inf
+
+    def remove(self, rule_id: str) -> None:
+        position = self.positions.pop(rule_id, None)
+        if position is None:
+            return
+        self.enabled[position] = False
+        self.rule_ids[position] = None
+        self.user_ids[position] = None
+        self.tombstones += 1
+        if self.tombstones > max(1024, self.size // 2):
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop removed slots so evaluation only scans live rules."""
+        keep = np.flatnonzero(self.enabled[:self.size])
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+        self.size = len(keep)
+        self.tombstones = 0
+        self.positions = {rule_id: i for i, rule_id in enumerate(self.rule_ids[:self.size])}
+        self._reindex_markets()
+
+    def _reindex_markets(self) -> None:
+        """Keep only markets that live rules point at, carrying their last values."""
+        old_ids = list(self.market_index)
+        live = np.flatnonzero(self.enabled[:self.size])
+        used, self.market_slots[live] = np.unique(self.market_slots[live], return_inverse=True)
+        self.market_index = {old_ids[slot]: i for i, slot in enumerate(used.tolist())}
+
+        if self.previous is not None:
+            # Slots added since the last evaluation have no values yet
+            known = used < len(self.previous["seen_at"])
+            carried = {}
+            for key, column in self.previous.items():
+                carried[key] = np.full(len(used), np.nan)
+                carried[key][known] = column[used[known]]
+            self.previous = carried
+
+    def load(self, rows: Iterable[RuleRow]) -> None:
+        """Replace every rule, keeping cooldown state for rules that survive."""
+        rows = list(rows)
+        old_positions, old_holding, old_fired = self.positions, self.holding, self.last_fired
+
+        self.size = 0
+        self.tombstones = 0
+        self.positions = {}
+        for name in self._COLUMNS:
+            delattr(self, name)
+        self._allocate(max(1024, len(rows)))
+
+        n = len(rows)
+        if n:
+            rule_ids, user_ids, market_ids, types, thresholds = zip(*rows)
+            self.rule_ids[:n] = rule_ids
+            self.user_ids[:n] = user_ids
+            self.market_slots[:n] = [self._market_slot(m) for m in market_ids]
+            self.types[:n] = [_TYPE_CODES[t] for t in types]
+            self.thresholds[:n] = [_normalize_threshold(t, v) for t, v in zip(types, thresholds)]
+            self.enabled[:n] = True
+            self.positions = {rule_id: i for i, rule_id in enumerate(rule_ids)}
+            self.size = n
+
+            carried = [(i, old_positions[r]) for i, r in enumerate(rule_ids) if r in old_positions]
+            if carried:
+                new, old = map(np.array, zip(*carried))
+                self.holding[new] = old_holding[old]
+                self.last_fired[new] = old_fired[old]
+        self._reindex_markets()
+
+    def _market_values(self, markets: Sequence[Dict[str, Any]], now: float) -> Dict[str, np.ndarray]:
+        n = len(self.market_index)
+        values = {key: np.full(n, np.nan) for key in ("probability", "open_interest", "volume_24h", "change_24h")}
+        seen_at = np.full(n, np.nan)
+        for m in markets:
+            slot = self.market_index.get(m["id"])
+            if slot is None:
+                continue
+            seen_at[slot] = now
+            for key, column in values.items():
+                value = m.get(key)
+                if value is not None:
+                    column[slot] = value
+        return {**values, "seen_at": seen_at}
+
+    def evaluate(self, markets: Sequence[Dict[str, Any]], timestamp: datetime) -> List[Dict[str, Any]]:
+        """Check every rule against this snapshot; returns the alerts that fired."""
+        start = time.perf_counter()
+        now = to_epoch(timestamp)
+        current = self._market_values(markets, now)
+        previous = self.previous
+        n_markets = len(self.market_index)
+        if previous is None or len(previous["probability"]) < n_markets:
+            padded = {key: np.full(n_markets, np.nan) for key in current}
+            if previous is not None:
+                for key, column in previous.items():
+                    padded[key][:len(column)] = column
+            previous = padded
+
+        present = ~np.isnan(current["seen_at"])
+        with np.errstate(invalid="ignore"):
+            expired = previous["seen_at"] < now - self.market_window
+        for column in previous.values():
+            column[expired] = np.nan
+
+        n = self.size
+        slots = self.market_slots[:n]
+        types = self.types[:n]
+        thresholds = self.thresholds[:n]
+
+        # One metric row per rule type, indexed by (type, market slot)
+        per_type = np.vstack([
+            _percent_increase(current["open_interest"], previous["open_interest"]),
+            _percent_increase(current["volume_24h"], previous["volume_24h"]),
+            np.abs(current["change_24h"]),
+            current["probability"],
+        ])
+        values = per_type[types, slots]
+
+        with np.errstate(invalid="ignore"):
+            before = previous["probability"][slots]
+            crossed = ((before < thresholds) & (values >= thresholds)) | (
+                (before > thresholds) & (values <= thresholds)
+            )
+            condition = np.where(types == _PRICE_ALERT, crossed, values >= thresholds)
+
+        holding = self.holding[:n]
+        last_fired = self.last_fired[:n]
+        fire = condition & ~holding & self.enabled[:n] & (now - last_fired >= self.cooldown)
+        # Absent markets never meet a condition; their rules hold state until it expires
+        carry = ~present & ~expired
+        holding[:] = condition | (holding & carry[slots]) if carry.any() else condition
+        fired = np.flatnonzero(fire)
+        last_fired[fired] = now
+        self.previous = {key: np.where(present, current[key], previous[key]) for key in current}
+
+        alerts = []
+        seen = set()
+        market_ids = list(self.market_index)
+        for i in fired.tolist():
+            key = (self.user_ids[i], int(slots[i]), int(types[i]))
+            if key in seen:
+                continue
+            seen.add(key)
+            alerts.append({
+                "notification_id": self.rule_ids[i],
+                "user_id": self.user_ids[i],
+                "market_id": market_ids[slots[i]],
+                "type": NOTIFICATION_TYPES[types[i]],
+                "threshold": float(thresholds[i]),
+                "value": float(values[i]),
+                "triggered_at": timestamp,
+            })
+
+        self.last_eval_seconds = time.perf_counter() - start
+        metrics.histogram("notifications.evaluate").observe(self.last_eval_seconds)
+        metrics.counter("notifications.triggered").inc(len(alerts))
+        return alerts
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rules": self.size - self.tombstones,
+            "markets": len(self.market_index),
+            "last_eval_seconds": self.last_eval_seconds,
+        }
+
+
+# Singleton instance
+_notification_engine: Optional[NotificationEngine] = None
+
+
+def get_notification_engine() -> NotificationEngine:
+    global _notification_engine
+    if _notification_engine is None:
+        _notification_engine = NotificationEngine()
+        metrics.gauge("notification_engine", _notification_engine.stats)
+    return _notification_engine
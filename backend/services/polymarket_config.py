@@ -1,9 +1,14 @@
+import os
 from typing import Any, Dict, Final, Set
 
 
-POLYMARKET_GAMMA_HOST: Final[str] = "https://gamma-api.polymarket.com"
-POLYMARKET_DATA_HOST: Final[str] = "https://data-api.polymarket.com"
-POLYMARKET_CLOB_HOST: Final[str] = "https://clob.polymarket.com"
+# Overridable to point at a local fake upstream (benchmarks, tests)
+POLYMARKET_GAMMA_HOST: Final[str] = os.getenv("POLYMARKET_GAMMA_HOST", "https://gamma-api.polymarket.com")
+POLYMARKET_DATA_HOST: Final[str] = os.getenv("POLYMARKET_DATA_HOST", "https://data-api.polymarket.com")
+POLYMARKET_CLOB_HOST: Final[str] = os.getenv("POLYMARKET_CLOB_HOST", "https://clob.polymarket.com")
+POLYMARKET_MARKET_WS_URL: Final[str] = os.getenv(
+    "POLYMARKET_MARKET_WS_URL", "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+)
 
 POLYMARKET_COLLATERAL_ASSET: Final[str] = "pUSD"
 POLYMARKET_REQUEST_TIMEOUT_SECONDS: Final[float] = 30.0
@@ -1,4 +1,5 @@
 import httpx
+import json
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import asyncio
@@ -64,6 +65,18 @@ class PolymarketService:
             print(f"Error fetching Polymarket market {market_id}: {e}")
             return None
 
+    async def get_markets_by_ids(self, market_ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Fetch several markets in one Gamma request (repeated ``id`` params); None on error."""
+        try:
+            params = [("id", market_id) for market_id in market_ids]
+            params.append(("limit", len(market_ids)))
+            response = await self.gamma_client.get("/markets", params=params)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            print(f"Error fetching Polymarket markets by id: {e}")
+            return None
+
     async def get_market_prices(self, token_id: str, side: str = "BUY") -> Optional[Dict[str, Any]]:
         """Get current prices from CLOB API."""
         try:
@@ -126,11 +139,11 @@ class PolymarketService:
         except (ValueError, TypeError):
             pass
 
-        # Calculate 24h change
+        # Upstream 24h price change in percentage points; replaced by our own
+        # history-derived change once enough samples are retained
         change_24h = 0
         try:
-            spread = float(raw.get("spread", 0) or 0)
-            change_24h = spread * 100 if spread else 0
+            change_24h = float(raw.get("oneDayPriceChange", 0) or 0) * 100
         except (ValueError, TypeError):
             pass
 
@@ -142,6 +155,15 @@ class PolymarketService:
             except (ValueError, TypeError):
                 pass
 
+        # CLOB token ids (YES first) for the streaming price feed; Gamma sends
+        # them as a JSON-encoded list
+        token_ids = raw.get("clobTokenIds") or []
+        if isinstance(token_ids, str):
+            try:
+                token_ids = json.loads(token_ids)
+            except ValueError:
+                token_ids = []
+
         return {
             "id": f"poly_{raw.get('id', '')}",
             "platform": Platform.POLYMARKET.value,
@@ -161,6 +183,7 @@ class PolymarketService:
             "image_url": raw.get("image"),
             "outcomes": outcomes,
             "resolution_source": raw.get("resolutionSource"),
+            "clob_token_ids": token_ids,
         }
 
     async def fetch_and_parse_markets(
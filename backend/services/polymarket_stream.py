@@ -0,0 +1,213 @@
+"""Live Polymarket prices from the CLOB market WebSocket channel.
+
+The ingestion leader keeps one connection to ``POLYMARKET_MARKET_WS_URL``
+subscribed to the YES token of every Polymarket market in the latest
+ingestion cycle. ``book`` events replace a token's order book,
+``price_change`` events update price levels and ``last_trade_price``
+events record the last fill. Every ``POLYMARKET_STREAM_FLUSH_SECONDS`` the
+markets whose quote moved are published on the backplane as a ``quotes``
+envelope; each worker applies them to its snapshot and streams the
+resulting market_update deltas, so prices no longer wait for the next poll.
+
+A market's quote is the book midpoint, or the last trade when one side is
+empty or the spread is wider than ``WIDE_SPREAD`` (Polymarket's own display
+rule). Ingestion cycles overlay live quotes onto the polled markets so a
+cycle never rolls a price back to Gamma's older value.
+
+On disconnect the books are dropped (quotes fall back to polling) and the
+stream reconnects with backoff and resubscribes; the ``book`` events sent
+after subscribing rebuild the state.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+import websockets
+
+from services.market_stream import QuoteStream
+from services.polymarket_config import POLYMARKET_MARKET_WS_URL
+from utils.metrics import metrics
+
+POLYMARKET_STREAM_ENABLED = os.getenv("POLYMARKET_STREAM_ENABLED", "false").strip().lower() == "true"
+POLYMARKET_STREAM_FLUSH_SECONDS = float(os.getenv("POLYMARKET_STREAM_FLUSH_SECONDS", "0.5"))
+POLYMARKET_STREAM_MAX_ASSETS = int(os.getenv("POLYMARKET_STREAM_MAX_ASSETS", "500"))
+PING_SECONDS = 10
+WIDE_SPREAD = 0.1
+
+
+class OrderBook:
+    """Price levels for one token: price -> size on each side."""
+
+    def __init__(self):
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+
+    def replace(self, bids: Iterable[Dict[str, Any]], asks: Iterable[Dict[str, Any]]) -> None:
+        self.bids = {float(level["price"]): float(level["size"]) for level in bids}
+        self.asks = {float(level["price"]): float(level["size"]) for level in asks}
+
+    def set_level(self, side: str, price: float, size: float) -> None:
+        levels = self.bids if side.upper() == "BUY" else self.asks
+        if size > 0:
+            levels[price] = size
+        else:
+            levels.pop(price, None)
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return max(self.bids) if self.bids else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return min(self.asks) if self.asks else None
+
+
+class PolymarketStream(QuoteStream):
+    """CLOB market channel client maintaining books and quotes for tracked markets."""
+
+    name = "polymarket_stream"
+
+    def __init__(
+        self,
+        url: str = POLYMARKET_MARKET_WS_URL,
+        flush_interval: float = POLYMARKET_STREAM_FLUSH_SECONDS,
+        reconnect_delay: float = 1.0,
+    ):
+        super().__init__(url, flush_interval, reconnect_delay)
+        # YES token id -> our market id
+        self.token_markets: Dict[str, str] = {}
+        self.books: Dict[str, OrderBook] = {}
+        self.last_trade: Dict[str, float] = {}
+        self._ws = None
+
+    async def track(self, markets: Iterable[Dict[str, Any]]) -> None:
+        """Follow the YES token of each Polymarket market, adjusting the subscription live."""
+        wanted: Dict[str, str] = {}
+        for m in markets:
+            tokens = m.get("clob_token_ids")
+            if m.get("platform") == "polymarket" and tokens and len(wanted) < POLYMARKET_STREAM_MAX_ASSETS:
+                wanted[str(tokens[0])] = m["id"]
+
+        added = [t for t in wanted if t not in self.token_markets]
+        removed = [t for t in self.token_markets if t not in wanted]
+        for token in removed:
+            self.forget(token)
+        self.token_markets = wanted
+        if wanted:
+            self._has_markets.set()
+        else:
+            self._has_markets.clear()
+
+        if self._ws is not None and self.connected:
+            try:
+                if added:
+                    await self._ws.send(json.dumps({"assets_ids": added, "operation": "subscribe"}))
+                if removed:
+                    await self._ws.send(json.dumps({"assets_ids": removed, "operation": "unsubscribe"}))
+            except websockets.ConnectionClosed:
+                pass
+
+    def forget(self, token: str) -> None:
+        self.books.pop(token, None)
+        self.last_trade.pop(token, None)
+        market_id = self.token_markets.get(token)
+        self.quotes.pop(market_id, None)
+        self.dirty.pop(market_id, None)
+
+    def handle_message(self, text: str) -> None:
+        if text == "PONG":
+            return
+        payload = json.loads(text)
+        for event in payload if isinstance(payload, list) else [payload]:
+            self.handle_event(event)
+
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        kind = event.get("event_type")
+        if kind == "book":
+            if event["asset_id"] not in self.token_markets:
+                return
+            book = self.books.setdefault(event["asset_id"], OrderBook())
+            book.replace(event.get("bids", event.get("buys", [])), event.get("asks", event.get("sells", [])))
+            touched = [event["asset_id"]]
+        elif kind == "price_change":
+            # Current format batches changes per market; older one per asset
+            changes = event.get("price_changes") or [
+                {**change, "asset_id": event["asset_id"]} for change in event.get("changes", [])
+            ]
+            touched = []
+            for change in changes:
+                # The feed also carries the NO token of each market
+                if change["asset_id"] not in self.token_markets:
+                    continue
+                book = self.books.setdefault(change["asset_id"], OrderBook())
+                book.set_level(change["side"], float(change["price"]), float(change["size"]))
+                touched.append(change["asset_id"])
+        elif kind == "last_trade_price":
+            if event["asset_id"] not in self.token_markets:
+                return
+            self.last_trade[event["asset_id"]] = float(event["price"])
+            touched = [event["asset_id"]]
+        else:
+            return
+
+        self.event_received()
+        for token in touched:
+            self.requote(token)
+
+    def requote(self, token: str) -> None:
+        quote = self.quote(token)
+        if quote is not None:
+            self.set_quote(self.token_markets[token], self.price_fields(quote))
+
+    def quote(self, token: str) -> Optional[float]:
+        book = self.books.get(token)
+        bid, ask = (book.best_bid, book.best_ask) if book else (None, None)
+        if bid is not None and ask is not None and ask - bid <= WIDE_SPREAD:
+            return round((bid + ask) / 2, 4)
+        return self.last_trade.get(token)
+
+    @staticmethod
+    def price_fields(quote: float) -> Dict[str, float]:
+        return {"probability": quote, "price_yes": quote, "price_no": round(1 - quote, 4)}
+
+    async def connect_once(self) -> None:
+        async with websockets.connect(self.url, ping_interval=None, max_size=None) as ws:
+            self._ws = ws
+            self.connected = True
+            await ws.send(json.dumps({"type": "market", "assets_ids": list(self.token_markets)}))
+            pinger = asyncio.create_task(self.ping(ws))
+            try:
+                async for message in ws:
+                    try:
+                        self.handle_message(message)
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(f"Error handling Polymarket stream message: {e}")
+            finally:
+                pinger.cancel()
+
+    async def ping(self, ws) -> None:
+        while True:
+            await asyncio.sleep(PING_SECONDS)
+            await ws.send("PING")
+
+    def reset(self) -> None:
+        super().reset()
+        self._ws = None
+        self.books.clear()
+        self.last_trade.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "assets": len(self.token_markets), "books": len(self.books)}
+
+
+# Singleton instance
+_polymarket_stream: Optional[PolymarketStream] = None
+
+
+def get_polymarket_stream() -> PolymarketStream:
+    global _polymarket_stream
+    if _polymarket_stream is None:
+        _polymarket_stream = PolymarketStream()
+        metrics.gauge("polymarket_stream", _polymarket_stream.stats)
+    return _polymarket_stream
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Final, Iterable, List, Tuple
+
+import numpy as np
+
+from database.models import ROLLUP_FIELDS
+
+# Bucket widths maintained for every market
+ROLLUP_RESOLUTIONS: Final[Dict[str, timedelta]] = {
+    "1m": timedelta(minutes=1),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
+# Timeframe -> (resolution, lookback window); keeps every chart in the hundreds of rows
+TIMEFRAME_RESOLUTIONS: Final[Dict[str, Tuple[str, timedelta]]] = {
+    "1h": ("1m", timedelta(hours=1)),
+    "24h": ("15m", timedelta(hours=24)),
+    "7d": ("1h", timedelta(days=7)),
+    "30d": ("1h", timedelta(days=30)),
+    "90d": ("1d", timedelta(days=90)),
+    "1y": ("1d", timedelta(days=365)),
+}
+
+# Each resolution is kept for the longest timeframe it serves, plus a day of slack
+ROLLUP_RETENTION: Final[Dict[str, timedelta]] = {
+    resolution: max(
+        (window for served, window in TIMEFRAME_RESOLUTIONS.values() if served == resolution),
+        default=timedelta(0),
+    ) + timedelta(days=1)
+    for resolution in ROLLUP_RESOLUTIONS
+}
+
+_EPOCH: Final[datetime] = datetime(1970, 1, 1)
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Seconds since the epoch for a naive UTC datetime."""
+    return (timestamp - _EPOCH).total_seconds()
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    """Align a timestamp to the start of its bucket for the given resolution."""
+    width = ROLLUP_RESOLUTIONS[resolution]
+    return timestamp - (timestamp - _EPOCH) % width
+
+
+def retention_cutoffs(now: datetime) -> Dict[str, datetime]:
+    """Oldest bucket start still kept, per resolution."""
+    return {resolution: now - retention for resolution, retention in ROLLUP_RETENTION.items()}
+
+
+def resolve_timeframe(timeframe: str, now: datetime) -> Tuple[str, datetime]:
+    """Return the rollup resolution and window start for a chart timeframe."""
+    if timeframe not in TIMEFRAME_RESOLUTIONS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    resolution, window = TIMEFRAME_RESOLUTIONS[timeframe]
+    return resolution, bucket_start(now - window, resolution)
+
+
+def build_rollup_rows(
+    markets: Iterable[Dict[str, Any]],
+    timestamp: datetime,
+) -> List[Dict[str, Any]]:
+    """Turn one ingestion sample per market into a bucket row per resolution.
+
+    Each row describes the sample as a single-point bucket; merging it into
+    an existing bucket (high/low/close/samples) is left to the upsert.
+    """
+    rows = []
+    for market in markets:
+        values = {field: float(market.get(key) or 0) for field, key in ROLLUP_FIELDS.items()}
+        for resolution in ROLLUP_RESOLUTIONS:
+            row = {
+                "market_id": market["id"],
+                "resolution": resolution,
+                "bucket_start": bucket_start(timestamp, resolution),
+                "samples": 1,
+            }
+            for field, value in values.items():
+                row[f"{field}_open"] = value
+                row[f"{field}_high"] = value
+                row[f"{field}_low"] = value
+                row[f"{field}_close"] = value
+            rows.append(row)
+    return rows
+
+
+def bucket_series(market_id: str, resolution: str, series: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """OHLC buckets computed from raw samples, shaped like market_rollups rows.
+
+    ``series`` holds epoch-second ``timestamp`` and one array per rollup
+    field, oldest first.
+    """
+    timestamps = series["timestamp"]
+    if len(timestamps) == 0:
+        return []
+
+    width = ROLLUP_RESOLUTIONS[resolution].total_seconds()
+    keys = np.floor(timestamps / width) * width
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    buckets = [
+        {
+            "market_id": market_id,
+            "resolution": resolution,
+            "bucket_start": _EPOCH + timedelta(seconds=float(keys[s])),
+            "samples": int(e - s + 1),
+        }
+        for s, e in zip(starts, ends)
+    ]
+    for field in ROLLUP_FIELDS:
+        values = series[field]
+        aggregates = {
+            "open": values[starts],
+            "high": np.maximum.reduceat(values, starts),
+            "low": np.minimum.reduceat(values, starts),
+            "close": values[ends],
+        }
+        for name, array in aggregates.items():
+            for bucket, value in zip(buckets, array.tolist()):
+                bucket[f"{field}_{name}"] = value
+    return buckets
+
+
+def rollups_to_columns(buckets: Iterable[Any]) -> Dict[str, List[float]]:
+    """Flatten rollup buckets into chart columns of bucket-close values."""
+    columns: Dict[str, List[float]] = {"timestamp": [], **{field: [] for field in ROLLUP_FIELDS}}
+    for bucket in buckets:
+        columns["timestamp"].append(to_epoch(bucket.bucket_start))
+        for field in ROLLUP_FIELDS:
+            columns[field].append(getattr(bucket, f"{field}_close"))
+    return columns
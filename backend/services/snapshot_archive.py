@@ -0,0 +1,318 @@
+"""Date-partitioned Parquet archive of ingestion snapshots.
+
+Each ingestion cycle's markets are buffered and flushed as one Parquet file
+per ``flush_cycles`` cycles under ``<dir>/date=YYYY-MM-DD/``; the ingestion
+loop writes closed batches from a worker thread. Reads go through a
+memory-mapped pyarrow dataset so scans only touch the partitions and
+columns they need.
+
+CLI (run from ``backend/``)::
+
+    python -m services.snapshot_archive stats
+    python -m services.snapshot_archive query --market poly_123 --start 2026-03-01 --limit 20
+"""
+import argparse
+import json
+import operator
+import os
+from datetime import datetime, timezone
+from functools import reduce
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.rollups import ROLLUP_FIELDS, bucket_series
+
+# pyarrow is imported on first use (see _require_pyarrow) to keep app startup light
+pa = pc = ds = pafs = pq = None
+
+SNAPSHOT_ARCHIVE_DIR = os.getenv("SNAPSHOT_ARCHIVE_DIR")
+SNAPSHOT_ARCHIVE_FLUSH_CYCLES = int(os.getenv("SNAPSHOT_ARCHIVE_FLUSH_CYCLES", "15"))
+
+_FLOAT_FIELDS = (
+    "probability",
+    "open_interest",
+    "volume_24h",
+    "volume_total",
+    "price_yes",
+    "price_no",
+    "change_1h",
+    "change_24h",
+    "change_7d",
+)
+_STRING_FIELDS = (
+    "platform",
+    "collateral_asset",
+    "title",
+    "description",
+    "category",
+    "status",
+    "image_url",
+    "outcomes",
+    "resolution_source",
+)
+
+
+def _require_pyarrow() -> None:
+    global pa, pc, ds, pafs, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.fs
+        import pyarrow.parquet
+    except ImportError:  # pragma: no cover - optional dependency
+        raise RuntimeError("pyarrow is required for the snapshot archive (pip install pyarrow)")
+    pa, pc, ds, pafs, pq = pyarrow, pyarrow.compute, pyarrow.dataset, pyarrow.fs, pyarrow.parquet
+
+
+def snapshot_schema() -> "pa.Schema":
+    _require_pyarrow()
+    return pa.schema(
+        [
+            ("snapshot_ts", pa.timestamp("ms")),
+            ("id", pa.string()),
+            *[(name, pa.float64()) for name in _FLOAT_FIELDS],
+            *[(name, pa.string()) for name in _STRING_FIELDS],
+            ("end_date", pa.timestamp("ms")),
+        ]
+    )
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _to_string(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+class SnapshotArchive:
+    """Writes snapshots to Parquet and serves filtered, memory-mapped reads."""
+
+    def __init__(self, root: str, flush_cycles: int = SNAPSHOT_ARCHIVE_FLUSH_CYCLES):
+        _require_pyarrow()
+        self.root = root
+        self.flush_cycles = flush_cycles
+        self._buffer: List[Dict[str, list]] = []
+        self._buffer_started: Optional[datetime] = None
+        # (first cycle time, cycles) batches waiting to be written
+        self._closed: List[Tuple[datetime, List[Dict[str, list]]]] = []
+        self.files_written = 0
+        self.rows_written = 0
+
+    def _columns_for(self, markets: Sequence[Dict[str, Any]], timestamp: datetime) -> Dict[str, list]:
+        columns: Dict[str, list] = {
+            "snapshot_ts": [timestamp] * len(markets),
+            "id": [m["id"] for m in markets],
+        }
+        for name in _FLOAT_FIELDS:
+            columns[name] = [None if m.get(name) is None else float(m[name]) for m in markets]
+        for name in _STRING_FIELDS:
+            columns[name] = [_to_string(m.get(name)) for m in markets]
+        columns["end_date"] = [_naive_utc(m.get("end_date")) for m in markets]
+        return columns
+
+    def append(self, markets: Sequence[Dict[str, Any]], timestamp: datetime) -> None:
+        """Buffer one ingestion cycle; a batch closes every ``flush_cycles`` cycles or at midnight."""
+        if self._buffer and timestamp.date() != self._buffer_started.date():
+            self._close_batch()
+
+        if not self._buffer:
+            self._buffer_started = timestamp
+        self._buffer.append(self._columns_for(markets, timestamp))
+        if len(self._buffer) >= self.flush_cycles:
+            self._close_batch()
+
+    def _close_batch(self) -> None:
+        self._closed.append((self._buffer_started, self._buffer))
+        self._buffer = []
+
+    @property
+    def due(self) -> bool:
+        """Whether closed batches are waiting for ``write_closed``."""
+        return bool(self._closed)
+
+    def write_closed(self) -> List[str]:
+        """Write closed batches to Parquet; safe in a worker thread while the loop appends."""
+        paths = []
+        while self._closed:
+            started, cycles = self._closed.pop(0)
+            merged = {name: [v for cycle in cycles for v in cycle[name]] for name in cycles[0]}
+            table = pa.Table.from_pydict(merged, schema=snapshot_schema())
+
+            partition = os.path.join(self.root, f"date={started:%Y-%m-%d}")
+            os.makedirs(partition, exist_ok=True)
+            name = f"snapshots-{started:%H%M%S}-{len(cycles)}.parquet"
+            path = os.path.join(partition, name)
+            # Scans skip dot files and the .tmp suffix misses *.parquet globs, so
+            # readers only ever see complete files
+            tmp_path = os.path.join(partition, f".{name}.tmp")
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+
+            self.files_written += 1
+            self.rows_written += table.num_rows
+            paths.append(path)
+        return paths
+
+    def flush(self) -> Optional[str]:
+        """Write everything buffered, including the open batch; returns the last file written."""
+        if self._buffer:
+            self._close_batch()
+        paths = self.write_closed()
+        return paths[-1] if paths else None
+
+    def dataset(self) -> "ds.Dataset":
+        return ds.dataset(
+            self.root,
+            format="parquet",
+            partitioning="hive",
+            filesystem=pafs.LocalFileSystem(use_mmap=True),
+            schema=snapshot_schema().append(pa.field("date", pa.string())),
+        )
+
+    def read(
+        self,
+        market_ids: Optional[Sequence[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> "pa.Table":
+        """Scan archived snapshots, pruning date partitions and filtering rows."""
+        if not os.path.isdir(self.root):
+            return snapshot_schema().empty_table()
+
+        clauses = []
+        if market_ids is not None:
+            clauses.append(pc.field("id").isin(list(market_ids)))
+        if start is not None:
+            clauses.append(pc.field("date") >= start.strftime("%Y-%m-%d"))
+            clauses.append(pc.field("snapshot_ts") >= pa.scalar(start, pa.timestamp("ms")))
+        if end is not None:
+            clauses.append(pc.field("date") <= end.strftime("%Y-%m-%d"))
+            clauses.append(pc.field("snapshot_ts") <= pa.scalar(end, pa.timestamp("ms")))
+        expr = reduce(operator.and_, clauses) if clauses else None
+
+        table = self.dataset().to_table(columns=list(columns) if columns else None, filter=expr)
+        if "snapshot_ts" in table.column_names:
+            table = table.sort_by("snapshot_ts")
+        return table
+
+    def series(
+        self,
+        market_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Raw samples of one market as chart columns (epoch-second timestamps)."""
+        table = self.read([market_id], start, end, columns=["snapshot_ts", *ROLLUP_FIELDS.values()])
+        timestamps = table.column("snapshot_ts").cast(pa.int64()).to_numpy() / 1000.0
+        columns = {"timestamp": timestamps}
+        for field, key in ROLLUP_FIELDS.items():
+            columns[field] = table.column(key).fill_null(0).to_numpy().astype(np.float64)
+        return columns
+
+    def rollups(
+        self,
+        market_id: str,
+        resolution: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """OHLC buckets computed from archived samples, shaped like market_rollups rows."""
+        return bucket_series(market_id, resolution, self.series(market_id, start, end))
+
+    def version(self) -> Optional[str]:
+        """Changes whenever a Parquet file is added or rewritten; None when empty."""
+        if not os.path.isdir(self.root):
+            return None
+        count, newest = 0, 0
+        for partition in os.scandir(self.root):
+            if not partition.is_dir():
+                continue
+            for entry in os.scandir(partition.path):
+                if entry.name.endswith(".parquet"):
+                    count += 1
+                    newest = max(newest, entry.stat().st_mtime_ns)
+        return f"{count}:{newest}" if count else None
+
+    def stats(self) -> Dict[str, Any]:
+        partitions = sorted(
+            d for d in os.listdir(self.root) if d.startswith("date=")
+        ) if os.path.isdir(self.root) else []
+        return {
+            "root": self.root,
+            "partitions": len(partitions),
+            "first_date": partitions[0][5:] if partitions else None,
+            "last_date": partitions[-1][5:] if partitions else None,
+            "buffered_cycles": len(self._buffer) + sum(len(cycles) for _, cycles in self._closed),
+            "files_written": self.files_written,
+            "rows_written": self.rows_written,
+        }
+
+
+# Singleton instance
+_snapshot_archive: Optional[SnapshotArchive] = None
+
+
+def get_snapshot_archive() -> Optional[SnapshotArchive]:
+    """The configured archive, or None when SNAPSHOT_ARCHIVE_DIR is unset or pyarrow is missing."""
+    global _snapshot_archive
+    if _snapshot_archive is None and SNAPSHOT_ARCHIVE_DIR:
+        try:
+            _snapshot_archive = SnapshotArchive(SNAPSHOT_ARCHIVE_DIR)
+        except RuntimeError as e:
+            print(f"Snapshot archive disabled: {e}")
+    return _snapshot_archive
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the snapshot archive")
+    parser.add_argument("--dir", default=SNAPSHOT_ARCHIVE_DIR, help="Archive root (SNAPSHOT_ARCHIVE_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Show archive partitions")
+
+    query = commands.add_parser("query", help="Print archived snapshots as JSON lines")
+    query.add_argument("--market", action="append", help="Market id (repeatable)")
+    query.add_argument("--start", help="ISO start time (UTC)")
+    query.add_argument("--end", help="ISO end time (UTC)")
+    query.add_argument("--columns", help="Comma-separated columns")
+    query.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("--dir or SNAPSHOT_ARCHIVE_DIR is required")
+    archive = SnapshotArchive(args.dir)
+
+    if args.command == "stats":
+        stats = archive.stats()
+        stats["rows"] = archive.dataset().count_rows() if stats["partitions"] else 0
+        print(json.dumps(stats, indent=2))
+        return
+
+    table = archive.read(
+        market_ids=args.market,
+        start=_parse_time(args.start),
+        end=_parse_time(args.end),
+        columns=args.columns.split(",") if args.columns else None,
+    )
+    for row in table.slice(0, args.limit).to_pylist():
+        print(json.dumps(row, default=str))
+
+
+if __name__ == "__main__":
+    main()
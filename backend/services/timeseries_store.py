@@ -0,0 +1,212 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from services.rollups import ROLLUP_FIELDS as SERIES_FIELDS, to_epoch
+from utils.metrics import metrics
+
+# Room for everything one ingestion cycle records (both platforms' top
+# INGESTION_MARKET_LIMIT plus watched markets), with headroom for churn
+_CYCLE_MARKETS = 2 * int(os.getenv("INGESTION_MARKET_LIMIT", "500")) + int(os.getenv("INGESTION_WATCHED_LIMIT", "200"))
+TIMESERIES_MAX_MARKETS = int(os.getenv("TIMESERIES_MAX_MARKETS", str(_CYCLE_MARKETS * 5 // 4)))
+TIMESERIES_RETENTION_HOURS = float(os.getenv("TIMESERIES_RETENTION_HOURS", "25"))
+TIMESERIES_SAMPLE_SECONDS = float(os.getenv("TIMESERIES_SAMPLE_SECONDS", "60"))
+
+
+class TimeSeriesStore:
+    """Fixed-memory ring buffers of recent samples, one row per market.
+
+    All buffers are allocated up front as ``(max_markets, slots)`` arrays, so
+    memory never grows with the number of samples. Appends write one column
+    slot per market; once a row is full the oldest sample is overwritten.
+    When every row is taken, the market with the stalest sample is evicted;
+    rows written by the batch in progress are never evicted, so a batch
+    larger than the free space skips its extra new markets instead (counted
+    in ``timeseries.skipped``).
+    """
+
+    def __init__(
+        self,
+        max_markets: int = TIMESERIES_MAX_MARKETS,
+        retention_hours: float = TIMESERIES_RETENTION_HOURS,
+        sample_seconds: float = TIMESERIES_SAMPLE_SECONDS,
+    ):
+        self.max_markets = max_markets
+        self.slots = max(2, int(retention_hours * 3600 / sample_seconds))
+        self.retention = timedelta(hours=retention_hours)
+        self.sample_interval = timedelta(seconds=sample_seconds)
+
+        self.timestamps = np.zeros((max_markets, self.slots), dtype=np.float64)
+        self.values = {
+            field: np.zeros((max_markets, self.slots), dtype=np.float32)
+            for field in SERIES_FIELDS
+        }
+        self.heads = np.zeros(max_markets, dtype=np.int64)
+        self.counts = np.zeros(max_markets, dtype=np.int64)
+        self.last_seen = np.full(max_markets, -np.inf)
+
+        self.index: Dict[str, int] = {}
+        self.market_ids: List[Optional[str]] = [None] * max_markets
+        self._free = list(range(max_markets - 1, -1, -1))
+        self.evictions = 0
+        self.skipped = 0
+
+    def _row(self, market_id: str) -> Optional[int]:
+        """Row for a market, allocating or evicting if needed; None if every row is in use."""
+        row = self.index.get(market_id)
+        if row is not None:
+            return row
+
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = int(np.argmin(self.last_seen))
+            if self.last_seen[row] == np.inf:
+                return None
+            del self.index[self.market_ids[row]]
+            self.evictions += 1
+
+        self.index[market_id] = row
+        self.market_ids[row] = market_id
+        self.heads[row] = 0
+        self.counts[row] = 0
+        # Not evictable until its first sample lands
+        self.last_seen[row] = np.inf
+        return row
+
+    def append(self, market_id: str, timestamp: datetime, **values: float) -> None:
+        """Record one sample for a market in O(1)."""
+        self.append_batch([market_id], timestamp, {f: [values.get(f, 0.0)] for f in SERIES_FIELDS})
+
+    def append_batch(
+        self,
+        market_ids: Sequence[str],
+        timestamp: datetime,
+        values: Dict[str, Sequence[float]],
+    ) -> None:
+        """Record one sample per market (ids must be unique) at a shared timestamp."""
+        if not market_ids:
+            return
+
+        # Markets already stored are written by this batch: pin them first
+        known = [self.index[m] for m in market_ids if m in self.index]
+        self.last_seen[known] = np.inf
+
+        rows = np.fromiter(
+            ((-1 if row is None else row) for row in map(self._row, market_ids)),
+            dtype=np.int64,
+            count=len(market_ids),
+        )
+        kept = rows >= 0
+        if not kept.all():
+            skipped = int((~kept).sum())
+            self.skipped += skipped
+            metrics.counter("timeseries.skipped").inc(skipped)
+            rows = rows[kept]
+        heads = self.heads[rows]
+        ts = to_epoch(timestamp)
+
+        self.timestamps[rows, heads] = ts
+        for field in SERIES_FIELDS:
+            self.values[field][rows, heads] = np.asarray(values[field], dtype=np.float32)[kept]
+
+        self.heads[rows] = (heads + 1) % self.slots
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, self.slots)
+        self.last_seen[rows] = ts
+
+    def append_snapshot(self, markets: Iterable[Dict[str, Any]], timestamp: datetime) -> None:
+        """Record one ingestion cycle's market snapshot."""
+        markets = list(markets)
+        self.append_batch(
+            [m["id"] for m in markets],
+            timestamp,
+            {
+                field: [float(m.get(key) or 0) for m in markets]
+                for field, key in SERIES_FIELDS.items()
+            },
+        )
+
+    def window(
+        self,
+        market_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Samples for one market within [start, end], oldest first."""
+        row = self.index.get(market_id)
+        if row is None:
+            return {"timestamp": np.empty(0), **{f: np.empty(0, dtype=np.float32) for f in SERIES_FIELDS}}
+
+        count = self.counts[row]
+        order = (self.heads[row] - count + np.arange(count)) % self.slots
+        ts = self.timestamps[row, order]
+
+        mask = np.ones(count, dtype=bool)
+        if start is not None:
+            mask &= ts >= to_epoch(start)
+        if end is not None:
+            mask &= ts <= to_epoch(end)
+
+        selected = order[mask]
+        return {
+            "timestamp": ts[mask],
+            **{field: self.values[field][row, selected] for field in SERIES_FIELDS},
+        }
+
+    def values_at(
+        self,
+        market_ids: Sequence[str],
+        at: datetime,
+        field: str = "probability",
+        max_age: Optional[timedelta] = None,
+    ) -> np.ndarray:
+        """Latest value at or before ``at`` for many markets at once.
+
+        NaN if there is none, or if it is older than ``max_age`` before ``at``.
+        """
+        result = np.full(len(market_ids), np.nan)
+        known = [(i, self.index[m]) for i, m in enumerate(market_ids) if m in self.index]
+        if not known:
+            return result
+
+        positions, rows = (np.array(x, dtype=np.int64) for x in zip(*known))
+        ts = self.timestamps[rows]
+        valid = (ts <= to_epoch(at)) & (np.arange(self.slots) < self.counts[rows, None])
+        if max_age is not None:
+            valid &= ts >= to_epoch(at - max_age)
+        latest = np.where(valid, ts, -np.inf).argmax(axis=1)
+        found = valid[np.arange(len(rows)), latest]
+
+        picked = self.values[field][rows, latest].astype(np.float64)
+        result[positions[found]] = picked[found]
+        return result
+
+    @property
+    def memory_bytes(self) -> int:
+        arrays = [self.timestamps, self.heads, self.counts, self.last_seen, *self.values.values()]
+        return int(sum(a.nbytes for a in arrays))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "markets": len(self.index),
+            "max_markets": self.max_markets,
+            "slots_per_market": self.slots,
+            "samples": int(self.counts.sum()),
+            "memory_bytes": self.memory_bytes,
+            "evictions": self.evictions,
+            "skipped": self.skipped,
+        }
+
+
+# Singleton instance
+_timeseries_store: Optional[TimeSeriesStore] = None
+
+
+def get_timeseries_store() -> TimeSeriesStore:
+    global _timeseries_store
+    if _timeseries_store is None:
+        _timeseries_store = TimeSeriesStore()
+        metrics.gauge("timeseries_store", _timeseries_store.stats)
+    return _timeseries_store
@@ -0,0 +1,130 @@
+"""Topic subscriptions for streamed market updates.
+
+Topics a client can subscribe to:
+
+- ``market:<id>``: one market
+- ``platform:<polymarket|kalshi>``
+- ``category:<name>`` (case-insensitive)
+- ``watchlist``: markets on the subscriber's own watchlist
+- ``top:<trending|top_oi|top_volume>:<k>``: the current top ``k`` of a
+  leaderboard, re-ranked every ingestion cycle
+
+The index maps each topic to its subscribers and each subscriber to its
+topics, so routing one market update touches only the handful of topics
+that can match it and removing a subscriber touches only its own topics.
+"""
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from services.market_snapshot import LEADERBOARD_SIZE, LEADERBOARDS
+from services.watchlist_index import WatchlistIndex
+
+PLATFORMS = ("polymarket", "kalshi")
+
+
+def parse_topic(topic: str) -> Optional[str]:
+    """Canonical form of a topic string, or None if it is not valid."""
+    kind, _, rest = topic.strip().partition(":")
+    kind = kind.lower()
+    if kind == "market" and rest:
+        return f"market:{rest}"
+    if kind == "platform" and rest.lower() in PLATFORMS:
+        return f"platform:{rest.lower()}"
+    if kind == "category" and rest:
+        return f"category:{rest.lower()}"
+    if kind == "watchlist" and not rest:
+        return "watchlist"
+    if kind == "top":
+        board, _, k = rest.partition(":")
+        if board in LEADERBOARDS and k.isdigit() and 1 <= int(k) <= LEADERBOARD_SIZE:
+            return f"top:{board}:{int(k)}"
+    return None
+
+
+class TopicIndex:
+    """topic -> subscribers, plus the reverse map and current leaderboard ranks."""
+
+    def __init__(self, watchlists: WatchlistIndex):
+        self.watchlists = watchlists
+        self.subscribers: Dict[str, Set[Hashable]] = {}
+        self.topics_by_subscriber: Dict[Hashable, Set[str]] = {}
+        self.top_topics: Set[str] = set()
+        # leaderboard -> market_id -> 0-based rank
+        self.ranks: Dict[str, Dict[str, int]] = {}
+
+    def subscribe(self, subscriber: Hashable, topic: str) -> None:
+        self.subscribers.setdefault(topic, set()).add(subscriber)
+        if topic.startswith("top:"):
+            self.top_topics.add(topic)
+        self.topics_by_subscriber.setdefault(subscriber, set()).add(topic)
+
+    def unsubscribe(self, subscriber: Hashable, topic: str) -> None:
+        subscribers = self.subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[topic]
+                self.top_topics.discard(topic)
+        topics = self.topics_by_subscriber.get(subscriber)
+        if topics is not None:
+            topics.discard(topic)
+            if not topics:
+                del self.topics_by_subscriber[subscriber]
+
+    def remove(self, subscriber: Hashable) -> None:
+        for topic in list(self.topics_by_subscriber.get(subscriber, ())):
+            self.unsubscribe(subscriber, topic)
+
+    def update_ranks(self, leaderboards: Dict[str, List[Dict[str, Any]]]) -> None:
+        self.ranks = {
+            name: {m["id"]: rank for rank, m in enumerate(board)}
+            for name, board in leaderboards.items()
+        }
+
+    def topics_for(self, market: Dict[str, Any]) -> List[str]:
+        """Subscribed market/platform/category/top-K topics this market falls under."""
+        candidates = [f"market:{market['id']}", f"platform:{market.get('platform')}"]
+        if market.get("category"):
+            candidates.append(f"category:{market['category'].lower()}")
+        topics = [t for t in candidates if t in self.subscribers]
+        topics.extend(t for t in self.top_topics if self.in_top(t, market["id"]))
+        return topics
+
+    def in_top(self, topic: str, market_id: str) -> bool:
+        _, board, k = topic.split(":")
+        rank = self.ranks.get(board, {}).get(market_id)
+        return rank is not None and rank < int(k)
+
+    def match(
+        self,
+        market: Dict[str, Any],
+        sockets_for_user: Callable[[str], Iterable[Hashable]],
+    ) -> Set[Hashable]:
+        """Every subscriber that should receive an update for this market."""
+        matched: Set[Hashable] = set()
+        for topic in self.topics_for(market):
+            matched |= self.subscribers[topic]
+
+        watching = self.subscribers.get("watchlist")
+        if watching:
+            for user_id in self.watchlists.watchers(market["id"]):
+                matched.update(s for s in sockets_for_user(user_id) if s in watching)
+        return matched
+
+    def matches(self, topic: str, market: Dict[str, Any], user_id: Optional[str]) -> bool:
+        """Whether one market currently falls under a topic (for snapshots on subscribe)."""
+        if topic == "watchlist":
+            return user_id is not None and user_id in self.watchlists.watchers(market["id"])
+        if topic.startswith("top:"):
+            return self.in_top(topic, market["id"])
+        kind, _, value = topic.partition(":")
+        if kind == "market":
+            return market["id"] == value
+        if kind == "platform":
+            return market.get("platform") == value
+        return (market.get("category") or "").lower() == value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self.subscribers),
+            "subscribers": len(self.topics_by_subscriber),
+        }
@@ -0,0 +1,73 @@
+from typing import Any, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from utils.metrics import metrics
+
+
+class WatchlistIndex:
+    """In-memory reverse index of watchlists: market_id -> users watching it.
+
+    Loaded from the watchlists table at startup and kept current by the
+    watchlist endpoints, so the ingestion loop can refresh watched markets
+    first and updates can be fanned out per user without a DB query.
+    """
+
+    def __init__(self):
+        self.users_by_market: Dict[str, Set[str]] = {}
+        self.markets_by_user: Dict[str, Set[str]] = {}
+
+    def add(self, user_id: str, market_id: str) -> None:
+        self.markets_by_user.setdefault(user_id, set()).add(market_id)
+        self.users_by_market.setdefault(market_id, set()).add(user_id)
+
+    def remove(self, user_id: str, market_id: str) -> None:
+        markets = self.markets_by_user.get(user_id)
+        if markets is not None:
+            markets.discard(market_id)
+            if not markets:
+                del self.markets_by_user[user_id]
+
+        users = self.users_by_market.get(market_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self.users_by_market[market_id]
+
+    def set_watchlist(self, user_id: str, market_ids: Optional[Sequence[str]]) -> None:
+        """Replace one user's entries with the stored list."""
+        for market_id in list(self.markets_by_user.get(user_id, ())):
+            self.remove(user_id, market_id)
+        for market_id in market_ids or ():
+            self.add(user_id, market_id)
+
+    def load(self, watchlists: Iterable[Tuple[str, Optional[Sequence[str]]]]) -> None:
+        """Rebuild from (user_id, market_ids) rows."""
+        self.users_by_market = {}
+        self.markets_by_user = {}
+        for user_id, market_ids in watchlists:
+            for market_id in market_ids or ():
+                self.add(user_id, market_id)
+
+    def watchers(self, market_id: str) -> Set[str]:
+        return self.users_by_market.get(market_id, set())
+
+    def watched_markets(self) -> Set[str]:
+        return set(self.users_by_market)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self.markets_by_user),
+            "markets": len(self.users_by_market),
+            "entries": sum(len(users) for users in self.users_by_market.values()),
+        }
+
+
+# Singleton instance
+_watchlist_index: Optional[WatchlistIndex] = None
+
+
+def get_watchlist_index() -> WatchlistIndex:
+    global _watchlist_index
+    if _watchlist_index is None:
+        _watchlist_index = WatchlistIndex()
+        metrics.gauge("watchlist_index", _watchlist_index.stats)
+    return _watchlist_index
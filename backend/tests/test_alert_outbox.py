@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.alert_outbox import AlertOutbox
+
+
+class FakeConnections:
+    def __init__(self, online=()):
+        self.online = set(online)
+        self.sent = []
+
+    def is_online(self, user_id):
+        return user_id in self.online
+
+    async def send_to_user(self, user_id, message):
+        self.sent.append((user_id, message))
+        return True
+
+
+def alert(user_id, notification_id="n1", triggered_at=None):
+    return {
+        "notification_id": notification_id,
+        "user_id": user_id,
+        "market_id": "poly_1",
+        "type": "price_alert",
+        "threshold": 0.6,
+        "value": 0.65,
+        "triggered_at": triggered_at or datetime.utcnow(),
+    }
+
+
+def test_enqueue_is_bounded_and_drops_the_oldest():
+    outbox = AlertOutbox(max_size=2)
+    outbox.enqueue([alert("a", "n1"), alert("a", "n2"), alert("a", "n3")])
+
+    assert outbox.stats()["queued"] == 2
+    assert outbox.queue.get_nowait()["notification_id"] == "n2"
+
+
+@pytest.mark.asyncio
+async def test_batch_is_coalesced_into_one_message_per_user():
+    connections = FakeConnections(online={"alice", "bob"})
+    outbox = AlertOutbox(connections)
+    outbox.enqueue([alert("alice", "n1"), alert("bob", "n2"), alert("alice", "n3")])
+
+    await outbox.process(await outbox.next_batch())
+
+    messages = dict(connections.sent)
+    assert len(connections.sent) == 2
+    assert [a["notification_id"] for a in messages["alice"]["alerts"]] == ["n1", "n3"]
+    assert messages["alice"]["type"] == "alerts"
+    assert outbox.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_offline_users_are_retried_once_they_connect():
+    connections = FakeConnections()
+    outbox = AlertOutbox(connections, pending_per_user=2)
+    outbox.enqueue([alert("alice", "n1"), alert("alice", "n2"), alert("alice", "n3")])
+
+    await outbox.process(await outbox.next_batch())
+    assert connections.sent == []
+    assert outbox.stats()["pending_alerts"] == 2
+
+    connections.online.add("alice")
+    await outbox.process([])
+    assert [a["notification_id"] for a in connections.sent[0][1]["alerts"]] == ["n2", "n3"]
+    assert outbox.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_pending_alerts_expire_after_the_ttl():
+    outbox = AlertOutbox(FakeConnections(), pending_ttl=60)
+    outbox.enqueue([alert("alice", "n1", datetime.utcnow() - timedelta(minutes=5)), alert("alice", "n2")])
+
+    await outbox.process(await outbox.next_batch())
+    assert [a["notification_id"] for a in outbox.pending["alice"]] == ["n2"]
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("duckdb")
+
+from services.analytics import AnalyticsService
+from services.snapshot_archive import SnapshotArchive
+
+T0 = datetime(2026, 3, 14, 12, 0)
+
+
+def snapshot(market_id, category, probability, open_interest, volume_24h):
+    return {
+        "id": market_id,
+        "platform": "polymarket" if market_id.startswith("poly_") else "kalshi",
+        "title": f"Market {market_id}",
+        "category": category,
+        "probability": probability,
+        "open_interest": open_interest,
+        "volume_24h": volume_24h,
+    }
+
+
+def fill(archive, days=3):
+    for day in range(days):
+        archive.append(
+            [
+                snapshot("poly_1", "Politics", 0.4 + day * 0.1, 1000 + day * 500, 300.0),
+                snapshot("kalshi_X", "Economics", 0.5, 2000 - day * 100, 100.0),
+            ],
+            T0 + timedelta(days=day),
+        )
+    archive.flush()
+
+
+@pytest.fixture
+def service(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), flush_cycles=1)
+    fill(archive)
+    return AnalyticsService(archive)
+
+
+def test_category_oi_trends(service):
+    rows = service.query("category_oi_trends", T0, limit=10)
+
+    by_category = {row["category"]: row for row in rows}
+    assert rows[0]["category"] == "Politics"
+    assert by_category["Politics"]["open_interest_change"] == pytest.approx(1000.0)
+    assert by_category["Economics"]["open_interest_change"] == pytest.approx(-200.0)
+    assert by_category["Economics"]["daily_open_interest"] == [2000.0, 1900.0, 1800.0]
+
+
+def test_platform_volume_share(service):
+    rows = service.query("platform_volume_share", T0, limit=10)
+
+    assert [row["platform"] for row in rows] == ["polymarket", "kalshi"]
+    assert rows[0]["share"] == pytest.approx(0.75)
+    assert sum(row["share"] for row in rows) == pytest.approx(1.0)
+
+
+def test_top_movers_and_window(service):
+    rows = service.query("top_movers", T0, limit=1)
+    assert rows[0]["id"] == "poly_1"
+    assert rows[0]["change"] == pytest.approx(20.0)
+
+    # Only the last day falls in the window, so nothing moved
+    rows = service.query("top_movers", T0 + timedelta(days=2), limit=10)
+    assert all(row["change"] == 0 for row in rows)
+
+
+def test_results_are_cached_per_archive_version(service):
+    first = service.query("top_movers", T0, limit=10)
+    assert service.query("top_movers", T0, limit=10) is first
+    assert service.stats()["cache_hits"] == 1
+
+    service.archive.append(
+        [snapshot("kalshi_X", "Economics", 0.9, 1800, 100.0)],
+        T0 + timedelta(days=3),
+    )
+    service.archive.flush()
+
+    rows = service.query("top_movers", T0, limit=10)
+    assert rows[0]["id"] == "kalshi_X"
+    assert service.stats()["cache_misses"] == 2
+
+
+def test_concurrent_queries_keep_the_counters_consistent(service):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: service.query("top_movers", T0, limit=10), range(64)))
+
+    stats = service.stats()
+    assert stats["cache_hits"] + stats["cache_misses"] == 64
+    assert stats["cache_entries"] == 1
+    assert all(rows == results[0] for rows in results)
+
+
+def test_empty_archive_returns_no_rows(tmp_path):
+    service = AnalyticsService(SnapshotArchive(str(tmp_path / "empty")))
+    assert service.query("top_movers", T0) == []
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from routers.websocket import ClusterConnections, ConnectionManager
+from services.backplane import LocalBackplane, RemotePresence, WORKER_ID
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+
+@pytest.mark.asyncio
+async def test_local_backplane_round_trips_through_the_wire_format():
+    backplane = LocalBackplane()
+    received = []
+
+    async def handler(envelope):
+        received.append(envelope)
+
+    backplane.subscribe(handler)
+    await backplane.publish({"kind": "cycle", "timestamp": datetime(2024, 1, 1, 12), "markets": [{"id": "a"}]})
+
+    assert received == [{"kind": "cycle", "timestamp": datetime(2024, 1, 1, 12), "markets": [{"id": "a"}]}]
+
+
+def test_remote_presence_expires_silent_workers():
+    presence = RemotePresence(ttl=15)
+    presence.record("worker-a", ["alice"], now=100)
+
+    assert presence.is_online("alice", now=110)
+    assert not presence.is_online("bob", now=110)
+    assert not presence.is_online("alice", now=120)
+    assert presence.workers == {}
+
+
+@pytest.mark.asyncio
+async def test_user_messages_reach_sockets_on_whichever_worker_holds_them():
+    local = ConnectionManager()
+    cluster = ClusterConnections(local)
+    cluster.backplane = LocalBackplane()
+    cluster.start()
+    socket = RecordingSocket()
+    await local.connect(socket)
+    local.identify(socket, "alice")
+
+    await cluster.handle({"kind": "presence", "worker": "other:1", "users": ["bob"]})
+    await cluster.handle({"kind": "presence", "worker": WORKER_ID, "users": ["ignored"]})
+    assert cluster.is_online("alice") and cluster.is_online("bob")
+    assert not cluster.is_online("ignored")
+
+    assert await cluster.send_to_user("alice", {"type": "alerts", "alerts": []})
+    await asyncio.sleep(0)
+    assert socket.frames == [{"type": "alerts", "alerts": []}]
+
+    local.disconnect(socket)
+    await cluster.stop()
+
+
+@pytest.mark.asyncio
+async def test_remote_user_messages_count_as_sent_only_once_acknowledged():
+    backplane = LocalBackplane()
+    sender = ClusterConnections(ConnectionManager(), ack_timeout=0.05, worker="leader:1")
+    holder_sockets = ConnectionManager()
+    holder = ClusterConnections(holder_sockets, ack_timeout=0.05, worker="other:1")
+    for cluster in (sender, holder):
+        cluster.backplane = backplane
+        backplane.subscribe(cluster.handle)
+    socket = RecordingSocket()
+    await holder_sockets.connect(socket)
+    holder_sockets.identify(socket, "alice")
+    await sender.handle({"kind": "presence", "worker": "other:1", "users": ["alice"]})
+
+    assert await sender.send_to_user("alice", {"type": "alerts", "alerts": [1]})
+    await asyncio.sleep(0)
+    assert socket.frames == [{"type": "alerts", "alerts": [1]}]
+
+    # Queue full on the holding worker: nothing queued, no ack
+    holder_sockets.clients[socket].max_size = 0
+    assert not await sender.send_to_user("alice", {"type": "alerts", "alerts": [2]})
+
+    # Presence still lists alice, but her socket is gone
+    holder_sockets.disconnect(socket)
+    assert sender.is_online("alice")
+    assert not await sender.send_to_user("alice", {"type": "alerts", "alerts": [3]})
+
+    # Online nowhere: not even published
+    assert not await sender.send_to_user("carol", {"type": "alerts", "alerts": [4]})
+    assert not sender._acks
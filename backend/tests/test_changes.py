@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.changes import CHANGE_WINDOWS, ChangeTracker
+from services.kalshi_service import KalshiService
+from services.polymarket_service import PolymarketService
+from services.timeseries_store import TimeSeriesStore
+
+NOW = datetime(2026, 3, 14, 12, 0)
+
+
+def market(market_id, probability, change_24h=0.0):
+    return {"id": market_id, "probability": probability, "change_24h": change_24h}
+
+
+def test_changes_come_from_retained_history():
+    store = TimeSeriesStore(max_markets=8, retention_hours=25, sample_seconds=3600)
+    store.append_snapshot([market("a", 0.40), market("b", 0.90)], NOW - timedelta(hours=24))
+    store.append_snapshot([market("a", 0.50), market("b", 0.80)], NOW - timedelta(hours=1))
+    tracker = ChangeTracker(store)
+
+    deltas = tracker.compute([market("a", 0.55), market("b", 0.70), market("new", 0.3)], NOW)
+
+    assert deltas["change_1h"][:2] == pytest.approx([5.0, -10.0], abs=1e-4)
+    assert deltas["change_24h"][:2] == pytest.approx([15.0, -20.0], abs=1e-4)
+    assert "new" not in tracker.changes
+    assert "change_7d" not in tracker.changes["a"]
+
+
+def test_long_windows_use_supplied_baselines():
+    tracker = ChangeTracker(TimeSeriesStore(max_markets=2, retention_hours=25, sample_seconds=3600))
+
+    assert set(tracker.windows_needing_baselines()) == {"change_7d"}
+
+    tracker.compute([market("a", 0.6)], NOW, {"change_7d": {"a": 0.25}})
+
+    assert tracker.changes["a"]["change_7d"] == pytest.approx(35.0)
+
+
+def test_stale_buffered_samples_fall_back_to_supplied_baselines():
+    store = TimeSeriesStore(max_markets=4, retention_hours=2, sample_seconds=60)
+    # Ingestion stalled: "a" was last sampled 50 minutes before the 1h window start
+    store.append_snapshot([market("a", 0.2)], NOW - timedelta(hours=1, minutes=50))
+    store.append_snapshot([market("b", 0.4)], NOW - timedelta(hours=1, minutes=1))
+    tracker = ChangeTracker(store)
+
+    assert set(tracker.windows_needing_baselines(["b"], NOW)) == {"change_24h", "change_7d"}
+    assert set(tracker.windows_needing_baselines(["a", "b"], NOW)) == set(CHANGE_WINDOWS)
+
+    tracker.compute([market("a", 0.5), market("b", 0.5), market("c", 0.5)], NOW, {"change_1h": {"a": 0.45}})
+
+    assert tracker.changes["a"]["change_1h"] == pytest.approx(5.0)
+    assert tracker.changes["b"]["change_1h"] == pytest.approx(10.0, abs=1e-4)
+    assert "c" not in tracker.changes
+
+
+def test_apply_overrides_upstream_estimates_only_when_known():
+    store = TimeSeriesStore(max_markets=4, retention_hours=25, sample_seconds=3600)
+    store.append_snapshot([market("a", 0.2)], NOW - timedelta(hours=24))
+    tracker = ChangeTracker(store)
+    tracker.compute([market("a", 0.3), market("b", 0.5)], NOW)
+
+    markets = tracker.apply([market("a", 0.3, change_24h=99.0), market("b", 0.5, change_24h=1.5)])
+
+    assert markets[0]["change_24h"] == pytest.approx(10.0, abs=1e-4)
+    assert markets[1]["change_24h"] == 1.5
+
+
+def test_parsers_no_longer_derive_change_from_spread_or_previous_ask():
+    poly = PolymarketService().parse_market({"id": "1", "spread": "0.02", "oneDayPriceChange": "-0.031"})
+    kalshi = KalshiService().parse_market({
+        "ticker": "X",
+        "yes_ask": 60,
+        "previous_yes_ask": 30,
+        "last_price": 58,
+        "previous_price": 52,
+    })
+
+    assert poly["change_24h"] == pytest.approx(-3.1)
+    assert kalshi["change_24h"] == pytest.approx(6.0)
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from database import crud
+from services.rollups import retention_cutoffs
+from utils.metrics import metrics
+
+
+class FakeResult:
+    rowcount = 0
+
+    def scalar_one_or_none(self):
+        return None
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return []
+
+    def one(self):
+        return (0, 0, 0, 0, None, None)
+
+
+class RecordingSession:
+    """Captures executed statements instead of talking to Postgres."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt, *args, **kwargs):
+        self.statements.append(stmt)
+        return FakeResult()
+
+    async def commit(self):
+        pass
+
+
+def compiled(stmt):
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+@pytest.mark.asyncio
+async def test_hot_reads_reuse_cache_key_across_parameters():
+    db = RecordingSession()
+    await crud.get_market(db, "poly_1")
+    await crud.get_market(db, "kalshi_X")
+    await crud.get_market_rollups(db, "poly_1", "1h", datetime(2026, 3, 1))
+    await crud.get_market_rollups(db, "poly_2", "1d", datetime(2026, 3, 7))
+
+    keys = [stmt._generate_cache_key().key for stmt in db.statements]
+    assert keys[0] == keys[1]
+    assert keys[2] == keys[3]
+    assert compiled(db.statements[1]).params == {"market_id_1": "kalshi_X"}
+
+
+@pytest.mark.asyncio
+async def test_optional_filters_change_the_statement():
+    db = RecordingSession()
+    await crud.get_markets(db, platform="kalshi", limit=5)
+    await crud.get_markets(db, limit=5)
+
+    with_filter, without_filter = (str(compiled(stmt)) for stmt in db.statements)
+    assert "WHERE markets.platform" in with_filter
+    assert "WHERE" not in without_filter
+    assert "LIMIT" in without_filter
+
+
+@pytest.mark.asyncio
+async def test_rollup_closes_select_requested_field():
+    db = RecordingSession()
+    await crud.get_rollup_closes_at(db, "1h", datetime(2026, 3, 14), field="probability")
+    await crud.get_rollup_closes_at(db, "1h", datetime(2026, 3, 14), field="volume")
+
+    first, second = (str(compiled(stmt)) for stmt in db.statements)
+    assert "probability_close" in first
+    assert "volume_close" in second
+
+
+@pytest.mark.asyncio
+async def test_rollup_retention_is_one_delete_with_a_cutoff_per_resolution():
+    db = RecordingSession()
+    now = datetime(2026, 3, 14)
+    cutoffs = retention_cutoffs(now)
+
+    assert await crud.delete_expired_rollups(db, cutoffs) == 0
+
+    (stmt,) = db.statements
+    assert str(compiled(stmt)).startswith("DELETE FROM market_rollups WHERE")
+    assert set(compiled(stmt).params.values()) == set(cutoffs) | set(cutoffs.values())
+    assert cutoffs["1m"] == now - timedelta(hours=25)
+    assert cutoffs["1d"] == now - timedelta(days=366)
+
+
+@pytest.mark.asyncio
+async def test_global_stats_is_one_query_and_timed():
+    db = RecordingSession()
+    before = metrics.histogram("db_query.get_global_stats").count
+
+    stats = await crud.get_global_stats(db)
+
+    assert len(db.statements) == 1
+    assert "FILTER (WHERE" in str(compiled(db.statements[0]))
+    assert stats["total_open_interest"] == 0
+    assert metrics.histogram("db_query.get_global_stats").count == before + 1
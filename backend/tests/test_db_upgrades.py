@@ -0,0 +1,73 @@
+import pytest
+
+from database.upgrades import merge_duplicate_watchlists, upgrade_watchlist_index
+
+
+class FakeResult:
+    def __init__(self, scalar=None, rows=()):
+        self._scalar = scalar
+        self._rows = list(rows)
+
+    def scalar(self):
+        return self._scalar
+
+    def all(self):
+        return self._rows
+
+
+class ScriptedConnection:
+    """Answers the upgrade's catalog and duplicate queries from fixed data."""
+
+    def __init__(self, index_unique, rows=()):
+        self.index_unique = index_unique
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        sql = " ".join(str(stmt).split())
+        self.statements.append((sql, params))
+        if "indisunique" in sql:
+            return FakeResult(scalar=self.index_unique)
+        if sql.startswith("SELECT id, user_id, market_ids"):
+            return FakeResult(rows=self.rows)
+        return FakeResult()
+
+
+def test_duplicates_collapse_into_the_newest_row():
+    rows = [
+        ("w3", "alice", ["m2", "m4"]),
+        ("w1", "alice", ["m1", "m2"]),
+        ("w2", "alice", None),
+        ("w5", "bob", ["m9", "m9"]),
+        ("w4", "bob", ["m8"]),
+    ]
+    kept, deleted = merge_duplicate_watchlists(rows)
+
+    assert kept == {"w3": ["m2", "m4", "m1"], "w5": ["m9", "m8"]}
+    assert deleted == ["w1", "w2", "w4"]
+
+
+@pytest.mark.asyncio
+async def test_non_unique_index_is_rebuilt_after_merging():
+    conn = ScriptedConnection(
+        index_unique=False,
+        rows=[("w2", "alice", ["m2"]), ("w1", "alice", ["m1"])],
+    )
+    assert await upgrade_watchlist_index(conn) is True
+
+    sql = [s for s, _ in conn.statements]
+    assert ("UPDATE watchlists SET market_ids = :market_ids WHERE id = :id",
+            {"id": "w2", "market_ids": ["m2", "m1"]}) in conn.statements
+    assert ("DELETE FROM watchlists WHERE id = ANY(:ids)", {"ids": ["w1"]}) in conn.statements
+    assert sql[-2:] == [
+        "DROP INDEX ix_watchlists_user_id",
+        "CREATE UNIQUE INDEX ix_watchlists_user_id ON watchlists (user_id)",
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("index_unique", [True, None])
+async def test_unique_or_fresh_index_is_left_alone(index_unique):
+    conn = ScriptedConnection(index_unique=index_unique)
+    assert await upgrade_watchlist_index(conn) is False
+    assert len(conn.statements) == 1
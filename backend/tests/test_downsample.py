@@ -0,0 +1,83 @@
+import numpy as np
+
+from services.kalshi_service import KalshiService
+from utils.downsample import downsample_series, lttb_indices
+
+
+def reference_lttb(x, y, threshold):
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1 if i < threshold - 3 else n - 1
+        next_start = end
+        next_end = int((i + 2) * every) + 1 if i < threshold - 4 else n - 1
+        if i == threshold - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+            avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def test_lttb_matches_reference_implementation():
+    rng = np.random.default_rng(7)
+    x = np.arange(1000, dtype=float)
+    y = np.cumsum(rng.normal(size=1000))
+
+    assert lttb_indices(x, y, 50).tolist() == reference_lttb(x.tolist(), y.tolist(), 50)
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[237] = 1.0
+
+    indices = lttb_indices(x, y, 20)
+
+    assert len(indices) == 20
+    assert indices[0] == 0 and indices[-1] == 499
+    assert 237 in indices
+
+
+def test_lttb_returns_everything_below_threshold():
+    assert lttb_indices(np.arange(10.0), np.arange(10.0), 100).tolist() == list(range(10))
+
+
+def test_downsample_series_returns_aligned_columns():
+    columns = {
+        "timestamp": [1700000000.0 + 60 * i for i in range(300)],
+        "probability": [0.5 + 0.001 * i for i in range(300)],
+        "volume": [float(i) for i in range(300)],
+    }
+
+    sampled = downsample_series(columns, 30)
+
+    assert len(sampled["timestamp"]) == len(sampled["volume"]) == 30
+    assert isinstance(sampled["timestamp"][0], int)
+    assert sampled["volume"] == [(ts - 1700000000) / 60 for ts in sampled["timestamp"]]
+
+
+def test_downsample_series_handles_empty_history():
+    assert downsample_series({"timestamp": [], "probability": []}, 10) == {"timestamp": [], "probability": []}
+
+
+def test_kalshi_history_to_columns_sorts_and_scales_prices():
+    columns = KalshiService().history_to_columns([
+        {"ts": 20, "yes_price": 55, "volume": 10, "open_interest": 100},
+        {"ts": 10, "yes_price": 40, "volume": 5, "open_interest": 90},
+    ])
+
+    assert columns["timestamp"] == [10.0, 20.0]
+    assert columns["probability"] == [0.40, 0.55]
+    assert columns["open_interest"] == [90.0, 100.0]
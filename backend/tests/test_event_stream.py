@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from routers.sse import event_source
+from routers.websocket import broadcast_market_updates
+from services.event_stream import EventStream, get_event_stream
+from utils.ws_frames import Frame
+
+
+def update(n):
+    return Frame({"type": "market_update", "market_id": "poly_1", "seq": n})
+
+
+def test_replay_returns_only_what_the_client_missed():
+    stream = EventStream(replay_size=3)
+    for n in range(1, 6):
+        stream.publish([update(n)])
+
+    assert [seq for seq, _ in stream.replay(stream.event_id(3))] == [4, 5]
+    assert stream.replay(stream.event_id(5)) == []
+    assert stream.replay(None) == []
+    # Fell out of the buffer, from the future, or from another process
+    assert stream.replay(stream.event_id(1)) is None
+    assert stream.replay(stream.event_id(9)) is None
+    assert stream.replay("otherepoch-4") is None
+
+
+@pytest.mark.asyncio
+async def test_lagging_subscriber_is_cut_off():
+    stream = EventStream(queue_size=2)
+    queue = stream.subscribe()
+    for n in range(3):
+        stream.publish([update(n)])
+
+    assert queue not in stream.subscribers
+    assert [queue.get_nowait() for _ in range(3)][-1] is None
+
+
+@pytest.mark.asyncio
+async def test_cycle_larger_than_the_queue_does_not_cut_subscribers_off():
+    stream = get_event_stream()
+    source = event_source(stream, None)
+    await take(source, 2)
+    deltas = [(f"poly_{i}", 1, {"probability": 0.5}) for i in range(stream.queue_size + 150)]
+    try:
+        await broadcast_market_updates(deltas)
+        await broadcast_market_updates(deltas)
+
+        assert len(stream.subscribers) == 1
+        cycle = await take(source, 2)
+        assert sum(chunk.count("event: market_update\n") for chunk in cycle) == 2 * len(deltas)
+    finally:
+        await source.aclose()
+
+
+async def take(source, count):
+    return [await source.__anext__() for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_event_source_resumes_after_last_event_id_then_streams_live():
+    stream = EventStream()
+    for n in range(1, 4):
+        stream.publish([update(n)])
+
+    source = event_source(stream, stream.event_id(1))
+    retry, second, third = await take(source, 3)
+    assert retry.startswith("retry:")
+    assert second == f"id: {stream.event_id(2)}\nevent: market_update\ndata: {update(2).text}\n\n"
+    assert third.startswith(f"id: {stream.event_id(3)}\n")
+
+    stream.publish([update(4)])
+    [live] = await take(source, 1)
+    assert json.loads(live.split("data: ")[1])["seq"] == 4
+    await source.aclose()
+    assert not stream.subscribers
+
+
+@pytest.mark.asyncio
+async def test_event_source_tells_unresumable_clients_to_reset():
+    stream = EventStream()
+    source = event_source(stream, "stale-12")
+    _, reset = await take(source, 2)
+    assert reset.startswith("event: reset\n")
+    await source.aclose()
+
+    source = event_source(stream, None)
+    _, connected = await take(source, 2)
+    assert connected.startswith(f"id: {stream.event_id(0)}\nevent: connected\n")
+    await source.aclose()
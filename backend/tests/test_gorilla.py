@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services.compressed_history import CompressedHistory
+from services.rollups import bucket_series
+from utils.gorilla import decode_block, encode_block
+
+
+def test_block_round_trips_irregular_timestamps_and_special_floats():
+    rng = np.random.default_rng(3)
+    timestamps = (1_700_000_000 + 60 * np.arange(500) + rng.integers(-3, 4, 500)).tolist()
+    timestamps[10] += 86_400
+    timestamps[20] -= 5_000
+    probability = np.round(0.5 + np.cumsum(rng.normal(0, 0.01, 500)), 3)
+    probability[[5, 6, 7]] = [np.nan, np.inf, -0.0]
+
+    decoded_ts, columns = decode_block(encode_block(timestamps, {"probability": probability}))
+
+    assert decoded_ts.tolist() == timestamps
+    assert np.array_equal(columns["probability"].view(np.uint64), probability.view(np.uint64))
+
+
+def test_regular_flat_series_compresses_to_a_few_bits_per_sample():
+    timestamps = 1_700_000_000 + 60 * np.arange(1000)
+    prices = np.full(1000, 0.42)
+    prices[500:] = 0.43
+
+    block = encode_block(timestamps, {"probability": prices})
+
+    assert len(block) * 8 / 1000 < 4
+    assert np.array_equal(decode_block(block)[1]["probability"], prices)
+
+
+def test_empty_and_single_sample_blocks():
+    assert decode_block(encode_block([], {"x": []}))[0].tolist() == []
+    ts, columns = decode_block(encode_block([-5], {"x": [1.5]}))
+    assert ts.tolist() == [-5] and columns["x"].tolist() == [1.5]
+
+
+def test_compressed_history_seals_reads_and_persists(tmp_path):
+    history = CompressedHistory(block_size=4)
+    start = datetime(2026, 3, 14)
+    for i in range(10):
+        history.append_snapshot(
+            [{"id": "poly_1", "probability": i / 10, "open_interest": 100 + i, "volume_24h": 5}],
+            start + timedelta(minutes=i),
+        )
+
+    window = history.read("poly_1", start + timedelta(minutes=3), start + timedelta(minutes=8))
+    assert history.stats()["blocks"] == 2
+    assert np.allclose(window["probability"], [0.3, 0.4, 0.5, 0.6, 0.7, 0.8])
+
+    path = str(tmp_path / "history.grl")
+    history.save(path)
+    restored = CompressedHistory(block_size=4)
+    restored.load(path)
+
+    assert np.allclose(restored.read("poly_1")["open_interest"], 100 + np.arange(10))
+
+
+def test_markets_leaving_the_feed_are_sealed_then_expired():
+    history = CompressedHistory(block_size=100, retention_days=1, idle_hours=1)
+    start = datetime(2026, 3, 14)
+    history.append_snapshot([{"id": "poly_gone", "probability": 0.4}], start)
+    history.append_snapshot([{"id": "poly_1", "probability": 0.5}], start + timedelta(minutes=30))
+    assert set(history.pending) == {"poly_gone", "poly_1"}
+
+    # An hour without samples seals the open chunk; it stays readable
+    assert history.append_snapshot([{"id": "poly_1", "probability": 0.6}], start + timedelta(hours=2)) == 1
+    assert set(history.pending) == {"poly_1"} and set(history.blocks) == {"poly_gone"}
+    assert history.read("poly_gone")["probability"].tolist() == [0.4]
+
+    history.append_snapshot([{"id": "poly_1", "probability": 0.7}], start + timedelta(days=1, hours=1))
+    assert "poly_gone" not in history.blocks
+
+    buckets = bucket_series("poly_1", "1h", history.read("poly_1"))
+    assert [(b["bucket_start"], b["samples"], b["probability_close"]) for b in buckets] == [
+        (start, 1, 0.5),
+        (start + timedelta(hours=2), 1, 0.6),
+        (start + timedelta(days=1, hours=1), 1, 0.7),
+    ]
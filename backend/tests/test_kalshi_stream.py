@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.kalshi_simulator import KalshiSimulator
+from services.backplane import LocalBackplane
+from services.kalshi_stream import KalshiStream
+from utils.metrics import metrics
+
+
+async def eventually(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def kalshi(ticker):
+    return {"id": f"kalshi_{ticker}", "platform": "kalshi"}
+
+
+def message(kind, msg, sid=1, seq=None):
+    payload = {"type": kind, "sid": sid, "msg": msg}
+    if seq is not None:
+        payload["seq"] = seq
+    return json.dumps(payload)
+
+
+@pytest.mark.asyncio
+async def test_quotes_follow_the_yes_ask_then_the_last_trade():
+    stream = KalshiStream()
+    await stream.track([kalshi("A"), {"id": "poly_1", "platform": "polymarket"}])
+    assert stream.tickers == ["A"]
+
+    stream.handle_message(message("orderbook_snapshot", {"market_ticker": "A", "yes": [[40, 10], [38, 5]], "no": [[55, 20]]}, seq=1))
+    assert stream.take_quotes() == {"kalshi_A": {"probability": 0.45, "price_yes": 0.45, "price_no": 0.6}}
+
+    # Emptying the NO side leaves no YES ask: fall back to the last trade
+    stream.handle_message(message("orderbook_delta", {"market_ticker": "A", "side": "no", "price": 55, "delta": -20}, seq=2))
+    stream.handle_message(message("ticker", {"market_ticker": "A", "price": 47}, sid=2))
+    stream.handle_message(message("orderbook_delta", {"market_ticker": "B", "side": "no", "price": 10, "delta": 5}, seq=3))
+    assert stream.take_quotes() == {"kalshi_A": {"probability": 0.47, "price_yes": 0.47, "price_no": 0.53}}
+    assert set(stream.books) == {"A"}
+    assert stream.take_quotes() == {}
+
+
+@pytest.mark.asyncio
+async def test_sequence_gap_resyncs_books_over_rest():
+    simulator = KalshiSimulator(["A", "B"])
+    url = await simulator.start()
+    stream = KalshiStream(url, flush_interval=0.01, reconnect_delay=0.01, kalshi=simulator)
+    stream.backplane = LocalBackplane()
+    gaps = metrics.counter("kalshi_stream.gaps").value
+    await stream.track([kalshi("A"), kalshi("B")])
+    stream.start()
+    try:
+        await eventually(lambda: set(stream.books) == {"A", "B"})
+
+        # The NO level that sets A's new ask never arrives
+        simulator.drop_next_delta()
+        await simulator.move("A", 30)
+        await eventually(lambda: metrics.counter("kalshi_stream.gaps").value == gaps + 1)
+        await eventually(lambda: not stream.resyncing)
+
+        assert sorted(simulator.orderbook_requests) == ["A", "B"]
+        assert (stream.books["A"].yes, stream.books["A"].no) == ({28: 100}, {70: 100})
+        assert stream.quotes["kalshi_A"]["price_yes"] == 0.3
+    finally:
+        await stream.stop()
+        await simulator.stop()
+
+
+@pytest.mark.asyncio
+async def test_stream_publishes_quotes_and_resubscribes_after_reconnect():
+    simulator = KalshiSimulator(["A", "B", "C"])
+    url = await simulator.start()
+    stream = KalshiStream(url, flush_interval=0.01, reconnect_delay=0.01)
+    stream.backplane = LocalBackplane()
+    published = []
+
+    async def record(envelope):
+        published.append(envelope)
+
+    stream.backplane.subscribe(record)
+    await stream.track([kalshi("A"), kalshi("B")])
+    stream.start()
+    try:
+        await eventually(lambda: len(stream.sids) == 2 and set(stream.books) == {"A", "B"})
+        assert simulator.commands[0]["cmd"] == "subscribe"
+        assert simulator.commands[0]["params"] == {"channels": ["ticker", "orderbook_delta"], "market_tickers": ["A", "B"]}
+
+        published.clear()
+        await simulator.move("B", 62)
+        # A flush can land between the move's deltas; the last one carries the new ask
+        await eventually(lambda: stream.quotes["kalshi_B"]["price_yes"] == 0.62 and not stream.dirty)
+        envelope = [e for e in published if "kalshi_B" in e["quotes"]][-1]
+        assert envelope["quotes"]["kalshi_B"] == {"probability": 0.62, "price_yes": 0.62, "price_no": 0.4}
+        assert envelope["received_at"]["kalshi_B"] <= stream.last_event_at
+
+        await stream.track([kalshi("A"), kalshi("C")])
+        await eventually(lambda: "C" in stream.books)
+        actions = [(c["params"]["action"], c["params"]["market_tickers"]) for c in simulator.commands[1:]]
+        assert actions == [("add_markets", ["C"])] * 2 + [("delete_markets", ["B"])] * 2
+        assert "B" not in stream.books and "kalshi_B" not in stream.quotes
+
+        await simulator.disconnect()
+        await eventually(lambda: len(simulator.commands) == 6 and set(stream.books) == {"A", "C"})
+        assert simulator.commands[-1]["params"]["market_tickers"] == ["A", "C"]
+    finally:
+        await stream.stop()
+        await simulator.stop()
+
+
+@pytest.mark.asyncio
+async def test_markets_tracked_before_the_subscribed_reply_are_added():
+    simulator = KalshiSimulator(["A", "B", "C"])
+    simulator.subscribe_delay = 0.1
+    url = await simulator.start()
+    stream = KalshiStream(url, flush_interval=0.01, reconnect_delay=0.01)
+    stream.backplane = LocalBackplane()
+    await stream.track([kalshi("A"), kalshi("B")])
+    stream.start()
+    try:
+        await eventually(lambda: simulator.commands and stream.connected)
+        # No sids yet: the change can only be sent once the replies arrive
+        await stream.track([kalshi("A"), kalshi("C")])
+        assert len(simulator.commands) == 1
+
+        await eventually(lambda: set(stream.books) == {"A", "C"})
+        actions = sorted((c["params"]["action"], c["params"]["market_tickers"][0]) for c in simulator.commands[1:])
+        assert actions == [("add_markets", "C")] * 2 + [("delete_markets", "B")] * 2
+        assert all(tickers == {"A", "C"} for tickers in stream.subscribed.values())
+    finally:
+        await stream.stop()
+        await simulator.stop()
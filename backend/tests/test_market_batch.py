@@ -0,0 +1,99 @@
+import pytest
+import pytest_asyncio
+
+from services.data_aggregator import BATCH_CHUNK_SIZE, DataAggregator
+from services.market_snapshot import MarketSnapshot
+from utils.cache import market_cache
+
+
+class FakePolymarket:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+        self.singles = []
+
+    async def get_markets_by_ids(self, ids):
+        self.batches.append(list(ids))
+        if self.fail:
+            return None
+        return [{"id": i} for i in ids if i != "gone"]
+
+    async def get_market(self, market_id):
+        self.singles.append(market_id)
+        return {"id": market_id}
+
+    def parse_market(self, raw):
+        return {"id": f"poly_{raw['id']}", "platform": "polymarket"}
+
+
+class FakeKalshi:
+    def __init__(self):
+        self.batches = []
+
+    async def get_markets_by_tickers(self, tickers):
+        self.batches.append(list(tickers))
+        return [{"ticker": t} for t in tickers]
+
+    def parse_market(self, raw):
+        return {"id": f"kalshi_{raw['ticker']}", "platform": "kalshi"}
+
+
+def make_aggregator(polymarket=None):
+    aggregator = DataAggregator()
+    aggregator.polymarket = polymarket or FakePolymarket()
+    aggregator.kalshi = FakeKalshi()
+    aggregator.snapshot = MarketSnapshot()
+    return aggregator
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_cache():
+    await market_cache.clear()
+    yield
+    await market_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_hits_skip_upstream_and_misses_are_batched():
+    aggregator = make_aggregator()
+    aggregator.snapshot.update([{"id": "poly_1", "platform": "polymarket", "status": "open"}], None)
+
+    ids = ["poly_1", "poly_2", "poly_gone", "kalshi_A", "kalshi_B", "poly_2"]
+    found = await aggregator.get_markets_by_ids(ids)
+
+    assert set(found) == {"poly_1", "poly_2", "kalshi_A", "kalshi_B"}
+    assert aggregator.polymarket.batches == [["2", "gone"]]
+    assert aggregator.kalshi.batches == [["A", "B"]]
+
+
+@pytest.mark.asyncio
+async def test_resolve_keeps_request_order_and_reports_missing_ids():
+    aggregator = make_aggregator()
+
+    markets, missing = await aggregator.resolve_markets(["kalshi_B", "poly_gone", "poly_2", "kalshi_B"])
+
+    assert [m["id"] for m in markets] == ["kalshi_B", "poly_2"]
+    assert missing == ["poly_gone"]
+
+
+@pytest.mark.asyncio
+async def test_large_requests_are_chunked():
+    aggregator = make_aggregator()
+    ids = [f"kalshi_T{i}" for i in range(BATCH_CHUNK_SIZE + 5)]
+
+    found = await aggregator.fetch_live_markets_by_ids(ids)
+
+    assert len(found) == len(ids)
+    assert [len(b) for b in aggregator.kalshi.batches] == [BATCH_CHUNK_SIZE, 5]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_single_fetches_when_batch_query_fails():
+    polymarket = FakePolymarket(fail=True)
+    aggregator = make_aggregator(polymarket)
+
+    found = await aggregator.fetch_live_markets_by_ids(["poly_7", "poly_8"])
+
+    assert set(found) == {"poly_7", "poly_8"}
+    assert sorted(polymarket.singles) == ["7", "8"]
+    assert await market_cache.get("market_poly_7") == found["poly_7"]
@@ -0,0 +1,63 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from routers.websocket import broadcast_market_updates, manager
+from services.market_deltas import MarketDeltaTracker
+from services.market_snapshot import get_market_snapshot
+
+
+def market(market_id, probability=0.5, volume_24h=100.0):
+    return {
+        "id": market_id,
+        "platform": "polymarket",
+        "status": "open",
+        "probability": probability,
+        "volume_24h": volume_24h,
+        "title": "ignored",
+    }
+
+
+def test_first_sighting_sends_every_field_then_only_changes():
+    tracker = MarketDeltaTracker(fields=("probability", "volume_24h"))
+
+    assert tracker.diff([market("poly_1")]) == [("poly_1", 1, {"probability": 0.5, "volume_24h": 100.0})]
+    assert tracker.diff([market("poly_1")]) == []
+    assert tracker.diff([market("poly_1", probability=0.55)]) == [("poly_1", 2, {"probability": 0.55})]
+    assert tracker.snapshot("poly_1") == (2, {"probability": 0.55, "volume_24h": 100.0})
+    assert tracker.snapshot("poly_2") is None
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+
+@pytest.mark.asyncio
+async def test_updates_go_only_to_subscribers_of_that_market():
+    subscriber, bystander = RecordingSocket(), RecordingSocket()
+    await manager.connect(subscriber)
+    await manager.connect(bystander)
+    manager.subscribe(subscriber, "poly_1")
+    snapshot = get_market_snapshot()
+    snapshot.update([market("poly_1"), market("poly_2")], datetime(2024, 1, 1))
+    try:
+        await broadcast_market_updates([("poly_1", 3, {"probability": 0.6}), ("poly_2", 1, {"probability": 0.1})])
+        await asyncio.sleep(0)
+
+        assert [(f["type"], f["market_id"], f["seq"], f["changes"]) for f in subscriber.frames] == [
+            ("market_update", "poly_1", 3, {"probability": 0.6}),
+        ]
+        assert bystander.frames == []
+    finally:
+        manager.disconnect(subscriber)
+        manager.disconnect(bystander)
+        snapshot.update([], datetime(2024, 1, 1))
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from services.data_aggregator import DataAggregator
+from services.market_snapshot import MarketSnapshot
+
+T0 = datetime(2026, 3, 14, 12, 0)
+
+
+def market(market_id, platform, volume_24h, open_interest, change_24h, status="open"):
+    return {
+        "id": market_id,
+        "platform": platform,
+        "title": f"Market {market_id}",
+        "category": "Economics",
+        "status": status,
+        "probability": 0.5,
+        "price_yes": 0.5,
+        "price_no": 0.5,
+        "volume_24h": volume_24h,
+        "open_interest": open_interest,
+        "change_24h": change_24h,
+        "end_date": datetime(2026, 11, 3, tzinfo=timezone.utc),
+    }
+
+
+MARKETS = [
+    market("poly_1", "polymarket", 500.0, 100.0, -8.0),
+    market("poly_2", "polymarket", 50.0, 900.0, 1.0),
+    market("kalshi_A", "kalshi", 200.0, 300.0, 3.0, status="closed"),
+]
+
+
+def test_update_builds_leaderboards_and_stats():
+    snapshot = MarketSnapshot()
+    snapshot.update(MARKETS, T0)
+
+    assert [m["id"] for m in snapshot.leaderboard("trending", 2)] == ["poly_1", "kalshi_A"]
+    assert snapshot.leaderboard("top_oi", 1)[0]["id"] == "poly_2"
+    assert snapshot.global_stats["total_markets"] == 3
+    assert snapshot.global_stats["active_markets"] == 2
+    assert not snapshot.stale
+
+
+def test_checkpoint_round_trip_is_stale_until_refreshed(tmp_path):
+    path = str(tmp_path / "snapshot.ckpt")
+    live = MarketSnapshot()
+    live.update(MARKETS, T0)
+    live.save(path)
+
+    restored = MarketSnapshot()
+    restored.load(path)
+
+    assert restored.stale and restored.warm
+    assert restored.updated_at == T0
+    assert restored.get("poly_1")["end_date"] == MARKETS[0]["end_date"]
+    assert [m["id"] for m in restored.leaderboard("top_volume", 3)] == ["poly_1", "kalshi_A", "poly_2"]
+    assert restored.global_stats == live.global_stats
+
+    restored.update(MARKETS[:1], T0)
+    assert not restored.warm
+
+
+def test_checkpoint_sections_are_isolated_from_later_changes(tmp_path):
+    path = str(tmp_path / "snapshot.ckpt")
+    live = MarketSnapshot()
+    live.update([dict(m) for m in MARKETS], T0)
+    sections = live.sections()
+
+    # What the loop may do while a worker thread is still writing
+    live.apply_quotes({"poly_1": {"probability": 0.9}})
+    live.update([dict(m) for m in MARKETS[:1]], T0.replace(hour=13))
+    MarketSnapshot.write(path, sections)
+
+    restored = MarketSnapshot()
+    restored.load(path)
+    assert restored.updated_at == T0
+    assert len(restored.markets) == 3
+    assert restored.get("poly_1")["probability"] == 0.5
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "history.grl"
+    path.write_bytes(b"GRLH" + bytes(16))
+    with pytest.raises(ValueError):
+        MarketSnapshot().load(str(path))
+
+
+@pytest.mark.asyncio
+async def test_aggregator_serves_warm_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.ckpt")
+    live = MarketSnapshot()
+    live.update(MARKETS, T0)
+    live.save(path)
+
+    aggregator = DataAggregator()
+    aggregator.snapshot = MarketSnapshot()
+    aggregator.snapshot.load(path)
+
+    markets = await aggregator.fetch_all_markets(limit=1)
+    assert [m["id"] for m in markets] == ["poly_1"]
+
+    closed = await aggregator.fetch_all_markets(platform="kalshi", status="closed")
+    assert [m["id"] for m in closed] == ["kalshi_A"]
+
+    stats = await aggregator.get_global_stats()
+    assert stats["stale"] is True
+    assert (await aggregator.get_market_by_id("poly_2"))["open_interest"] == 900.0
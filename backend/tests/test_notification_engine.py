@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services.notification_engine import NotificationEngine
+
+T0 = datetime(2024, 1, 1)
+
+
+def market(market_id, probability=0.5, open_interest=1000.0, volume_24h=100.0, change_24h=0.0):
+    return {
+        "id": market_id,
+        "probability": probability,
+        "open_interest": open_interest,
+        "volume_24h": volume_24h,
+        "change_24h": change_24h,
+    }
+
+
+def test_spikes_compare_against_the_previous_cycle():
+    engine = NotificationEngine(cooldown=0)
+    engine.add("n1", "alice", "poly_1", "oi_spike", 20)
+    engine.add("n2", "bob", "poly_1", "volume_spike", 50)
+
+    assert engine.evaluate([market("poly_1")], T0) == []
+    alerts = engine.evaluate([market("poly_1", open_interest=1300, volume_24h=120)], T0 + timedelta(minutes=1))
+
+    assert [(a["notification_id"], a["type"]) for a in alerts] == [("n1", "oi_spike")]
+    assert alerts[0]["value"] == 30.0
+
+
+def test_price_alert_fires_on_crossing_in_either_direction():
+    engine = NotificationEngine(cooldown=0)
+    engine.add("n1", "alice", "poly_1", "price_alert", 60)  # percent, stored as 0.6
+
+    engine.evaluate([market("poly_1", probability=0.55)], T0)
+    assert len(engine.evaluate([market("poly_1", probability=0.65)], T0 + timedelta(minutes=1))) == 1
+    assert engine.evaluate([market("poly_1", probability=0.7)], T0 + timedelta(minutes=2)) == []
+    assert len(engine.evaluate([market("poly_1", probability=0.5)], T0 + timedelta(minutes=3))) == 1
+
+
+def test_fires_once_while_condition_holds_and_respects_cooldown():
+    engine = NotificationEngine(cooldown=3600)
+    engine.add("n1", "alice", "poly_1", "probability_change", 5)
+
+    assert len(engine.evaluate([market("poly_1", change_24h=-6)], T0)) == 1
+    assert engine.evaluate([market("poly_1", change_24h=-7)], T0 + timedelta(minutes=1)) == []
+    engine.evaluate([market("poly_1", change_24h=1)], T0 + timedelta(minutes=2))
+    # Condition re-armed, but still inside the cooldown
+    assert engine.evaluate([market("poly_1", change_24h=8)], T0 + timedelta(minutes=3)) == []
+    assert len(engine.evaluate([market("poly_1", change_24h=1)], T0 + timedelta(hours=2))) == 0
+    assert len(engine.evaluate([market("poly_1", change_24h=9)], T0 + timedelta(hours=2, minutes=1))) == 1
+
+
+def test_duplicate_rules_produce_one_alert_and_missing_markets_never_fire():
+    engine = NotificationEngine(cooldown=0)
+    engine.add("n1", "alice", "poly_1", "probability_change", 5)
+    engine.add("n2", "alice", "poly_1", "probability_change", 3)
+    engine.add("n3", "bob", "kalshi_X", "probability_change", 1)
+
+    alerts = engine.evaluate([market("poly_1", change_24h=10)], T0)
+    assert [a["notification_id"] for a in alerts] == ["n1"]
+
+
+def test_remove_compact_and_reload_keep_state_consistent():
+    engine = NotificationEngine(cooldown=3600)
+    engine.load([
+        ("n1", "alice", "poly_1", "probability_change", 5),
+        ("n2", "bob", "poly_2", "probability_change", 5),
+    ])
+    assert len(engine.evaluate([market("poly_1", change_24h=6)], T0)) == 1
+
+    engine.remove("n2")
+    engine.compact()
+    assert engine.stats()["rules"] == 1
+    assert engine.positions == {"n1": 0}
+
+    # n1 keeps its cooldown across a reload; the new rule starts fresh
+    engine.load([
+        ("n1", "alice", "poly_1", "probability_change", 5),
+        ("n3", "carol", "poly_1", "probability_change", 5),
+    ])
+    engine.evaluate([market("poly_1", change_24h=0)], T0 + timedelta(minutes=1))
+    alerts = engine.evaluate([market("poly_1", change_24h=6)], T0 + timedelta(minutes=2))
+    assert [a["notification_id"] for a in alerts] == ["n3"]
+
+
+def test_holding_state_and_last_values_survive_a_missed_cycle():
+    engine = NotificationEngine(cooldown=0, market_window=3600)
+    engine.add("n1", "alice", "poly_1", "probability_change", 5)
+    engine.add("n2", "bob", "poly_1", "oi_spike", 20)
+
+    assert len(engine.evaluate([market("poly_1", change_24h=6)], T0)) == 1
+    assert engine.evaluate([], T0 + timedelta(minutes=1)) == []
+    # Still past the threshold, and open interest is compared with the last seen value
+    alerts = engine.evaluate([market("poly_1", change_24h=7, open_interest=1300)], T0 + timedelta(minutes=2))
+    assert [a["notification_id"] for a in alerts] == ["n2"]
+
+    # Gone longer than the window: the market starts over
+    engine.evaluate([], T0 + timedelta(hours=2))
+    assert np.isnan(engine.previous["seen_at"][0])
+    alerts = engine.evaluate([market("poly_1", change_24h=7, open_interest=2000)], T0 + timedelta(hours=2, minutes=1))
+    assert [a["notification_id"] for a in alerts] == ["n1"]
+
+
+def test_market_index_only_keeps_markets_with_live_rules():
+    engine = NotificationEngine(cooldown=0)
+    engine.load([
+        ("n1", "alice", "poly_1", "price_alert", 0.6),
+        ("n2", "bob", "poly_2", "price_alert", 0.6),
+    ])
+    engine.evaluate([market("poly_1", probability=0.5), market("poly_2", probability=0.5)], T0)
+
+    engine.load([("n2", "bob", "poly_2", "price_alert", 0.6), ("n3", "carol", "poly_3", "price_alert", 0.6)])
+    assert engine.market_index == {"poly_2": 0, "poly_3": 1}
+
+    # poly_2 kept its last probability through the reindex, so the crossing is seen
+    alerts = engine.evaluate([market("poly_2", probability=0.7)], T0 + timedelta(minutes=1))
+    assert [(a["notification_id"], a["market_id"]) for a in alerts] == [("n2", "poly_2")]
@@ -0,0 +1,139 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+import websockets
+
+from routers.websocket import apply_quotes, manager
+from services.backplane import LocalBackplane
+from services.market_snapshot import get_market_snapshot
+from services.polymarket_stream import PolymarketStream
+
+
+class FakeMarketFeed:
+    """Local stand-in for the CLOB market channel."""
+
+    def __init__(self):
+        self.subscriptions = []
+        self.connections = []
+
+    async def handler(self, ws):
+        self.connections.append(ws)
+        async for message in ws:
+            if message == "PING":
+                await ws.send("PONG")
+            else:
+                self.subscriptions.append(json.loads(message))
+
+    async def send(self, events):
+        await self.connections[-1].send(json.dumps(events))
+
+
+async def eventually(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def poly(market_id, tokens, **fields):
+    return {"id": market_id, "platform": "polymarket", "clob_token_ids": tokens, **fields}
+
+
+def test_quotes_follow_the_book_midpoint_then_last_trade():
+    stream = PolymarketStream()
+    stream.token_markets = {"y1": "poly_1"}
+
+    stream.handle_message(json.dumps([{
+        "event_type": "book",
+        "asset_id": "y1",
+        "bids": [{"price": "0.48", "size": "100"}, {"price": "0.47", "size": "5"}],
+        "asks": [{"price": "0.52", "size": "40"}],
+    }]))
+    assert stream.take_quotes() == {"poly_1": {"probability": 0.5, "price_yes": 0.5, "price_no": 0.5}}
+
+    stream.handle_event({
+        "event_type": "price_change",
+        "market": "0xabc",
+        "price_changes": [
+            {"asset_id": "y1", "price": "0.52", "size": "0", "side": "SELL"},
+            {"asset_id": "n1", "price": "0.5", "size": "10", "side": "BUY"},
+        ],
+    })
+    stream.handle_event({"event_type": "last_trade_price", "asset_id": "y1", "price": "0.49"})
+    # No asks left: the last trade is the quote; the NO token is ignored
+    assert stream.take_quotes() == {"poly_1": {"probability": 0.49, "price_yes": 0.49, "price_no": 0.51}}
+    assert set(stream.books) == {"y1"}
+    assert stream.take_quotes() == {}
+
+
+@pytest.mark.asyncio
+async def test_stream_publishes_quotes_and_resubscribes_after_reconnect():
+    feed = FakeMarketFeed()
+    async with websockets.serve(feed.handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        stream = PolymarketStream(f"ws://127.0.0.1:{port}", flush_interval=0.01, reconnect_delay=0.01)
+        stream.backplane = LocalBackplane()
+        published = []
+
+        async def record(envelope):
+            published.append(envelope)
+
+        stream.backplane.subscribe(record)
+        await stream.track([poly("poly_1", ["y1", "n1"]), poly("poly_2", ["y2", "n2"]), {"id": "kalshi_A", "platform": "kalshi"}])
+        stream.start()
+        try:
+            await eventually(lambda: stream.connected and feed.subscriptions)
+            assert feed.subscriptions == [{"type": "market", "assets_ids": ["y1", "y2"]}]
+
+            await feed.send({"event_type": "last_trade_price", "asset_id": "y2", "price": "0.3"})
+            await eventually(lambda: published)
+            assert published[0]["kind"] == "quotes"
+            assert published[0]["quotes"] == {"poly_2": {"probability": 0.3, "price_yes": 0.3, "price_no": 0.7}}
+
+            await stream.track([poly("poly_1", ["y1", "n1"]), poly("poly_3", ["y3", "n3"])])
+            await eventually(lambda: len(feed.subscriptions) == 3)
+            assert feed.subscriptions[1:] == [
+                {"assets_ids": ["y3"], "operation": "subscribe"},
+                {"assets_ids": ["y2"], "operation": "unsubscribe"},
+            ]
+
+            await feed.connections[-1].close()
+            await eventually(lambda: len(feed.connections) == 2 and len(feed.subscriptions) == 4)
+            assert feed.subscriptions[-1] == {"type": "market", "assets_ids": ["y1", "y3"]}
+        finally:
+            await stream.stop()
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+
+@pytest.mark.asyncio
+async def test_streamed_quotes_update_the_snapshot_and_reach_subscribers():
+    snapshot = get_market_snapshot()
+    market = poly("poly_q", ["yq", "nq"], title="Q", category="Politics", status="open", probability=0.4,
+                  price_yes=0.4, price_no=0.6, open_interest=1.0, volume_24h=1.0)
+    snapshot.update([market], datetime(2024, 1, 1))
+    socket = RecordingSocket()
+    await manager.connect(socket)
+    manager.subscribe(socket, "poly_q")
+    try:
+        await apply_quotes({"kind": "quotes", "quotes": {"poly_q": {"probability": 0.45, "price_yes": 0.45, "price_no": 0.55}}})
+        await asyncio.sleep(0)
+
+        assert snapshot.get("poly_q")["probability"] == 0.45
+        [update] = socket.frames
+        assert update["type"] == "market_update"
+        assert update["changes"]["probability"] == 0.45
+    finally:
+        manager.disconnect(socket)
+        snapshot.update([], datetime(2024, 1, 1))
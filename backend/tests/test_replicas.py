@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from database.replicas import ReplicaRouter
+
+
+def make_router(lags, max_lag=5.0):
+    router = ReplicaRouter(
+        [f"postgresql://replica{i}/db" for i in range(len(lags))],
+        max_lag=max_lag,
+        timeout=0.05,
+    )
+    for replica, lag in zip(router.replicas, lags):
+        async def measure_lag(lag=lag):
+            if isinstance(lag, Exception):
+                raise lag
+            if lag == "hang":
+                await asyncio.sleep(1)
+            return lag
+
+        replica.measure_lag = measure_lag
+    return router
+
+
+@pytest.mark.asyncio
+async def test_replicas_are_unused_until_checked():
+    router = make_router([0.0])
+    assert router.choose() is None
+
+    await router.check_all()
+    assert router.choose() is router.replicas[0]
+
+
+@pytest.mark.asyncio
+async def test_lagging_failing_and_slow_replicas_are_skipped():
+    router = make_router([0.5, 30.0, ConnectionRefusedError("down"), "hang"])
+    await router.check_all()
+
+    healthy, lagging, down, slow = router.replicas
+    assert healthy.healthy and healthy.lag_seconds == 0.5
+    assert not lagging.healthy and "lag" in lagging.last_error
+    assert not down.healthy and down.last_error == "down"
+    assert not slow.healthy and slow.lag_seconds is None
+    assert {router.choose() for _ in range(4)} == {healthy}
+
+
+@pytest.mark.asyncio
+async def test_reads_round_robin_and_fall_back_to_primary():
+    router = make_router([0.0, 1.0])
+    await router.check_all()
+    assert {router.choose() for _ in range(4)} == set(router.replicas)
+
+    for replica in router.replicas:
+        replica.measure_lag = lambda: asyncio.sleep(0, result=60.0)
+    await router.check_all()
+    assert router.choose() is None
+
+
+def test_history_without_a_database_never_builds_an_engine(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from database import connection
+    from routers import markets_router
+
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(connection, "_engine", None)
+    client = TestClient(FastAPI(routes=markets_router.routes))
+
+    response = client.get("/api/markets/poly_none/history")
+
+    assert response.status_code == 200 and response.json()["data"] == []
+    assert connection._engine is None
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from database.crud import build_rollup_upsert
+from services.rollups import (
+    ROLLUP_RESOLUTIONS,
+    bucket_start,
+    build_rollup_rows,
+    resolve_timeframe,
+)
+
+
+def test_bucket_start_aligns_to_resolution():
+    ts = datetime(2026, 3, 14, 15, 26, 53, 589)
+
+    assert bucket_start(ts, "1m") == datetime(2026, 3, 14, 15, 26)
+    assert bucket_start(ts, "15m") == datetime(2026, 3, 14, 15, 15)
+    assert bucket_start(ts, "1h") == datetime(2026, 3, 14, 15)
+    assert bucket_start(ts, "1d") == datetime(2026, 3, 14)
+
+
+def test_thirty_day_timeframe_reads_hourly_buckets():
+    now = datetime(2026, 3, 14, 15, 26)
+    resolution, start = resolve_timeframe("30d", now)
+
+    assert resolution == "1h"
+    assert (now - start) // ROLLUP_RESOLUTIONS[resolution] == 720
+
+
+def test_unknown_timeframe_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_timeframe("5y", datetime.utcnow())
+
+
+def test_build_rollup_rows_emits_one_bucket_per_resolution():
+    ts = datetime(2026, 3, 14, 15, 26, 53)
+    rows = build_rollup_rows(
+        [{"id": "poly_1", "probability": 0.42, "open_interest": 1000, "volume_24h": 50, "volume": 75}],
+        ts,
+    )
+
+    assert [r["resolution"] for r in rows] == list(ROLLUP_RESOLUTIONS)
+    assert all(r["probability_open"] == r["probability_close"] == 0.42 for r in rows)
+    assert rows[0]["open_interest_high"] == 1000
+    assert rows[0]["volume_low"] == 50
+    assert rows[0]["bucket_start"] == ts - timedelta(seconds=53)
+
+
+def test_rollup_upsert_merges_high_low_close():
+    rows = build_rollup_rows([{"id": "kalshi_X", "probability": 0.5}], datetime(2026, 1, 1))
+    sql = str(build_rollup_upsert(rows).compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (market_id, resolution, bucket_start) DO UPDATE" in sql
+    assert "greatest(market_rollups.probability_high, excluded.probability_high)" in sql
+    assert "least(market_rollups.volume_low, excluded.volume_low)" in sql
+    assert "probability_open = " not in sql
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from services.snapshot_archive import SnapshotArchive
+
+T0 = datetime(2026, 3, 14, 23, 50)
+
+
+def snapshot(market_id, probability, open_interest=1000.0):
+    return {
+        "id": market_id,
+        "platform": "polymarket" if market_id.startswith("poly_") else "kalshi",
+        "title": f"Market {market_id}",
+        "category": "Economics",
+        "status": "open",
+        "probability": probability,
+        "open_interest": open_interest,
+        "volume_24h": 10.0,
+        "outcomes": ["Yes", "No"],
+        "end_date": None,
+    }
+
+
+def fill(archive, minutes=20):
+    for i in range(minutes):
+        archive.append(
+            [snapshot("poly_1", 0.5 + i / 100, 1000 + i), snapshot("kalshi_X", 0.2)],
+            T0 + timedelta(minutes=i),
+        )
+    archive.flush()
+
+
+def test_snapshots_are_partitioned_by_date(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), flush_cycles=5)
+    fill(archive)
+
+    stats = archive.stats()
+    assert stats["partitions"] == 2
+    assert (stats["first_date"], stats["last_date"]) == ("2026-03-14", "2026-03-15")
+    assert stats["rows_written"] == 40
+
+
+def test_read_filters_by_market_and_time_range(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), flush_cycles=5)
+    fill(archive)
+
+    table = archive.read(
+        ["poly_1"],
+        start=T0 + timedelta(minutes=8),
+        end=T0 + timedelta(minutes=12),
+        columns=["snapshot_ts", "id", "probability"],
+    )
+
+    assert table.column("id").to_pylist() == ["poly_1"] * 5
+    assert table.column("probability").to_pylist() == pytest.approx([0.58, 0.59, 0.60, 0.61, 0.62])
+
+
+def test_rollups_bucket_archived_samples(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), flush_cycles=50)
+    fill(archive)
+
+    buckets = archive.rollups("poly_1", "15m")
+
+    assert [b["bucket_start"] for b in buckets] == [
+        datetime(2026, 3, 14, 23, 45),
+        datetime(2026, 3, 15, 0, 0),
+    ]
+    assert buckets[0]["samples"] == 10
+    assert buckets[0]["probability_open"] == pytest.approx(0.50)
+    assert buckets[0]["probability_close"] == pytest.approx(0.59)
+    assert buckets[1]["open_interest_high"] == pytest.approx(1019)
+
+
+def test_missing_archive_reads_empty(tmp_path):
+    archive = SnapshotArchive(str(tmp_path / "none"))
+
+    assert archive.read().num_rows == 0
+    assert archive.rollups("poly_1", "1h") == []
+
+
+def test_append_only_closes_batches_for_the_writer(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), flush_cycles=3)
+    for i in range(12):
+        archive.append([snapshot("poly_1", 0.5)], T0 + timedelta(minutes=i))
+
+    # 23:50-52, 23:53-55 and 23:56-58 are full, midnight closes 23:59; 00:00-01 is open
+    assert archive.due and archive.files_written == 0
+    assert len(archive.write_closed()) == 4
+    assert not archive.due and archive.stats()["buffered_cycles"] == 2
+    assert archive.flush().endswith("snapshots-000000-2.parquet")
+
+
+def test_a_write_interrupted_mid_file_is_invisible_to_scans(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), flush_cycles=5)
+    fill(archive)
+    partition = tmp_path / "date=2026-03-15"
+    (partition / ".snapshots-000500-5.parquet.tmp").write_bytes(b"PAR1 truncated")
+
+    assert archive.read(["poly_1"]).num_rows == 20
+    # Completed writes leave no temp files behind
+    assert sorted(p.name for p in partition.iterdir() if p.name.startswith(".")) == [".snapshots-000500-5.parquet.tmp"]
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services.timeseries_store import TimeSeriesStore
+
+T0 = datetime(2026, 3, 14, 12, 0)
+
+
+def snapshot(market_id, probability, open_interest=0.0, volume=0.0):
+    return {"id": market_id, "probability": probability, "open_interest": open_interest, "volume_24h": volume}
+
+
+def test_ring_buffer_overwrites_oldest_samples():
+    store = TimeSeriesStore(max_markets=4, retention_hours=5 / 60, sample_seconds=60)
+    for i in range(8):
+        store.append_snapshot([snapshot("poly_1", i / 10)], T0 + timedelta(minutes=i))
+
+    window = store.window("poly_1")
+
+    assert store.slots == 5
+    assert np.allclose(window["probability"], [0.3, 0.4, 0.5, 0.6, 0.7])
+    assert window["timestamp"][0] < window["timestamp"][-1]
+
+
+def test_window_filters_by_time_range():
+    store = TimeSeriesStore(max_markets=4, retention_hours=1, sample_seconds=60)
+    for i in range(10):
+        store.append("kalshi_X", T0 + timedelta(minutes=i), probability=i / 10, volume=i)
+
+    window = store.window("kalshi_X", start=T0 + timedelta(minutes=3), end=T0 + timedelta(minutes=5))
+
+    assert np.allclose(window["volume"], [3, 4, 5])
+    assert len(store.window("unknown")["timestamp"]) == 0
+
+
+def test_values_at_picks_latest_sample_before_time_for_many_markets():
+    store = TimeSeriesStore(max_markets=4, retention_hours=1, sample_seconds=60)
+    for i in range(5):
+        store.append_snapshot(
+            [snapshot("a", 0.1 * i), snapshot("b", 0.5 + 0.1 * i)],
+            T0 + timedelta(minutes=i),
+        )
+
+    values = store.values_at(["a", "missing", "b"], T0 + timedelta(minutes=2, seconds=30))
+    before_any = store.values_at(["a"], T0 - timedelta(minutes=1))
+
+    assert np.allclose(values[[0, 2]], [0.2, 0.7])
+    assert np.isnan(values[1])
+    assert np.isnan(before_any[0])
+
+
+def test_values_at_ignores_samples_older_than_max_age():
+    store = TimeSeriesStore(max_markets=4, retention_hours=1, sample_seconds=60)
+    store.append_snapshot([snapshot("a", 0.1)], T0)
+    store.append_snapshot([snapshot("b", 0.2)], T0 + timedelta(minutes=9))
+
+    values = store.values_at(["a", "b"], T0 + timedelta(minutes=10), max_age=timedelta(minutes=2))
+
+    assert np.isnan(values[0])
+    assert np.isclose(values[1], 0.2)
+
+
+def test_memory_is_fixed_and_stale_markets_are_evicted():
+    store = TimeSeriesStore(max_markets=2, retention_hours=1, sample_seconds=60)
+    allocated = store.memory_bytes
+
+    store.append_snapshot([snapshot("a", 0.1)], T0)
+    store.append_snapshot([snapshot("b", 0.2)], T0 + timedelta(minutes=1))
+    store.append_snapshot([snapshot("c", 0.3)], T0 + timedelta(minutes=2))
+
+    assert store.memory_bytes == allocated
+    assert set(store.index) == {"b", "c"}
+    assert store.stats()["evictions"] == 1
+
+
+def test_markets_written_in_the_same_batch_are_never_evicted():
+    store = TimeSeriesStore(max_markets=3, retention_hours=1, sample_seconds=60)
+    store.append_snapshot([snapshot(m, 0.1) for m in "abc"], T0)
+    store.append_snapshot([snapshot(m, 0.2) for m in "abcd"], T0 + timedelta(minutes=1))
+
+    assert set(store.index) == {"a", "b", "c"}
+    assert all(len(store.window(m)["timestamp"]) == 2 for m in "abc")
+    assert store.stats()["skipped"] == 1
+    assert store.stats()["evictions"] == 0
+
+    # Next cycle without "c": its row is the stalest and goes to "d"
+    store.append_snapshot([snapshot(m, 0.3) for m in "abd"], T0 + timedelta(minutes=2))
+    assert set(store.index) == {"a", "b", "d"}
+    assert len(store.window("a")["timestamp"]) == 3
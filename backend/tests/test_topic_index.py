@@ -0,0 +1,55 @@
+from services.topic_index import TopicIndex, parse_topic
+from services.watchlist_index import WatchlistIndex
+
+
+def market(market_id, platform="kalshi", category="Economics"):
+    return {"id": market_id, "platform": platform, "category": category}
+
+
+def test_parse_topic_normalizes_and_rejects():
+    assert parse_topic("platform:Kalshi") == "platform:kalshi"
+    assert parse_topic("category:Economics") == "category:economics"
+    assert parse_topic("top:trending:10") == "top:trending:10"
+    assert parse_topic("watchlist") == "watchlist"
+    assert parse_topic("top:trending:500") is None
+    assert parse_topic("platform:manifold") is None
+    assert parse_topic("market:") is None
+
+
+def test_match_routes_by_platform_category_and_market():
+    index = TopicIndex(WatchlistIndex())
+    index.subscribe("a", "platform:kalshi")
+    index.subscribe("b", "category:economics")
+    index.subscribe("c", "market:poly_1")
+    index.subscribe("d", "platform:polymarket")
+
+    no_users = lambda user_id: ()
+    assert index.match(market("kalshi_X"), no_users) == {"a", "b"}
+    assert index.match(market("poly_1", "polymarket", "Sports"), no_users) == {"c", "d"}
+
+
+def test_watchlist_and_top_k_topics():
+    watchlists = WatchlistIndex()
+    watchlists.load([("alice", ["kalshi_X"])])
+    index = TopicIndex(watchlists)
+    index.subscribe("alice_socket", "watchlist")
+    index.subscribe("top3", "top:top_oi:3")
+    index.update_ranks({"top_oi": [{"id": "kalshi_Y"}, {"id": "kalshi_X"}]})
+
+    sockets = {"alice": ["alice_socket"]}
+    assert index.match(market("kalshi_X"), lambda u: sockets.get(u, ())) == {"alice_socket", "top3"}
+    index.update_ranks({"top_oi": [{"id": f"m{i}"} for i in range(3)] + [{"id": "kalshi_X"}]})
+    assert index.match(market("kalshi_X"), lambda u: sockets.get(u, ())) == {"alice_socket"}
+    assert index.matches("watchlist", market("kalshi_X"), "alice")
+
+
+def test_remove_only_touches_the_subscribers_topics():
+    index = TopicIndex(WatchlistIndex())
+    index.subscribe("a", "platform:kalshi")
+    index.subscribe("a", "top:trending:5")
+    index.subscribe("b", "platform:kalshi")
+
+    index.remove("a")
+    assert index.subscribers == {"platform:kalshi": {"b"}}
+    assert index.top_topics == set()
+    assert "a" not in index.topics_by_subscriber
@@ -0,0 +1,48 @@
+from sqlalchemy.dialects import postgresql
+
+from database.crud import build_watchlist_add, build_watchlist_remove, build_watchlist_upsert
+from services.watchlist_index import WatchlistIndex
+
+
+def test_reverse_index_tracks_adds_and_removes():
+    index = WatchlistIndex()
+    index.add("alice", "poly_1")
+    index.add("bob", "poly_1")
+    index.add("bob", "kalshi_X")
+
+    assert index.watchers("poly_1") == {"alice", "bob"}
+    assert index.watched_markets() == {"poly_1", "kalshi_X"}
+
+    index.remove("bob", "kalshi_X")
+    assert index.watchers("kalshi_X") == set()
+    assert "kalshi_X" not in index.users_by_market
+    assert index.stats() == {"users": 2, "markets": 1, "entries": 2}
+
+
+def test_set_watchlist_replaces_a_users_entries():
+    index = WatchlistIndex()
+    index.load([("alice", ["poly_1", "poly_2"]), ("bob", None)])
+
+    index.set_watchlist("alice", ["poly_2", "kalshi_X"])
+    assert index.markets_by_user["alice"] == {"poly_2", "kalshi_X"}
+    assert index.watchers("poly_1") == set()
+
+    index.set_watchlist("alice", [])
+    assert index.stats()["users"] == 0
+
+
+def compiled(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_watchlist_mutations_are_single_statements():
+    upsert = compiled(build_watchlist_upsert("alice", ["poly_1"]))
+    assert "ON CONFLICT (user_id) DO UPDATE" in upsert and "RETURNING" in upsert
+
+    add = compiled(build_watchlist_add("alice", "poly_1"))
+    assert "array_append" in add
+    assert "WHERE NOT" in add and "@>" in add
+
+    remove = compiled(build_watchlist_remove("alice", "poly_1"))
+    assert remove.startswith("UPDATE watchlists SET market_ids=array_remove")
+    assert "RETURNING" in remove
@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import pytest
+
+from routers.websocket import ConnectionManager, PeriodicBroadcaster, build_periodic_messages
+from utils.ws_frames import Frame
+
+
+class FakeSocket:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("closed")
+        self.frames.append(text)
+
+
+def test_periodic_messages_are_encoded_once():
+    stats_frame, trending_frame = build_periodic_messages(
+        {"total_markets": 2},
+        [{"id": "poly_1", "title": "A", "probability": 0.4, "change_24h": 1.5, "volume_24h": 10}],
+    )
+
+    assert json.loads(stats_frame.text)["data"] == {"total_markets": 2}
+    trending = json.loads(trending_frame.text)
+    assert trending["type"] == "trending_update"
+    assert trending["data"] == [{"id": "poly_1", "title": "A", "probability": 0.4, "change_24h": 1.5}]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_frame_sends_the_same_frame_to_every_socket():
+    manager = ConnectionManager()
+    healthy, broken, other = FakeSocket(), FakeSocket(fail=True), FakeSocket()
+    for socket in (healthy, broken, other):
+        await manager.connect(socket)
+
+    await manager.broadcast_frame(Frame({"type": "stats_update"}))
+    await asyncio.sleep(0)
+
+    assert healthy.frames == ['{"type": "stats_update"}']
+    assert other.frames == healthy.frames
+    for socket in (healthy, broken, other):
+        manager.disconnect(socket)
+
+
+@pytest.mark.asyncio
+async def test_tick_without_connections_skips_the_fetch():
+    broadcaster = PeriodicBroadcaster(ConnectionManager())
+    # Would hit the upstream APIs if it did not return early
+    await broadcaster.tick()
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+
+from routers.websocket import ClientConnection, ConnectionManager
+from utils.ws_frames import Frame
+
+
+class GatedSocket:
+    """Socket whose sends block until the test opens the gate."""
+
+    def __init__(self):
+        self.frames = []
+        self.gate = asyncio.Event()
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.frames.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_full_queue_conflates_keyed_frames_and_drops_the_rest():
+    client = ClientConnection(GatedSocket(), max_size=2)
+
+    assert client.put(Frame({"n": "a1"}), key="poly_1")
+    assert client.put(Frame({"n": "b1"}), key="poly_2")
+    assert client.put(Frame({"n": "a2"}), key="poly_1")
+    assert not client.put(Frame({"n": "stats"}))
+
+    assert [frame.message["n"] for _, frame in client.queue] == ["a2", "b1"]
+
+
+@pytest.mark.asyncio
+async def test_writer_sends_idle_frames_at_once_and_batches_the_backlog():
+    socket = GatedSocket()
+    socket.gate.set()
+    client = ClientConnection(socket, max_size=8, batch_window=0.05)
+    client.start()
+
+    client.put(Frame({"n": 1}))
+    await asyncio.sleep(0.01)
+    for n in (2, 3, 4):
+        client.put(Frame({"n": n}))
+    await asyncio.sleep(0.06)
+
+    assert [json.loads(f) for f in socket.frames] == [
+        {"n": 1},
+        {"type": "batch", "messages": [{"n": 2}, {"n": 3}, {"n": 4}]},
+    ]
+    client.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_forgiven_once_the_writer_takes_it():
+    socket = GatedSocket()
+    client = ClientConnection(socket, max_size=2, slow_after=0.02, batch_window=0)
+    client.start()
+
+    client.put(Frame({"n": 1}))
+    await asyncio.sleep(0)
+    # The writer is stuck sending frame 1 while the queue fills behind it
+    client.put(Frame({"n": 2}))
+    client.put(Frame({"n": 3}))
+    client.put(Frame({"n": 4}))
+    await asyncio.sleep(0.03)
+    assert client.slow
+
+    socket.gate.set()
+    await asyncio.sleep(0.01)
+    assert client.full_since is None and not client.slow
+    assert len(socket.frames) == 2
+    client.stop()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_block_others_and_gets_disconnected():
+    manager = ConnectionManager()
+    slow, fast = GatedSocket(), GatedSocket()
+    fast.gate.set()
+    await manager.connect(slow)
+    await manager.connect(fast)
+    manager.clients[slow].max_size = 2
+    manager.clients[slow].slow_after = -1
+
+    for i in range(3):
+        await manager.broadcast({"type": "tick", "n": i})
+    await asyncio.sleep(0.01)
+
+    [batch] = [json.loads(f) for f in fast.frames]
+    assert [m["n"] for m in batch["messages"]] == [0, 1, 2]
+    assert slow not in manager.clients
+    assert slow.closed_with == 1013
+    assert manager.stats()["connections"] == 1
+    manager.disconnect(fast)
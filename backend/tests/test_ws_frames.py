@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import msgpack
+import pytest
+
+from routers.websocket import ConnectionManager
+from utils.ws_frames import (
+    JSON_SUBPROTOCOL,
+    MSGPACK_SUBPROTOCOL,
+    Frame,
+    decode_client_message,
+    encode_batch,
+    negotiate_format,
+)
+
+
+def test_batches_splice_the_encoded_messages():
+    frames = [Frame({"type": "market_update", "seq": 1}), Frame({"type": "market_update", "seq": 2})]
+
+    assert json.loads(encode_batch(frames, binary=False)) == {
+        "type": "batch",
+        "messages": [{"type": "market_update", "seq": 1}, {"type": "market_update", "seq": 2}],
+    }
+    assert msgpack.unpackb(encode_batch(frames, binary=True)) == {
+        "type": "batch",
+        "messages": [{"type": "market_update", "seq": 1}, {"type": "market_update", "seq": 2}],
+    }
+    assert encode_batch(frames[:1], binary=False) == frames[0].text
+
+
+def test_format_negotiation():
+    assert negotiate_format([MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL], None) == (MSGPACK_SUBPROTOCOL, True)
+    # Never echo a subprotocol the client did not offer
+    assert negotiate_format([], "msgpack") == (None, True)
+    assert negotiate_format([JSON_SUBPROTOCOL], "msgpack") == (None, True)
+    assert negotiate_format([JSON_SUBPROTOCOL], None) == (JSON_SUBPROTOCOL, False)
+    assert negotiate_format([], None) == (None, False)
+
+
+def test_client_messages_decode_from_either_format():
+    assert decode_client_message({"text": '{"type": "ping"}'}) == {"type": "ping"}
+    assert decode_client_message({"bytes": msgpack.packb({"type": "ping"})}) == {"type": "ping"}
+    with pytest.raises(ValueError):
+        decode_client_message({"text": "[1]"})
+    with pytest.raises(ValueError):
+        decode_client_message({"text": "not json"})
+
+
+class BinarySocket:
+    def __init__(self):
+        self.subprotocol = None
+        self.frames = []
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+    async def send_bytes(self, data):
+        self.frames.append(msgpack.unpackb(data))
+
+
+@pytest.mark.asyncio
+async def test_msgpack_clients_receive_binary_frames():
+    manager = ConnectionManager()
+    socket = BinarySocket()
+    await manager.connect(socket, MSGPACK_SUBPROTOCOL)
+
+    await manager.broadcast({"type": "stats_update", "data": {"total_markets": 2}})
+    await asyncio.sleep(0)
+
+    assert socket.subprotocol == MSGPACK_SUBPROTOCOL
+    assert socket.frames == [{"type": "stats_update", "data": {"total_markets": 2}}]
+    manager.disconnect(socket)
+
+
+@pytest.mark.asyncio
+async def test_format_query_switches_to_binary_without_a_subprotocol():
+    manager = ConnectionManager()
+    socket = BinarySocket()
+    await manager.connect(socket, *negotiate_format([], "msgpack"))
+
+    await manager.broadcast({"type": "stats_update", "data": {}})
+    await asyncio.sleep(0)
+
+    assert socket.subprotocol is None
+    assert socket.frames == [{"type": "stats_update", "data": {}}]
+    manager.disconnect(socket)
+
+
+def test_text_frames_are_ascii_so_length_counts_bytes():
+    frames = [Frame({"type": "market_update", "title": "Élection — 2026 ✓"}), Frame({"type": "ping"})]
+    payload = encode_batch(frames, binary=False)
+    assert len(payload) == len(payload.encode("utf-8"))
@@ -1,3 +1,4 @@
 from utils.cache import market_cache, history_cache, stats_cache, cached
+from utils.metrics import metrics
 
-__all__ = ["market_cache", "history_cache", "stats_cache", "cached"]
+__all__ = ["market_cache", "history_cache", "stats_cache", "cached", "metrics"]
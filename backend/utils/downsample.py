@@ -0,0 +1,68 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Select indices with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    selected point and the mean of the next bucket. Triangle areas within a
+    bucket and all bucket means are computed with array operations, so the
+    Python loop runs once per output point rather than once per input point.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket i covers [edges[i], edges[i + 1]) of the interior points
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # Mean of every bucket from prefix sums; the last bucket looks ahead to the final point
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    widths = edges[1:] - edges[:-1]
+    next_x = np.append((cx[edges[2:]] - cx[edges[1:-1]]) / widths[1:], x[-1])
+    next_y = np.append((cy[edges[2:]] - cy[edges[1:-1]]) / widths[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        areas = np.abs(
+            (x[a] - next_x[i]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y[i] - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample_columns(
+    columns: Dict[str, Sequence[float]],
+    x_key: str,
+    y_key: str,
+    threshold: int,
+) -> Dict[str, List[float]]:
+    """Downsample aligned column arrays, choosing points by the (x_key, y_key) series."""
+    arrays = {key: np.asarray(values, dtype=np.float64) for key, values in columns.items()}
+    indices = lttb_indices(arrays[x_key], arrays[y_key], threshold)
+    return {key: values[indices].tolist() for key, values in arrays.items()}
+
+
+def downsample_series(columns: Dict[str, Sequence[float]], threshold: int) -> Dict[str, list]:
+    """Downsample chart columns keyed by ``timestamp`` (epoch seconds) and ``probability``."""
+    if not columns.get("timestamp"):
+        return {key: [] for key in columns}
+    sampled = downsample_columns(columns, "timestamp", "probability", threshold)
+    sampled["timestamp"] = [int(ts) for ts in sampled["timestamp"]]
+    return sampled
@@ -0,0 +1,238 @@
+"""Gorilla-style compression for time-series blocks.
+
+Timestamps (integer seconds) are stored as delta-of-deltas with variable
+length prefixes; float64 values are XORed with their predecessor and only
+the meaningful bits are written, reusing the previous leading/trailing
+zero window when it still fits. Regularly sampled prices that rarely move
+compress to a couple of bits per sample.
+
+Block layout (little-endian)::
+
+    magic "GRL1" | count u32 | n_columns u16
+    timestamps: section_len u32 | bits
+    per column: name_len u16 | name utf-8 | section_len u32 | bits
+"""
+import struct
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"GRL1"
+_HEADER = struct.Struct("<4sIH")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+# (prefix bits, prefix length, payload bits) for delta-of-delta ranges
+_DOD_CLASSES = (
+    (0b10, 2, 7),
+    (0b110, 3, 9),
+    (0b1110, 4, 12),
+)
+_DOD_FALLBACK = (0b1111, 4, 64)
+_MASK64 = (1 << 64) - 1
+
+
+class BitWriter:
+    """Append-only bit stream backed by a bytearray."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self._acc = 0
+        self._nbits = 0
+
+    def write(self, value: int, nbits: int) -> None:
+        self._acc = (self._acc << nbits) | (value & ((1 << nbits) - 1))
+        self._nbits += nbits
+        while self._nbits >= 8:
+            self._nbits -= 8
+            self.buffer.append((self._acc >> self._nbits) & 0xFF)
+        self._acc &= (1 << self._nbits) - 1
+
+    def to_bytes(self) -> bytes:
+        if self._nbits:
+            return bytes(self.buffer) + bytes([(self._acc << (8 - self._nbits)) & 0xFF])
+        return bytes(self.buffer)
+
+
+class BitReader:
+    """Sequential reader over a bit stream produced by BitWriter."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def read(self, nbits: int) -> int:
+        start = self.pos >> 3
+        end = (self.pos + nbits + 7) >> 3
+        chunk = int.from_bytes(self.data[start:end], "big")
+        shift = (end - start) * 8 - (self.pos & 7) - nbits
+        self.pos += nbits
+        return (chunk >> shift) & ((1 << nbits) - 1)
+
+    def read_bit(self) -> int:
+        byte = self.data[self.pos >> 3]
+        bit = (byte >> (7 - (self.pos & 7))) & 1
+        self.pos += 1
+        return bit
+
+
+def encode_timestamps(timestamps: Sequence[int]) -> bytes:
+    """Delta-of-delta encode integer timestamps."""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    writer = BitWriter()
+    if len(ts) == 0:
+        return writer.to_bytes()
+
+    writer.write(int(ts[0]), 64)
+    deltas = np.diff(ts)
+    dods = np.diff(deltas, prepend=0).tolist()
+
+    for dod in dods:
+        if dod == 0:
+            writer.write(0, 1)
+            continue
+        for prefix, prefix_len, payload in _DOD_CLASSES:
+            bound = 1 << (payload - 1)
+            if -bound < dod <= bound:
+                break
+        else:
+            prefix, prefix_len, payload = _DOD_FALLBACK
+        writer.write(prefix, prefix_len)
+        writer.write(dod, payload)
+
+    return writer.to_bytes()
+
+
+def decode_timestamps(data: bytes, count: int) -> np.ndarray:
+    out = np.empty(count, dtype=np.int64)
+    if count == 0:
+        return out
+
+    reader = BitReader(data)
+    value = reader.read(64)
+    value = value - (1 << 64) if value >> 63 else value
+    out[0] = value
+    delta = 0
+
+    for i in range(1, count):
+        if reader.read_bit() == 0:
+            dod = 0
+        else:
+            for _prefix, prefix_len, payload in _DOD_CLASSES:
+                if reader.read_bit() == 0:
+                    break
+            else:
+                payload = _DOD_FALLBACK[2]
+            dod = reader.read(payload)
+            if dod >> (payload - 1):
+                dod -= 1 << payload
+            # Ranges are (-bound, bound]; the top value wraps to the sign bit
+            if payload != 64 and dod == -(1 << (payload - 1)):
+                dod = 1 << (payload - 1)
+        delta += dod
+        value += delta
+        out[i] = value
+
+    return out
+
+
+def encode_floats(values: Sequence[float]) -> bytes:
+    """XOR-encode float64 values against their predecessor."""
+    bits = np.asarray(values, dtype=np.float64).view(np.uint64)
+    writer = BitWriter()
+    if len(bits) == 0:
+        return writer.to_bytes()
+
+    writer.write(int(bits[0]), 64)
+    xors = (bits[1:] ^ bits[:-1]).tolist()
+    prev_leading, prev_trailing = 65, 65
+
+    for xor in xors:
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+
+        leading = 64 - xor.bit_length()
+        trailing = (xor & -xor).bit_length() - 1
+        if leading > 31:
+            leading = 31
+
+        if leading >= prev_leading and trailing >= prev_trailing:
+            writer.write(0b10, 2)
+            writer.write(xor >> prev_trailing, 64 - prev_leading - prev_trailing)
+        else:
+            meaningful = 64 - leading - trailing
+            writer.write(0b11, 2)
+            writer.write(leading, 5)
+            # 64 meaningful bits is stored as 0 in the 6-bit field
+            writer.write(meaningful & 0x3F, 6)
+            writer.write(xor >> trailing, meaningful)
+            prev_leading, prev_trailing = leading, trailing
+
+    return writer.to_bytes()
+
+
+def decode_floats(data: bytes, count: int) -> np.ndarray:
+    out = np.empty(count, dtype=np.uint64)
+    if count == 0:
+        return out.view(np.float64)
+
+    reader = BitReader(data)
+    value = reader.read(64)
+    out[0] = value
+    leading, trailing = 0, 0
+
+    for i in range(1, count):
+        if reader.read_bit() == 1:
+            if reader.read_bit() == 1:
+                leading = reader.read(5)
+                meaningful = reader.read(6) or 64
+                trailing = 64 - leading - meaningful
+            value ^= reader.read(64 - leading - trailing) << trailing
+        out[i] = value & _MASK64
+
+    return out.view(np.float64)
+
+
+def encode_block(timestamps: Sequence[int], columns: Dict[str, Sequence[float]]) -> bytes:
+    """Encode aligned timestamps and float columns into one compressed block."""
+    count = len(timestamps)
+    parts: List[bytes] = [_HEADER.pack(MAGIC, count, len(columns))]
+
+    ts_bits = encode_timestamps(timestamps)
+    parts += [_U32.pack(len(ts_bits)), ts_bits]
+
+    for name, values in columns.items():
+        if len(values) != count:
+            raise ValueError(f"Column {name!r} has {len(values)} values, expected {count}")
+        encoded_name = name.encode("utf-8")
+        value_bits = encode_floats(values)
+        parts += [_U16.pack(len(encoded_name)), encoded_name, _U32.pack(len(value_bits)), value_bits]
+
+    return b"".join(parts)
+
+
+def decode_block(data: bytes) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Decode a block produced by encode_block."""
+    magic, count, n_columns = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a Gorilla block")
+    offset = _HEADER.size
+
+    (length,) = _U32.unpack_from(data, offset)
+    offset += _U32.size
+    timestamps = decode_timestamps(data[offset:offset + length], count)
+    offset += length
+
+    columns = {}
+    for _ in range(n_columns):
+        (name_len,) = _U16.unpack_from(data, offset)
+        offset += _U16.size
+        name = data[offset:offset + name_len].decode("utf-8")
+        offset += name_len
+        (length,) = _U32.unpack_from(data, offset)
+        offset += _U32.size
+        columns[name] = decode_floats(data[offset:offset + length], count)
+        offset += length
+
+    return timestamps, columns
@@ -0,0 +1,84 @@
+"""Outbound WebSocket frame encoding.
+
+Clients pick a wire format when connecting: JSON text frames (default) or
+MessagePack binary frames, requested with the ``oddsradar.msgpack``
+subprotocol or ``?format=msgpack``. A ``Frame`` encodes its message at most
+once per format no matter how many clients receive it, and several queued
+frames can be packed into one ``{"type": "batch", "messages": [...]}``
+frame by splicing the already-encoded payloads together.
+"""
+import json
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import msgpack
+
+MSGPACK_SUBPROTOCOL = "oddsradar.msgpack"
+JSON_SUBPROTOCOL = "oddsradar.json"
+
+_packer = msgpack.Packer()
+_BATCH_PREFIX = _packer.pack_map_header(2) + _packer.pack("type") + _packer.pack("batch") + _packer.pack("messages")
+
+
+class Frame:
+    """One outbound message with lazily cached JSON and MessagePack encodings."""
+
+    __slots__ = ("message", "_text", "_binary")
+
+    def __init__(self, message: Dict[str, Any]):
+        self.message = message
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.message)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = msgpack.packb(self.message, use_bin_type=True)
+        return self._binary
+
+    def encoded(self, binary: bool) -> Union[str, bytes]:
+        return self.binary if binary else self.text
+
+
+def encode_batch(frames: Sequence[Frame], binary: bool) -> Union[str, bytes]:
+    """One payload for several frames; a single frame is sent unwrapped."""
+    if len(frames) == 1:
+        return frames[0].encoded(binary)
+    if binary:
+        return _BATCH_PREFIX + _packer.pack_array_header(len(frames)) + b"".join(f.binary for f in frames)
+    return '{"type": "batch", "messages": [' + ", ".join(f.text for f in frames) + "]}"
+
+
+def decode_client_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """A received ASGI websocket message as a dict, from JSON text or MessagePack bytes.
+
+    Raises ValueError for anything that does not decode to an object.
+    """
+    if message.get("bytes") is not None:
+        data = msgpack.unpackb(message["bytes"], raw=False)
+    else:
+        data = json.loads(message.get("text") or "")
+    if not isinstance(data, dict):
+        raise ValueError("Expected an object")
+    return data
+
+
+def negotiate_format(subprotocols: Sequence[str], requested: Optional[str]) -> Tuple[Optional[str], bool]:
+    """(subprotocol to accept with, whether to send MessagePack frames).
+
+    Only a subprotocol the client offered is ever echoed back (RFC 6455):
+    MSGPACK_SUBPROTOCOL if offered, else JSON_SUBPROTOCOL if offered, else
+    None. ``format=msgpack`` without the subprotocol still switches the
+    connection to binary frames, accepted with no subprotocol.
+    """
+    if MSGPACK_SUBPROTOCOL in subprotocols:
+        return MSGPACK_SUBPROTOCOL, True
+    binary = (requested or "").lower() == "msgpack"
+    if JSON_SUBPROTOCOL in subprotocols and not binary:
+        return JSON_SUBPROTOCOL, False
+    return None, binary
@@ -10,6 +10,8 @@ export function useMarketWebSocket() {
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null);
   const [isConnected, setIsConnected] = useState(false);
+  // Latest streamed fields per subscribed market, rebuilt from snapshot + deltas
+  const marketStateRef = useRef<Map<string, { seq: number; data: Record<string, any> }>>(new Map());
   const { setGlobalStats, setTrendingMarkets } = useStore();
 
   const connect = useCallback(() => {
@@ -25,36 +27,65 @@ export function useMarketWebSocket() {
 
       ws.onmessage = (event) => {
         try {
-          const message: WSMessage = JSON.parse(event.data);
-
-          switch (message.type) {
-            case "connected":
-              console.log("[WebSocket] Server confirmed connection");
-              break;
-
-            case "stats_update":
-              if (message.data) {
-                setGlobalStats(message.data);
-              }
-              break;
-
-            case "trending_update":
-              if (message.data && Array.isArray(message.data)) {
-                setTrendingMarkets(message.data);
+          const parsed: WSMessage = JSON.parse(event.data);
+          // Messages queued within the server's batching window arrive in one frame
+          const messages = parsed.type === "batch" ? parsed.messages ?? [] : [parsed];
+
+          for (const message of messages) {
+            switch (message.type) {
+              case "connected":
+                console.log("[WebSocket] Server confirmed connection");
+                break;
+
+              case "stats_update":
+                if (message.data) {
+                  setGlobalStats(message.data);
+                }
+                break;
+
+              case "trending_update":
+                if (message.data && Array.isArray(message.data)) {
+                  setTrendingMarkets(message.data);
+                }
+                break;
+
+              case "market_snapshot":
+                if (message.market_id) {
+                  marketStateRef.current.set(message.market_id, {
+                    seq: message.seq ?? 0,
+                    data: message.data ?? {},
+                  });
+                }
+                break;
+
+              case "market_snapshots":
+                // Topic subscriptions: one snapshot per market under the topic
+                for (const entry of message.markets ?? []) {
+                  marketStateRef.current.set(entry.market_id, { seq: entry.seq, data: entry.data ?? {} });
+                }
+                break;
+
+              case "market_update": {
+                const marketId = message.market_id;
+                if (!marketId) break;
+                const state = marketStateRef.current.get(marketId);
+                if (!state || message.seq !== state.seq + 1) {
+                  // New to this topic, or a missed/conflated update: ask for a fresh snapshot
+                  ws.send(JSON.stringify({ type: "resync", market_id: marketId }));
+                  break;
+                }
+                state.seq = message.seq;
+                state.data = { ...state.data, ...message.changes };
+                break;
               }
-              break;
 
-            case "market_update":
-              // Individual market updates can be handled here
-              console.log("[WebSocket] Market update:", message.data?.id);
-              break;
+              case "pong":
+                // Keep-alive response
+                break;
 
-            case "pong":
-              // Keep-alive response
-              break;
-
-            default:
-              console.log("[WebSocket] Unknown message type:", message.type);
+              default:
+                console.log("[WebSocket] Unknown message type:", message.type);
+            }
           }
         } catch (err) {
           console.error("[WebSocket] Failed to parse message:", err);
@@ -111,7 +142,21 @@ export function useMarketWebSocket() {
     }
   }, []);
 
+  // Topics: "platform:kalshi", "category:economics", "watchlist", "top:trending:10"
+  const subscribeToTopic = useCallback((topic: string) => {
+    if (wsRef.current?.readyState === WebSocket.OPEN) {
+      wsRef.current.send(JSON.stringify({ type: "subscribe", topic }));
+    }
+  }, []);
+
+  const unsubscribeFromTopic = useCallback((topic: string) => {
+    if (wsRef.current?.readyState === WebSocket.OPEN) {
+      wsRef.current.send(JSON.stringify({ type: "unsubscribe", topic }));
+    }
+  }, []);
+
   const unsubscribeFromMarket = useCallback((marketId: string) => {
+    marketStateRef.current.delete(marketId);
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       wsRef.current.send(JSON.stringify({ type: "unsubscribe", market_id: marketId }));
     }
@@ -134,6 +179,8 @@ export function useMarketWebSocket() {
     isConnected,
     subscribeToMarket,
     unsubscribeFromMarket,
+    subscribeToTopic,
+    unsubscribeFromTopic,
     reconnect: connect,
   };
 }
@@ -139,8 +139,29 @@ export interface GlobeMarkerData {
 
 // WebSocket message types
 export interface WSMessage {
-  type: "market_update" | "stats_update" | "trending_update" | "alert" | "error" | "connected" | "pong";
+  type:
+    | "market_update"
+    | "market_snapshot"
+    | "market_snapshots"
+    | "stats_update"
+    | "trending_update"
+    | "alert"
+    | "alerts"
+    | "error"
+    | "connected"
+    | "subscribed"
+    | "unsubscribed"
+    | "pong"
+    | "batch";
   data?: any;
+  market_id?: string;
+  // market_snapshot / market_update: per-market sequence number and changed fields
+  seq?: number;
+  changes?: Record<string, any>;
+  topic?: string;
+  markets?: { market_id: string; seq: number; data: Record<string, any> }[];
+  // batch: several messages sent in one frame
+  messages?: WSMessage[];
   timestamp: string;
 }
 